@@ -0,0 +1,113 @@
+"""
+Measure the CPU cost of compressing typical sample responses against the bytes it saves.
+
+Each payload is compressed with every content coding available to CompressionMiddleware, at a
+range of levels, using the middleware's own encoders:
+- whole: the body is compressed in one call, as for list pages and single entities
+- streamed: the body is compressed in the chunks it is sent in, as for the export endpoint,
+  with a flush after every chunk so the client can decode what it has received
+
+`encode` is the time orjson takes to produce the body, for scale. `br` and `zstd` are only
+measured when the `brotli` and `zstandard` packages are installed. No database is used;
+run it from the repository root with the application environment available:
+
+    python -m benchmarks.compression_benchmark [--repeat 3]
+"""
+import argparse
+import gzip
+import time
+import timeit
+
+import orjson
+from starlette.responses import Response
+
+from benchmarks.serialization_benchmark import make_entities, make_rows
+from src.middlewares.compression_middleware import ENCODERS, brotli, zstandard
+from src.routes.sample.sample_routes import RESPONSE_FIELDS, json_response, list_response
+from src.routes.sample.schemas import SampleEntityListResponse
+from src.routes.sample.serializers import entity_dict, row_dicts
+from src.services import CountMode
+
+LEVELS = {"gzip": (1, 4, 6, 9), "br": (1, 3, 4, 5, 9, 11), "zstd": (1, 3, 6, 12, 19)}
+# Rows per chunk of the streamed export
+EXPORT_CHUNK_ROWS = 100
+
+
+def decompress(encoding: str, data: bytes) -> bytes:
+    if encoding == "gzip":
+        return gzip.decompress(data)
+    if encoding == "br":
+        return brotli.decompress(data)
+    return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+
+def page_body(rows) -> bytes:
+    page = SampleEntityListResponse(items=[], total=len(rows), count_mode=CountMode.EXACT, skip=0, limit=len(rows))
+    return list_response(page, row_dicts(rows, RESPONSE_FIELDS), Response()).body
+
+
+def payloads() -> dict:
+    """Payload name -> (chunks as sent, encode the body)."""
+    entity = make_entities(1)[0]
+    rows_100 = make_rows(make_entities(100))
+    rows_1000 = make_rows(make_entities(1000))
+
+    def item():
+        return json_response(entity_dict(entity, RESPONSE_FIELDS), Response()).body
+
+    def export():
+        return [
+            b"".join(orjson.dumps(row, option=orjson.OPT_APPEND_NEWLINE) for row in row_dicts(rows_1000[i:i + EXPORT_CHUNK_ROWS], RESPONSE_FIELDS))
+            for i in range(0, len(rows_1000), EXPORT_CHUNK_ROWS)
+        ]
+
+    return {
+        "single item": ([item()], item),
+        "100 item page": ([page_body(rows_100)], lambda: page_body(rows_100)),
+        "1000 item page": ([page_body(rows_1000)], lambda: page_body(rows_1000)),
+        "1000 row export": (export(), export),
+    }
+
+
+def cpu_time(call, repeat: int) -> float:
+    """Best CPU seconds per call, running each timing for at least ~0.1s."""
+    once = max(timeit.timeit(call, number=1, timer=time.process_time), 1e-6)
+    number = max(1, int(0.1 / once))
+    return min(timeit.repeat(call, repeat=repeat, number=number, timer=time.process_time)) / number
+
+
+def compress(encoding: str, level: int, chunks) -> bytes:
+    encoder = ENCODERS[encoding](level)
+    return b"".join(encoder.compress(chunk, final=i == len(chunks) - 1) for i, chunk in enumerate(chunks))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="Timing runs per case; the best one is reported")
+    args = parser.parse_args()
+
+    missing = [encoding for encoding in LEVELS if encoding not in ENCODERS]
+    if missing:
+        print(f"not installed, skipped: {', '.join(missing)}\n")
+
+    for name, (chunks, encode) in payloads().items():
+        body = b"".join(chunks)
+        mode = f"streamed in {len(chunks)} chunks" if len(chunks) > 1 else "whole"
+        print(f"{name}: {len(body)} bytes, {mode}, encode {cpu_time(encode, args.repeat) * 1e6:.1f} us")
+        print(f"  {'coding':<6} {'level':>5} {'bytes':>9} {'saved':>7} {'cpu us':>10} {'MB/s':>8}")
+
+        for encoding in ENCODERS:
+            for level in LEVELS[encoding]:
+                output = compress(encoding, level, chunks)
+                # The measurement is meaningless if the client could not decode the body
+                assert decompress(encoding, output) == body
+                seconds = cpu_time(lambda: compress(encoding, level, chunks), args.repeat)
+                print(
+                    f"  {encoding:<6} {level:>5} {len(output):>9} {1 - len(output) / len(body):>7.1%} "
+                    f"{seconds * 1e6:>10.1f} {len(body) / seconds / 1e6:>8.1f}"
+                )
+        print()
+
+
+if __name__ == "__main__":
+    main()
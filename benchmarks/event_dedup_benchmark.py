@@ -0,0 +1,55 @@
+"""
+Compare the ID sets of the event deduplicator: memory, time per operation and false positives.
+
+For each `--max-ids`, an LRU set and a rotating Bloom filter per `--false-positive-rate` are
+filled with twice that many IDs, as a long-running poller would. They are then checked
+against the latest `--max-ids` IDs, all of which must be found, and against as many IDs
+never added, which gives the measured false-positive rate.
+
+    python -m benchmarks.event_dedup_benchmark [--max-ids 10000 100000] [--false-positive-rate 0.01 0.001]
+"""
+import argparse
+import time
+from typing import List
+
+from src.cache import IdSet, LruIdSet, RotatingBloomFilter
+
+
+def measure(name: str, seen: IdSet, max_ids: int):
+    added = [f"message-{n}" for n in range(2 * max_ids)]
+    started_at = time.perf_counter()
+    for message_id in added:
+        seen.add(message_id)
+    add_seconds = time.perf_counter() - started_at
+
+    latest = added[-max_ids:]
+    started_at = time.perf_counter()
+    missed = sum(message_id not in seen for message_id in latest)
+    lookup_seconds = time.perf_counter() - started_at
+    false_positives = sum(f"other-{n}" in seen for n in range(max_ids))
+
+    print(
+        f"  {name:<14} {seen.nbytes / 1024:>10.0f} KiB {add_seconds / len(added) * 1e6:>8.2f} us/add "
+        f"{lookup_seconds / max_ids * 1e6:>8.2f} us/lookup   false positives: {false_positives / max_ids:.5f}"
+        f"   missed: {missed}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-ids", type=int, nargs="+", default=[10000, 100000], help="IDs remembered")
+    parser.add_argument(
+        "--false-positive-rate", type=float, nargs="+", default=[0.01, 0.001], help="Bloom filter rates to measure"
+    )
+    args = parser.parse_args()
+
+    for max_ids in args.max_ids:
+        print(f"max ids {max_ids}")
+        measure("lru", LruIdSet(max_ids), max_ids)
+        rates: List[float] = args.false_positive_rate
+        for rate in rates:
+            measure(f"bloom {rate}", RotatingBloomFilter(max_ids, rate), max_ids)
+
+
+if __name__ == "__main__":
+    main()
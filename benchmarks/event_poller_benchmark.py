@@ -0,0 +1,194 @@
+"""
+Measure the throughput of SampleEventPoller against an in-memory stand-in queue.
+
+The queue hands out batches of messages after a simulated network round trip, and the
+processor simulates I/O-bound work: most messages take `--latency` ms and every `--slow-every`th
+message takes `--slow-latency` ms. Each concurrency level is run without ordering, then with
+messages partitioned by their `key` field, and checked for messages of a key that were
+processed out of order.
+
+With `--batch`, the processor implements `process_batch` and each received batch costs one
+`--latency` round trip, like one transaction with bulk statements. Every `--poison-every`th
+message then fails, which fails its batch and makes the poller process that batch one
+message at a time.
+
+`--prefetch` sets the received batches the poller buffers ahead of processing, `--receivers`
+the concurrent receive calls, and `--async-receive` gives the poller a native `async` receive instead of one run in a thread.
+
+Settings are read as by the application, so run it from the repository root with the
+application environment available:
+
+    python -m benchmarks.event_poller_benchmark [--messages 1000] [--concurrency 1 4 16 64] [--batch]
+        [--prefetch 2] [--receivers 1] [--async-receive]
+"""
+import argparse
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from typing import Dict, List
+
+from src.events.pollers import SampleEventPoller
+from src.events.processor import BaseEventProcessor
+
+
+class InMemoryQueue:
+    """Stand-in for a message broker: batches of up to `batch_size` messages per receive."""
+
+    def __init__(self, messages: List[Dict], batch_size: int, round_trip_in_seconds: float):
+        self.__messages__ = deque(messages)
+        self.__batch_size__ = batch_size
+        self.__round_trip_in_seconds__ = round_trip_in_seconds
+        self.__lock__ = threading.Lock()
+
+    def _take(self) -> List[Dict]:
+        with self.__lock__:
+            count = min(self.__batch_size__, len(self.__messages__))
+            return [self.__messages__.popleft() for _ in range(count)]
+
+    def receive(self) -> List[Dict]:
+        time.sleep(self.__round_trip_in_seconds__)
+        return self._take()
+
+    async def receive_async(self) -> List[Dict]:
+        await asyncio.sleep(self.__round_trip_in_seconds__)
+        return self._take()
+
+
+class QueuePoller(SampleEventPoller):
+    def __init__(self, queue: InMemoryQueue, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.__queue__ = queue
+
+    def __receive__(self) -> List[Dict]:
+        return self.__queue__.receive()
+
+
+class AsyncQueuePoller(QueuePoller):
+    async def __receive__(self) -> List[Dict]:
+        return await self.__queue__.receive_async()
+
+
+class SimulatedProcessor(BaseEventProcessor):
+    def __init__(self, expected: int, latency: float, slow_every: int, slow_latency: float, poison_every: int = 0):
+        self.__expected__ = expected
+        self.__latency__ = latency
+        self.__slow_every__ = slow_every
+        self.__slow_latency__ = slow_latency
+        self.__poison_every__ = poison_every
+        self.__last_seq__: Dict[int, int] = {}
+        self.processed = 0
+        self.failed = 0
+        self.out_of_order = 0
+        self.done = asyncio.Event()
+
+    def _is_slow(self, event) -> bool:
+        return bool(self.__slow_every__) and event["id"] % self.__slow_every__ == 0
+
+    def _is_poison(self, event) -> bool:
+        return bool(self.__poison_every__) and event["id"] % self.__poison_every__ == 0
+
+    def _record(self, event, failed: bool = False):
+        if event["seq"] < self.__last_seq__.get(event["key"], -1):
+            self.out_of_order += 1
+        self.__last_seq__[event["key"]] = max(event["seq"], self.__last_seq__.get(event["key"], -1))
+
+        if failed:
+            self.failed += 1
+        else:
+            self.processed += 1
+        if self.processed + self.failed == self.__expected__:
+            self.done.set()
+
+    async def process(self, event):
+        await asyncio.sleep(self.__slow_latency__ if self._is_slow(event) else self.__latency__)
+        self._record(event, failed=self._is_poison(event))
+        if self._is_poison(event):
+            raise ValueError(f"Poison message {event['id']}")
+
+
+class SimulatedBatchProcessor(SimulatedProcessor):
+    processes_batches = True
+
+    async def process_batch(self, events):
+        slow = any(self._is_slow(event) for event in events)
+        await asyncio.sleep(self.__slow_latency__ if slow else self.__latency__)
+        if any(self._is_poison(event) for event in events):
+            raise ValueError("Batch rolled back")
+        for event in events:
+            self._record(event)
+        return [None] * len(events)
+
+
+def make_messages(count: int, keys: int) -> List[Dict]:
+    seqs = [0] * keys
+    messages = []
+    for i in range(count):
+        key = i % keys
+        messages.append({"id": i, "key": key, "seq": seqs[key]})
+        seqs[key] += 1
+    return messages
+
+
+async def run(args, concurrency: int, ordered: bool):
+    messages = make_messages(args.messages, args.keys)
+    queue = InMemoryQueue(messages, args.batch_size, args.round_trip / 1000)
+    processor = (SimulatedBatchProcessor if args.batch else SimulatedProcessor)(
+        len(messages), args.latency / 1000, args.slow_every, args.slow_latency / 1000, args.poison_every
+    )
+    poller = (AsyncQueuePoller if args.async_receive else QueuePoller)(
+        queue, processor, concurrency=concurrency, partition_key="key" if ordered else "", prefetch_batches=args.prefetch,
+        receivers=args.receivers
+    )
+
+    started_at = time.perf_counter()
+    task = asyncio.create_task(poller.poll_messages())
+    await processor.done.wait()
+    elapsed = time.perf_counter() - started_at
+
+    # Cancelling drains what is in flight, as on application shutdown
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+    print(
+        f"  concurrency {concurrency:>4}  {'by key' if ordered else 'none':<7} "
+        f"{elapsed:>8.2f}s {len(messages) / elapsed:>10.1f} msg/s   failed: {processor.failed}   out of order: {processor.out_of_order}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=1000, help="Messages in the queue")
+    parser.add_argument("--keys", type=int, default=50, help="Distinct partition keys")
+    parser.add_argument("--batch-size", type=int, default=10, help="Messages per receive")
+    parser.add_argument("--round-trip", type=float, default=2.0, help="Milliseconds per receive")
+    parser.add_argument("--latency", type=float, default=5.0, help="Milliseconds to process a message")
+    parser.add_argument("--slow-every", type=int, default=100, help="Every nth message is slow, 0 for none")
+    parser.add_argument("--slow-latency", type=float, default=100.0, help="Milliseconds to process a slow message")
+    parser.add_argument("--batch", action="store_true", help="Process each received batch in one call")
+    parser.add_argument("--poison-every", type=int, default=0, help="Every nth message fails, 0 for none")
+    parser.add_argument("--prefetch", type=int, default=2, help="Received batches buffered ahead of processing")
+    parser.add_argument("--receivers", type=int, default=1, help="Concurrent receive calls")
+    parser.add_argument("--async-receive", action="store_true", help="Receive on the event loop instead of a thread")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64], help="Levels to measure")
+    args = parser.parse_args()
+
+    # The poller logs every message it processes, and every failure with its traceback
+    logging.getLogger("src.events").setLevel(logging.CRITICAL)
+
+    print(
+        f"{args.messages} messages, {args.keys} keys, {'batches' if args.batch else 'one message at a time'}, "
+        f"{'async' if args.async_receive else 'threaded'} receive, prefetch {args.prefetch}, {args.receivers} receiver(s)"
+    )
+    print(f"  {'':<16}  {'order':<7} {'elapsed':>9} {'throughput':>14}")
+    for concurrency in args.concurrency:
+        for ordered in (False, True):
+            await run(args, concurrency, ordered)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
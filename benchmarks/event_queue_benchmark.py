@@ -0,0 +1,135 @@
+"""
+Measure the throughput of the built-in Postgres event queue across worker processes, and check
+that no message is delivered twice.
+
+For each process count, `--messages` messages are published to a dedicated queue, then that many
+processes each run a PostgresEventPoller on it, as `python main.py worker` would. The processor
+records the ID of every message it gets and takes `--latency` ms per message (or per batch with
+`--batch`). Once the queue is empty the processes are stopped and their IDs compared: a
+duplicate means a message was delivered twice, a missing one that it was lost.
+
+Run it from the repository root against a database migrated to head:
+
+    python -m benchmarks.event_queue_benchmark [--messages 5000] [--processes 1 2 4] [--batch]
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import time
+from typing import List
+
+from sqlalchemy import delete, func, select
+
+from src.db.context import DbContext
+from src.db.event_queue import EventQueue
+from src.entities.event_queue_message import EventQueueMessage
+from src.events.pollers import PostgresEventPoller
+from src.events.processor import BaseEventProcessor
+
+QUEUE = "benchmark"
+PUBLISH_CHUNK = 1000
+
+
+class RecordingProcessor(BaseEventProcessor):
+    def __init__(self, latency: float):
+        self.__latency__ = latency
+        self.ids: List[int] = []
+
+    async def process(self, event):
+        await asyncio.sleep(self.__latency__)
+        self.ids.append(event["id"])
+
+
+class RecordingBatchProcessor(RecordingProcessor):
+    processes_batches = True
+
+    async def process_batch(self, events):
+        await asyncio.sleep(self.__latency__)
+        self.ids.extend(event["id"] for event in events)
+        return [None] * len(events)
+
+
+async def consume(args, results):
+    # The poller logs every message it processes
+    logging.getLogger("src").setLevel(logging.WARNING)
+    processor = (RecordingBatchProcessor if args.batch else RecordingProcessor)(args.latency / 1000)
+    poller = PostgresEventPoller(processor, QUEUE, concurrency=args.concurrency)
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, poller.stop)
+    await poller.poll_messages()
+    await DbContext.dispose_engine()
+    results.put(processor.ids)
+
+
+def run_process(args, results):
+    asyncio.run(consume(args, results))
+
+
+async def publish(count: int):
+    table = EventQueueMessage.__table__
+    async with DbContext.get_session_async() as session:
+        await session.exec(delete(table).where(table.c.queue == QUEUE))
+    for start in range(0, count, PUBLISH_CHUNK):
+        async with DbContext.get_session_async() as session:
+            ids = range(start, min(start + PUBLISH_CHUNK, count))
+            await EventQueue.publish(session, QUEUE, [{"n": n} for n in ids], [str(n % 100) for n in ids])
+
+
+async def remaining() -> int:
+    table = EventQueueMessage.__table__
+    async with DbContext.get_engine().connect() as connection:
+        return (await connection.execute(select(func.count()).where(table.c.queue == QUEUE))).scalar_one()
+
+
+async def run(args, processes: int):
+    await publish(args.messages)
+
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    children = [context.Process(target=run_process, args=(args, results)) for _ in range(processes)]
+    started_at = time.perf_counter()
+    for child in children:
+        child.start()
+
+    while await remaining():
+        await asyncio.sleep(0.05)
+    elapsed = time.perf_counter() - started_at
+
+    for child in children:
+        child.terminate()
+    ids = [message_id for _ in children for message_id in results.get()]
+    for child in children:
+        child.join()
+
+    # Elapsed includes starting the processes, as a deployment would
+    print(
+        f"  processes {processes:>3} {elapsed:>8.2f}s {args.messages / elapsed:>10.1f} msg/s   "
+        f"duplicates: {len(ids) - len(set(ids))}   missing: {args.messages - len(set(ids))}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=5000, help="Messages published per run")
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4], help="Process counts to measure")
+    parser.add_argument("--concurrency", type=int, default=10, help="Messages processed at once per process")
+    parser.add_argument("--batch-size", type=int, default=50, help="Messages leased per receive")
+    parser.add_argument("--latency", type=float, default=2.0, help="Milliseconds to process a message, or a batch")
+    parser.add_argument("--batch", action="store_true", help="Process each received batch in one call")
+    args = parser.parse_args()
+
+    # Read by the worker processes, which load their own settings
+    os.environ["EVENT_QUEUE_BATCH_SIZE"] = str(args.batch_size)
+    os.environ["SAMPLE_EVENT_POLLING_IDLE_INTERVAL_MIN_IN_SECONDS"] = "0.05"
+    os.environ["SAMPLE_EVENT_POLLING_IDLE_INTERVAL_MAX_IN_SECONDS"] = "0.2"
+
+    print(f"{args.messages} messages, {args.batch_size} per receive, {'batches' if args.batch else 'one message at a time'}")
+    for processes in args.processes:
+        await run(args, processes)
+    await DbContext.dispose_engine()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,65 @@
+"""
+Check that every kind of JSONB filter of the sample list endpoint can be served by its GIN index.
+
+For each filter, the statement built by SampleService is explained twice:
+- as the planner would run it on the current data; on a small table a sequential scan is
+  cheaper, so this plan may legitimately not use the index
+- with `enable_seqscan = off`, which shows whether the index is usable for the filter at all;
+  this plan must scan the expected index or the check fails
+
+Run it from the repository root against a database migrated to head:
+
+    python -m benchmarks.jsonb_plan_check
+"""
+import asyncio
+import sys
+from typing import Iterator, List
+
+from sqlalchemy import select, text
+
+from src.db.context import DbContext
+from src.entities.sample_entity import SampleEntity
+from src.services import JsonbColumn, JsonbFilter, SampleService
+
+CASES = [
+    ("contains", JsonbFilter(contains='{"status":"active"}'), "ix_sample_table_required_jsonb_path"),
+    ("keys", JsonbFilter(keys=("status", "tags")), "ix_sample_table_required_jsonb_keys"),
+    ("path equality", JsonbFilter(path='$.tags[*] == "red"'), "ix_sample_table_required_jsonb_path"),
+    ("optional contains", JsonbFilter(column=JsonbColumn.OPTIONAL, contains='{"a":1}'), "ix_sample_table_optional_jsonb_path"),
+    ("optional keys", JsonbFilter(column=JsonbColumn.OPTIONAL, keys=("a",)), "ix_sample_table_optional_jsonb_keys"),
+]
+
+
+def index_names(plan: dict) -> Iterator[str]:
+    if "Index Name" in plan:
+        yield plan["Index Name"]
+    for child in plan.get("Plans", []):
+        yield from index_names(child)
+
+
+async def scanned_indexes(session, statement) -> List[str]:
+    return list(index_names(await SampleService.explain(session, statement)))
+
+
+async def check() -> bool:
+    passed = True
+    async with DbContext.get_session_async(read_only=True) as session:
+        for name, jsonb_filter, expected_index in CASES:
+            statement = select(SampleEntity.id).where(*SampleService._list_filters(False, jsonb_filter))
+
+            natural = await scanned_indexes(session, statement)
+            await session.exec(text("SET LOCAL enable_seqscan = off"))
+            forced = await scanned_indexes(session, statement)
+            await session.exec(text("SET LOCAL enable_seqscan = on"))
+
+            ok = expected_index in forced
+            passed &= ok
+            print(f"{'ok  ' if ok else 'FAIL'} {name:<18} expected {expected_index}")
+            print(f"     planner: {', '.join(natural) or 'sequential scan'}; without seqscan: {', '.join(forced) or 'sequential scan'}")
+
+    await DbContext.dispose_engine()
+    return passed
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(check()) else 1)
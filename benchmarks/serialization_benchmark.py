@@ -0,0 +1,114 @@
+"""
+Compare the two ways sample read responses are serialised, for a single entity and a 1000 item page.
+
+- current: the route returns SampleEntity instances and FastAPI validates them against the
+  route's response model before encoding them (what `SAMPLE_FAST_SERIALIZATION=false` does)
+- fast: column rows are mapped to dicts and encoded with orjson (`SAMPLE_FAST_SERIALIZATION=true`)
+
+No database is used; rows are built in memory. Settings are read as by the application,
+so run it from the repository root with the application environment available:
+
+    python -m benchmarks.serialization_benchmark [--repeat 5]
+"""
+import argparse
+import asyncio
+import timeit
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import orjson
+from fastapi.routing import APIRoute, serialize_response
+from sqlalchemy.engine.result import IteratorResult, SimpleResultMetaData
+from starlette.responses import Response
+
+from src.entities.sample_entity import SampleEntity
+from src.routes.sample.sample_routes import RESPONSE_FIELDS, json_response, list_response, router
+from src.routes.sample.schemas import SampleEntityListResponse
+from src.routes.sample.serializers import entity_dict, row_dicts
+from src.services import CountMode
+
+
+def make_entities(count: int) -> list[SampleEntity]:
+    now = datetime.now(timezone.utc)
+    return [
+        SampleEntity(
+            required_uuid=uuid4(),
+            optional_uuid=uuid4() if i % 2 else None,
+            string_field=f"sample {i}",
+            optional_text="lorem ipsum " * 20 if i % 3 else None,
+            required_jsonb={"index": i, "tags": ["a", "b", "c"], "nested": {"value": i * 1.5, "flag": True}},
+            optional_jsonb={"note": "x" * 40} if i % 4 else None,
+            big_int=i,
+            created_on=now - timedelta(seconds=i),
+            modified_on=now - timedelta(seconds=i),
+        )
+        for i in range(count)
+    ]
+
+
+def make_rows(entities: list[SampleEntity]) -> list:
+    # Real Row objects with the columns selected by the fast path, plus the window total
+    data = [tuple(getattr(entity, field) for field in RESPONSE_FIELDS) + (len(entities),) for entity in entities]
+    return IteratorResult(SimpleResultMetaData(RESPONSE_FIELDS + ["total"]), iter(data)).all()
+
+
+def response_field(path: str):
+    route = next(r for r in router.routes if isinstance(r, APIRoute) and r.path == path and "GET" in r.methods)
+    return route.response_field
+
+
+def bench(name: str, call, repeat: int, number: int):
+    best = min(timeit.repeat(call, repeat=repeat, number=number)) / number
+    print(f"  {name:<8} {best * 1e6:>10.1f} us/response")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="Timing runs per case; the best one is reported")
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+    item_field = response_field("/{entity_id}")
+    list_field = response_field("/")
+
+    def serialize(field, content):
+        return loop.run_until_complete(serialize_response(field=field, response_content=content, dump_json=True))
+
+    entity = make_entities(1)[0]
+    entities = make_entities(1000)
+    rows = make_rows(entities)
+
+    def current_item():
+        return serialize(item_field, entity)
+
+    def fast_item():
+        return json_response(entity_dict(entity, RESPONSE_FIELDS), Response()).body
+
+    def current_page():
+        page = SampleEntityListResponse(items=entities, total=len(entities), count_mode=CountMode.EXACT, skip=0, limit=1000)
+        return serialize(list_field, page)
+
+    def fast_page():
+        page = SampleEntityListResponse(items=[], total=len(rows), count_mode=CountMode.EXACT, skip=0, limit=1000)
+        return list_response(page, row_dicts(rows, RESPONSE_FIELDS), Response()).body
+
+    # Both paths must produce the same JSON, or the comparison is meaningless
+    assert orjson.loads(current_item()) == orjson.loads(fast_item())
+    assert orjson.loads(current_page()) == orjson.loads(fast_page())
+
+    print("single item")
+    current = bench("current", current_item, args.repeat, 2000)
+    fast = bench("fast", fast_item, args.repeat, 2000)
+    print(f"  speedup  {current / fast:>10.1f}x")
+
+    print("1000 item page")
+    current = bench("current", current_page, args.repeat, 10)
+    fast = bench("fast", fast_page, args.repeat, 10)
+    print(f"  speedup  {current / fast:>10.1f}x")
+
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,42 @@
+import argparse
+import os
+
 import cowsay
 import uvicorn
 
 from src import settings
 from src.utils.env_utils import EnvUtils
+from src.utils.settings import APP_ROLES
 
 if __name__ == "__main__":
-    cowsay.tux("Starting FastAPI Template...")
-
-    uvicorn.run(
-        "src.app:application",
-        host=settings.host,
-        port=settings.port,
-        workers=settings.workers,
-        log_level="debug" if EnvUtils.is_local_environment() else "info",
-        timeout_keep_alive=10 * 60,  # 10 Minutes,
-        reload=EnvUtils.is_local_environment(),
-        reload_dirs=["src"] if EnvUtils.is_local_environment() else None,
+    parser = argparse.ArgumentParser(description="Start the FastAPI Template")
+    parser.add_argument(
+        "role",
+        nargs="?",
+        choices=APP_ROLES,
+        default=settings.app_role,
+        help="web: HTTP only, worker: event pollers and jobs only, all: both (default: APP_ROLE)"
     )
+    role = parser.parse_args().role
+    # Read by the processes started below, which load their own settings
+    os.environ["APP_ROLE"] = role
+    settings.app_role = role
+
+    if role == "worker":
+        from src.worker import Worker
+
+        cowsay.tux("Starting FastAPI Template worker...")
+        Worker.run_pool()
+    else:
+        cowsay.tux("Starting FastAPI Template...")
+
+        uvicorn.run(
+            "src.app:application",
+            host=settings.host,
+            port=settings.port,
+            workers=settings.workers,
+            log_level="debug" if EnvUtils.is_local_environment() else "info",
+            timeout_keep_alive=10 * 60,  # 10 Minutes,
+            reload=EnvUtils.is_local_environment(),
+            reload_dirs=["src"] if EnvUtils.is_local_environment() else None,
+        )
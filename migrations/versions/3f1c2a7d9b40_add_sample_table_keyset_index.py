@@ -0,0 +1,28 @@
+"""Add composite (created_on, id) index for keyset pagination
+
+Revision ID: 3f1c2a7d9b40
+Revises: 6d72b9ba9c08
+Create Date: 2026-10-17 09:12:04.118230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from src import settings
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a7d9b40'
+down_revision: Union[str, Sequence[str], None] = '6d72b9ba9c08'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_sample_table_created_on_id', 'sample_table', ['created_on', 'id'], unique=False, schema=settings.database_schema)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_sample_table_created_on_id', table_name='sample_table', schema=settings.database_schema)
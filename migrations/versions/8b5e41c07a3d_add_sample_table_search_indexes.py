@@ -0,0 +1,47 @@
+"""Add trigram, prefix and full-text search indexes to sample_table
+
+Revision ID: 8b5e41c07a3d
+Revises: 3f1c2a7d9b40
+Create Date: 2026-10-17 10:02:51.604417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from src import settings
+
+# revision identifiers, used by Alembic.
+revision: str = '8b5e41c07a3d'
+down_revision: Union[str, Sequence[str], None] = '3f1c2a7d9b40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    op.add_column('sample_table', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed("to_tsvector('english', coalesce(string_field, '') || ' ' || coalesce(optional_text, ''))", persisted=True),
+        nullable=True
+    ), schema=settings.database_schema)
+
+    op.create_index('ix_sample_table_string_field_trgm', 'sample_table', ['string_field'], unique=False, schema=settings.database_schema,
+                    postgresql_using='gin', postgresql_ops={'string_field': 'gin_trgm_ops'})
+    op.create_index('ix_sample_table_string_field_prefix', 'sample_table', [sa.text('lower(string_field) text_pattern_ops')], unique=False, schema=settings.database_schema)
+    op.create_index('ix_sample_table_search_vector', 'sample_table', ['search_vector'], unique=False, schema=settings.database_schema,
+                    postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_sample_table_search_vector', table_name='sample_table', schema=settings.database_schema)
+    op.drop_index('ix_sample_table_string_field_prefix', table_name='sample_table', schema=settings.database_schema)
+    op.drop_index('ix_sample_table_string_field_trgm', table_name='sample_table', schema=settings.database_schema)
+    op.drop_column('sample_table', 'search_vector', schema=settings.database_schema)
+    # pg_trgm is left installed; other objects in the database may depend on it
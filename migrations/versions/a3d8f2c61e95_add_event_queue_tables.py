@@ -0,0 +1,58 @@
+"""Add the event_queue and event_dead_letter tables
+
+Revision ID: a3d8f2c61e95
+Revises: e5a9c3b17f42
+Create Date: 2026-10-17 14:05:37.512904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from src import settings
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3d8f2c61e95'
+down_revision: Union[str, Sequence[str], None] = 'e5a9c3b17f42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('event_queue',
+    sa.Column('id', sa.BigInteger(), sa.Identity(always=False), nullable=False),
+    sa.Column('queue', sa.Text(), nullable=False),
+    sa.Column('key', sa.Text(), nullable=True),
+    sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('lease_id', sa.Uuid(), nullable=True),
+    sa.Column('visible_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    schema=settings.database_schema
+    )
+    op.create_index('ix_event_queue_queue_visible_at', 'event_queue', ['queue', 'visible_at', 'id'], unique=False, schema=settings.database_schema)
+    op.create_table('event_dead_letter',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('queue', sa.Text(), nullable=False),
+    sa.Column('key', sa.Text(), nullable=True),
+    sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('failed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    schema=settings.database_schema
+    )
+    op.create_index('ix_event_dead_letter_queue_failed_at', 'event_dead_letter', ['queue', 'failed_at'], unique=False, schema=settings.database_schema)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_event_dead_letter_queue_failed_at', table_name='event_dead_letter', schema=settings.database_schema)
+    op.drop_table('event_dead_letter', schema=settings.database_schema)
+    op.drop_index('ix_event_queue_queue_visible_at', table_name='event_queue', schema=settings.database_schema)
+    op.drop_table('event_queue', schema=settings.database_schema)
@@ -0,0 +1,37 @@
+"""Add the processed_event table
+
+Revision ID: b6f1d4e8a273
+Revises: a3d8f2c61e95
+Create Date: 2026-10-17 16:42:11.208315
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from src import settings
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6f1d4e8a273'
+down_revision: Union[str, Sequence[str], None] = 'a3d8f2c61e95'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('processed_event',
+    sa.Column('consumer', sa.Text(), nullable=False),
+    sa.Column('message_id', sa.Text(), nullable=False),
+    sa.Column('processed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('consumer', 'message_id'),
+    schema=settings.database_schema
+    )
+    op.create_index('ix_processed_event_processed_at', 'processed_event', ['processed_at'], unique=False, schema=settings.database_schema)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_processed_event_processed_at', table_name='processed_event', schema=settings.database_schema)
+    op.drop_table('processed_event', schema=settings.database_schema)
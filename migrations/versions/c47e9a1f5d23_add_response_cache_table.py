@@ -0,0 +1,42 @@
+"""Add the unlogged response_cache table
+
+Revision ID: c47e9a1f5d23
+Revises: 8b5e41c07a3d
+Create Date: 2026-10-17 12:40:18.226153
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from src import settings
+
+# revision identifiers, used by Alembic.
+revision: str = 'c47e9a1f5d23'
+down_revision: Union[str, Sequence[str], None] = '8b5e41c07a3d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('response_cache',
+    sa.Column('key', sa.Text(), nullable=False),
+    sa.Column('topic', sa.Text(), nullable=False),
+    sa.Column('status_code', sa.Integer(), nullable=False),
+    sa.Column('headers', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('body', sa.LargeBinary(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('key'),
+    schema=settings.database_schema,
+    prefixes=['UNLOGGED']
+    )
+    op.create_index('ix_response_cache_topic', 'response_cache', ['topic'], unique=False, schema=settings.database_schema)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_response_cache_topic', table_name='response_cache', schema=settings.database_schema)
+    op.drop_table('response_cache', schema=settings.database_schema)
@@ -0,0 +1,35 @@
+"""Add the unlogged response_cache_generation table
+
+Revision ID: d82c5f3a9e17
+Revises: b6f1d4e8a273
+Create Date: 2026-10-17 18:21:45.661094
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from src import settings
+
+# revision identifiers, used by Alembic.
+revision: str = 'd82c5f3a9e17'
+down_revision: Union[str, Sequence[str], None] = 'b6f1d4e8a273'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('response_cache_generation',
+    sa.Column('topic', sa.Text(), nullable=False),
+    sa.Column('generation', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('topic'),
+    schema=settings.database_schema,
+    prefixes=['UNLOGGED']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('response_cache_generation', schema=settings.database_schema)
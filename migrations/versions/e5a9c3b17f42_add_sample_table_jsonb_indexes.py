@@ -0,0 +1,38 @@
+"""Add GIN jsonb_path_ops indexes for JSONB filters on sample_table
+
+Revision ID: e5a9c3b17f42
+Revises: c47e9a1f5d23
+Create Date: 2026-10-17 11:48:20.318845
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from src import settings
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a9c3b17f42'
+down_revision: Union[str, Sequence[str], None] = 'c47e9a1f5d23'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Must stay identical to JSONB_KEYS_SQL in src/entities/sample_entity.py for the planner to match it
+JSONB_KEYS_SQL = "jsonb_path_query_array({column}, 'strict $.keyvalue().key', '{{}}', true)"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for column in ('required_jsonb', 'optional_jsonb'):
+        op.create_index(f'ix_sample_table_{column}_path', 'sample_table', [column], unique=False, schema=settings.database_schema,
+                        postgresql_using='gin', postgresql_ops={column: 'jsonb_path_ops'})
+        op.create_index(f'ix_sample_table_{column}_keys', 'sample_table', [sa.text(f'({JSONB_KEYS_SQL.format(column=column)}) jsonb_path_ops')],
+                        unique=False, schema=settings.database_schema, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for column in ('optional_jsonb', 'required_jsonb'):
+        op.drop_index(f'ix_sample_table_{column}_keys', table_name='sample_table', schema=settings.database_schema)
+        op.drop_index(f'ix_sample_table_{column}_path', table_name='sample_table', schema=settings.database_schema)
@@ -6,28 +6,36 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import ORJSONResponse
 
-from .events import register_event_pollers
 from .exceptions.global_handler import register_global_exception_handlers
-from .jobs import scheduler
+from .middlewares.compression_middleware import add_compression_middleware
 from .middlewares.request_logger_middleware import add_request_logger_middleware
-from .routes import hello_world_router, sample_router
+from .middlewares.response_cache_middleware import add_response_cache_middleware
+from .routes import hello_world_router, metrics_router, sample_router
+from .db.cache_invalidation import CacheInvalidation
 from .db.context import DbContext
-from . import entities
+from .worker import Worker
+from . import entities, settings
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger = logging.getLogger(__name__)
-    poller_task = None
+    invalidation_task = None
 
     try:
         # Startup
         logger.info("Starting application services...")
-        poller_task = asyncio.create_task(register_event_pollers())
-
-        if not scheduler.running:
-            scheduler.start()
-            logger.info("Scheduler started successfully")
+        invalidation_task = asyncio.create_task(CacheInvalidation.listen())
+
+        if settings.app_role == "all":
+            if settings.workers > 1:
+                logger.warning(
+                    f"Every one of the {settings.workers} workers runs the event pollers and the scheduler; "
+                    "run them in worker processes with APP_ROLE=web and APP_ROLE=worker instead"
+                )
+            await Worker.start()
+        else:
+            logger.info("Serving HTTP only; event pollers and jobs run in the worker processes")
 
         logger.info("Application startup complete")
 
@@ -37,16 +45,14 @@ async def lifespan(app: FastAPI):
         # Shutdown
         logger.info("Shutting down application services...")
 
-        if poller_task and not poller_task.done():
-            poller_task.cancel()
+        await Worker.stop()
+
+        if invalidation_task and not invalidation_task.done():
+            invalidation_task.cancel()
             try:
-                await poller_task
+                await invalidation_task
             except asyncio.CancelledError:
-                logger.info("Event poller cancelled successfully")
-
-        if scheduler.running:
-            scheduler.shutdown(wait=True)
-            logger.info("Scheduler shutdown complete")
+                logger.info("Cache invalidation listener cancelled successfully")
 
         # Close database connections
         await DbContext.dispose_engine()
@@ -66,8 +72,26 @@ def setup_application():
         redoc_url="/redoc"
     )
 
-    # CORS Configuration - Configure allowed origins from environment variables
-    from . import settings
+    # Health check endpoint
+    @app.get("/health", tags=["Health"])
+    async def health_check():
+        return {"status": "healthy", "service": "fastapi-template"}
+
+    # Register routers
+    app.include_router(hello_world_router, prefix="/api/v1/hello-world", tags=["Hello World"])
+    app.include_router(sample_router, prefix="/api/v1/samples", tags=["Samples"])
+    app.include_router(metrics_router, prefix="/api/v1/metrics", tags=["Metrics"])
+
+    register_global_exception_handlers(app)
+
+    # Added before the request logger so that cache hits are still logged
+    add_response_cache_middleware(app, {
+        "/api/v1/samples/": entities.SampleEntity.__tablename__,
+        "/api/v1/samples/search/by-string": entities.SampleEntity.__tablename__,
+    })
+
+    # CORS Configuration - Configure allowed origins from environment variables. Added after the
+    # response cache so that its headers, which depend on the request's Origin, are never cached
     allowed_origins = getattr(settings, 'cors_allowed_origins', '*')
     if allowed_origins == '*':
         allowed_origins = ["*"]
@@ -83,17 +107,10 @@ def setup_application():
         max_age=600,  # Cache preflight requests for 10 minutes
     )
 
-    # Health check endpoint
-    @app.get("/health", tags=["Health"])
-    async def health_check():
-        return {"status": "healthy", "service": "fastapi-template"}
-
-    # Register routers
-    app.include_router(hello_world_router, prefix="/api/v1/hello-world", tags=["Hello World"])
-    app.include_router(sample_router, prefix="/api/v1/samples", tags=["Samples"])
-
-    register_global_exception_handlers(app)
     add_request_logger_middleware(app)
+    # Added last so that it wraps every other middleware: cached responses are stored uncompressed
+    # and compressed for each client with the coding it accepts
+    add_compression_middleware(app)
 
     return app
 
@@ -0,0 +1,9 @@
+from .id_set import IdSet, LruIdSet, RotatingBloomFilter
+from .response_cache import CachedResponse, ResponseCacheBackend, MemoryResponseCacheBackend
+from .single_flight import SingleFlight
+from .ttl_cache import TtlCache
+
+__all__ = [
+    "CachedResponse", "ResponseCacheBackend", "MemoryResponseCacheBackend", "SingleFlight", "TtlCache",
+    "IdSet", "LruIdSet", "RotatingBloomFilter"
+]
@@ -0,0 +1,119 @@
+import abc
+import math
+import sys
+from collections import OrderedDict
+from hashlib import blake2b
+from typing import List
+
+
+class IdSet(abc.ABC):
+    """
+    Bounded set of message IDs, forgetting the oldest ones once full.
+
+    An `exact` set never reports an ID it was not given; a probabilistic one may, at the
+    false-positive rate it was built for, but never misses an ID it still remembers.
+    """
+
+    exact = True
+
+    @abc.abstractmethod
+    def add(self, message_id: str) -> None:
+        pass
+
+    @abc.abstractmethod
+    def __contains__(self, message_id: str) -> bool:
+        pass
+
+    @abc.abstractmethod
+    def __len__(self) -> int:
+        pass
+
+    @property
+    @abc.abstractmethod
+    def nbytes(self) -> int:
+        """Approximate memory held by the set."""
+        pass
+
+
+class LruIdSet(IdSet):
+    """Exact set of the `max_ids` most recently added IDs."""
+
+    def __init__(self, max_ids: int):
+        self.__max_ids__ = max_ids
+        self.__ids__: OrderedDict = OrderedDict()
+        self.__id_bytes__ = 0
+
+    def add(self, message_id: str) -> None:
+        if message_id in self.__ids__:
+            self.__ids__.move_to_end(message_id)
+            return
+        self.__ids__[message_id] = None
+        self.__id_bytes__ += sys.getsizeof(message_id)
+        while len(self.__ids__) > self.__max_ids__:
+            evicted, _ = self.__ids__.popitem(last=False)
+            self.__id_bytes__ -= sys.getsizeof(evicted)
+
+    def __contains__(self, message_id: str) -> bool:
+        return message_id in self.__ids__
+
+    def __len__(self) -> int:
+        return len(self.__ids__)
+
+    @property
+    def nbytes(self) -> int:
+        return sys.getsizeof(self.__ids__) + self.__id_bytes__
+
+
+class RotatingBloomFilter(IdSet):
+    """
+    Bloom filter of the latest `max_ids` to 2 * `max_ids` added IDs, in constant memory.
+
+    IDs are added to the current of two generations; once it holds `max_ids`, the previous
+    generation is dropped and a new one started. An ID is looked up in both, so each is
+    sized for half of `false_positive_rate`.
+    """
+
+    exact = False
+
+    def __init__(self, max_ids: int, false_positive_rate: float):
+        self.__max_ids__ = max_ids
+        rate = false_positive_rate / 2
+        self.__bits__ = max(8, math.ceil(-max_ids * math.log(rate) / math.log(2) ** 2))
+        self.__hashes__ = max(1, round(self.__bits__ / max_ids * math.log(2)))
+        self.__current__ = bytearray((self.__bits__ + 7) // 8)
+        self.__previous__ = bytearray(len(self.__current__))
+        self.__current_ids__ = 0
+        self.__previous_ids__ = 0
+
+    def _positions(self, message_id: str) -> List[int]:
+        # Double hashing: k positions from the two halves of one digest
+        digest = blake2b(message_id.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.__bits__ for i in range(self.__hashes__)]
+
+    @staticmethod
+    def _has(bits: bytearray, positions: List[int]) -> bool:
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in positions)
+
+    def add(self, message_id: str) -> None:
+        positions = self._positions(message_id)
+        if self._has(self.__current__, positions):
+            return
+        if self.__current_ids__ >= self.__max_ids__:
+            self.__previous__, self.__current__ = self.__current__, bytearray(len(self.__current__))
+            self.__previous_ids__, self.__current_ids__ = self.__current_ids__, 0
+        for position in positions:
+            self.__current__[position >> 3] |= 1 << (position & 7)
+        self.__current_ids__ += 1
+
+    def __contains__(self, message_id: str) -> bool:
+        positions = self._positions(message_id)
+        return self._has(self.__current__, positions) or self._has(self.__previous__, positions)
+
+    def __len__(self) -> int:
+        return self.__current_ids__ + self.__previous_ids__
+
+    @property
+    def nbytes(self) -> int:
+        return sys.getsizeof(self.__current__) + sys.getsizeof(self.__previous__)
@@ -0,0 +1,80 @@
+import abc
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from .ttl_cache import TtlCache
+
+
+@dataclass
+class CachedResponse:
+    """A complete response as sent through ASGI: status, raw headers and body."""
+    status_code: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(name) + len(value) for name, value in self.headers)
+
+
+class ResponseCacheBackend(abc.ABC):
+    """
+    Storage of cached responses, grouped by topic so that a write can drop every
+    response derived from the data it changed.
+
+    A `shared` backend is seen by every worker and only needs invalidating once, by the
+    worker that made the change; other backends are invalidated in every worker.
+    """
+
+    shared = False
+
+    @abc.abstractmethod
+    async def generation(self, topic: str) -> int:
+        """Changes whenever `topic` is invalidated; see `set`."""
+        pass
+
+    @abc.abstractmethod
+    async def get(self, key: str, topic: str) -> Optional[CachedResponse]:
+        pass
+
+    @abc.abstractmethod
+    async def set(self, key: str, topic: str, response: CachedResponse, generation: int) -> None:
+        """Store `response` unless `topic` was invalidated since `generation` was read."""
+        pass
+
+    @abc.abstractmethod
+    def invalidate(self, topic: str) -> None:
+        pass
+
+
+class MemoryResponseCacheBackend(ResponseCacheBackend):
+    """Per-worker backend on one bounded TtlCache per topic."""
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl_in_seconds: float):
+        self.__max_entries__ = max_entries
+        self.__max_bytes__ = max_bytes
+        self.__ttl_in_seconds__ = ttl_in_seconds
+        self.__caches__: Dict[str, TtlCache] = {}
+
+    def _cache(self, topic: str) -> TtlCache:
+        if topic not in self.__caches__:
+            self.__caches__[topic] = TtlCache(
+                max_entries=self.__max_entries__,
+                ttl_in_seconds=self.__ttl_in_seconds__,
+                max_bytes=self.__max_bytes__,
+                sizeof=lambda response: response.size,
+                name=f"response_{topic}"
+            )
+        return self.__caches__[topic]
+
+    async def generation(self, topic: str) -> int:
+        return self._cache(topic).generation
+
+    async def get(self, key: str, topic: str) -> Optional[CachedResponse]:
+        return self._cache(topic).get(key)
+
+    async def set(self, key: str, topic: str, response: CachedResponse, generation: int) -> None:
+        self._cache(topic).set(key, response, generation)
+
+    def invalidate(self, topic: str) -> None:
+        self._cache(topic).invalidate()
@@ -0,0 +1,52 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from src.metrics import MetricsRegistry
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls within a worker.
+
+    While a call for a key is in flight, later calls for the same key wait for it and
+    share its result or exception instead of running again. Publishes request and
+    execution counters and the resulting coalescing ratio under the `flight` label.
+    """
+
+    def __init__(self, name: str):
+        self.__inflight__: Dict[Hashable, asyncio.Task] = {}
+
+        labels = {"flight": name}
+        self.__requests__ = MetricsRegistry.counter("single_flight_requests_total", labels)
+        self.__executions__ = MetricsRegistry.counter("single_flight_executions_total", labels)
+        MetricsRegistry.gauge("single_flight_coalescing_ratio", self._coalescing_ratio, labels)
+
+    def _coalescing_ratio(self) -> float:
+        # Share of requests that were served by another request's call
+        if not self.__requests__.value:
+            return 0.0
+        return round(1 - self.__executions__.value / self.__requests__.value, 4)
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Run `call`, or wait for the call already in flight for `key`, and return its result."""
+        self.__requests__.inc()
+
+        task = self.__inflight__.get(key)
+        if task is None:
+            self.__executions__.inc()
+            # A task of its own, so that cancelling the first caller does not fail the others
+            task = asyncio.ensure_future(call())
+            self.__inflight__[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        if self.__inflight__.get(key) is task:
+            del self.__inflight__[key]
+        if not task.cancelled():
+            # Marks the exception as retrieved when every caller was cancelled before it
+            task.exception()
+
+    def __len__(self) -> int:
+        return len(self.__inflight__)
@@ -0,0 +1,103 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+from src.metrics import MetricsRegistry
+
+
+class TtlCache:
+    """
+    Bounded in-process cache whose entries expire after a fixed time-to-live.
+    Once full, the least recently used entry is evicted first.
+
+    With `max_bytes` and `sizeof`, the cache is also bounded by the summed size of its values.
+    A cache given a `name` publishes hit, miss and eviction counters and size gauges under
+    the `cache` label.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_in_seconds: float,
+        max_bytes: int = 0,
+        sizeof: Optional[Callable[[Any], int]] = None,
+        name: Optional[str] = None
+    ):
+        self.__max_entries__ = max_entries
+        self.__ttl_in_seconds__ = ttl_in_seconds
+        self.__max_bytes__ = max_bytes if sizeof else 0
+        self.__size_of__ = sizeof
+        self.__entries__: OrderedDict = OrderedDict()
+        self.__bytes__ = 0
+
+        # Bumped by every invalidation; see `set`
+        self.generation = 0
+
+        labels = {"cache": name} if name else None
+        self.__hits__ = MetricsRegistry.counter("cache_hits_total", labels) if name else None
+        self.__misses__ = MetricsRegistry.counter("cache_misses_total", labels) if name else None
+        self.__evictions__ = MetricsRegistry.counter("cache_evictions_total", labels) if name else None
+        if name:
+            MetricsRegistry.gauge("cache_entries", lambda: len(self.__entries__), labels)
+            MetricsRegistry.gauge("cache_bytes", lambda: self.__bytes__, labels)
+
+    def _record(self, counter):
+        if counter is not None:
+            counter.inc()
+
+    def _remove(self, key: Hashable):
+        _, _, size = self.__entries__.pop(key)
+        self.__bytes__ -= size
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        entry = self.__entries__.get(key)
+        if entry is None:
+            self._record(self.__misses__)
+            return default
+
+        expires_at, value, _ = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self._record(self.__misses__)
+            return default
+
+        self.__entries__.move_to_end(key)
+        self._record(self.__hits__)
+        return value
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None) -> None:
+        """
+        Store `value` under `key`.
+
+        Pass the `generation` read before loading the value to drop the write when an
+        invalidation happened in the meantime, since the loaded value may predate it.
+        """
+        if generation is not None and generation != self.generation:
+            return
+
+        size = self.__size_of__(value) if self.__size_of__ else 0
+        if self.__max_bytes__ and size > self.__max_bytes__:
+            return
+
+        if key in self.__entries__:
+            self._remove(key)
+        self.__entries__[key] = (time.monotonic() + self.__ttl_in_seconds__, value, size)
+        self.__bytes__ += size
+
+        while len(self.__entries__) > self.__max_entries__ or (
+            self.__max_bytes__ and self.__bytes__ > self.__max_bytes__
+        ):
+            self._remove(next(iter(self.__entries__)))
+            self._record(self.__evictions__)
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Drop a single entry, or every entry when no key is given."""
+        self.generation += 1
+        if key is None:
+            self.__entries__.clear()
+            self.__bytes__ = 0
+        elif key in self.__entries__:
+            self._remove(key)
+
+    def __len__(self) -> int:
+        return len(self.__entries__)
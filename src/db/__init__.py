@@ -1 +1,3 @@
-from .context import DbContext
\ No newline at end of file
+from .cache_invalidation import CacheInvalidation
+from .context import DbContext
+from .statement_counter import StatementCounter
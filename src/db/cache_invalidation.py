@@ -0,0 +1,219 @@
+import asyncio
+import logging
+import os
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+from uuid import uuid4
+
+import orjson
+import psycopg
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from src import settings
+from src.cache import TtlCache
+from src.metrics import MetricsRegistry
+
+
+class CacheInvalidation:
+    """
+    Invalidates in-process caches in every worker and node when entities change.
+
+    Writers record the changed keys on their session with `track`; the listeners in
+    `src/db/listeners.py` publish them with `pg_notify` inside the committing transaction,
+    so they are only broadcast once the change is visible, and invalidate this worker's
+    caches right after the commit. Every notification carries the ID of the process that
+    sent it, and `listen` skips this process's own, so only the notifications of the
+    other workers are applied.
+
+    Handlers subscribed with `remote=False` only run for this worker's own commits; they
+    suit caches shared by all workers, which need invalidating once. Inserted keys are
+    notified apart from the other changed keys, and handlers subscribed with
+    `inserts=False` are not called for them: a cache keyed by entity cannot hold an entity
+    that did not exist yet. They are notified whatever this worker subscribed to, since
+    the other workers may take inserts even when this one does not.
+    """
+
+    CHANNEL = "cache_invalidation"
+    # Session info key of the keys that were only inserted
+    INSERTED = "cache_invalidation_inserted"
+
+    # NOTIFY payloads are limited to 8000 bytes; larger changes clear the whole cache instead
+    MAX_KEYS_PER_NOTIFICATION = 100
+
+    RECONNECT_DELAY_INITIAL_IN_SECONDS = 1
+    RECONNECT_DELAY_MAX_IN_SECONDS = 30
+
+    # topic -> [(handler, remote, inserts)]; a handler receives the changed keys, or None for all of them
+    __handlers__: Dict[str, List[Tuple[Callable[[Optional[Set[str]]], None], bool, bool]]] = {}
+    # (pid, ID) of the process sending notifications; a forked child gets an ID of its own
+    __origin__: Tuple[int, str] = (0, "")
+    __logger__ = logging.getLogger(__name__)
+
+    @staticmethod
+    def subscribe(
+        topic: str,
+        handler: Callable[[Optional[Set[str]]], None],
+        remote: bool = True,
+        inserts: bool = True
+    ):
+        """
+        Call `handler` with the changed keys of `topic`, or None when all of them may have changed.
+        With `inserts=False`, inserts alone do not call it.
+        """
+        CacheInvalidation.__handlers__.setdefault(topic, []).append((handler, remote, inserts))
+
+    @staticmethod
+    def register(topic: str, cache: TtlCache):
+        """Invalidate the entries of `cache`, keyed by `topic` keys, when they change."""
+        def invalidate(keys: Optional[Set[str]]):
+            if keys is None:
+                cache.invalidate()
+                return
+            for key in keys:
+                cache.invalidate(key)
+
+        # An entry is only cached once its entity exists, so inserts cannot make one stale
+        CacheInvalidation.subscribe(topic, invalidate, inserts=False)
+
+    @staticmethod
+    def _origin() -> str:
+        pid, origin = CacheInvalidation.__origin__
+        if pid != os.getpid():
+            origin = uuid4().hex
+            CacheInvalidation.__origin__ = (os.getpid(), origin)
+        return origin
+
+    @staticmethod
+    def track(
+        session: Session,
+        topic: str,
+        keys: Optional[Iterable[Hashable]] = None,
+        inserted: bool = False
+    ):
+        """
+        Record keys of `topic` changed in the current transaction of `session`.
+        Without `keys`, the whole cache of `topic` is invalidated on commit. `inserted`
+        keys skip the handlers that do not take inserts, unless they also changed otherwise.
+        """
+        if not CacheInvalidation.__handlers__.get(topic):
+            return
+        pending: Dict[str, Optional[Set[str]]] = session.info.setdefault(CacheInvalidation.CHANNEL, {})
+        if keys is None or (topic in pending and pending[topic] is None):
+            pending[topic] = None
+            return
+        keys = {str(key) for key in keys}
+        only_inserted: Set[str] = session.info.setdefault(CacheInvalidation.INSERTED, {}).setdefault(topic, set())
+        if inserted:
+            only_inserted.update(keys - pending.get(topic, set()))
+        else:
+            only_inserted.difference_update(keys)
+        pending.setdefault(topic, set()).update(keys)
+
+    @staticmethod
+    def pending(session: Session) -> Dict[str, Optional[Set[str]]]:
+        return session.info.get(CacheInvalidation.CHANNEL, {})
+
+    @staticmethod
+    def inserted(session: Session) -> Dict[str, Set[str]]:
+        """The pending keys of each topic that were only inserted."""
+        return session.info.get(CacheInvalidation.INSERTED, {})
+
+    @staticmethod
+    def discard(session: Session) -> Dict[str, Optional[Set[str]]]:
+        session.info.pop(CacheInvalidation.INSERTED, None)
+        return session.info.pop(CacheInvalidation.CHANNEL, {})
+
+    @staticmethod
+    def publish(session: Session):
+        """Queue a notification per changed topic in the transaction being committed."""
+        inserted = CacheInvalidation.inserted(session)
+        for topic, keys in CacheInvalidation.pending(session).items():
+            if keys is not None and len(keys) > CacheInvalidation.MAX_KEYS_PER_NOTIFICATION:
+                keys = None
+            only_inserted = inserted.get(topic, set()) if keys is not None else set()
+            payload = {
+                "topic": topic,
+                "keys": sorted(keys - only_inserted) if keys is not None else None,
+                "inserted": sorted(only_inserted),
+                "origin": CacheInvalidation._origin(),
+            }
+            session.connection().execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": CacheInvalidation.CHANNEL, "payload": orjson.dumps(payload).decode()}
+            )
+
+    @staticmethod
+    def apply(
+        topic: str,
+        keys: Optional[Iterable[str]],
+        remote: bool = False,
+        inserted: Optional[Iterable[str]] = None
+    ):
+        """
+        Run the handlers of `topic` for `keys`, or for all keys when `keys` is None.
+        The `inserted` keys among `keys` are left out for handlers that do not take inserts.
+        """
+        keys = set(keys) if keys is not None else None
+        changed = keys - set(inserted) if keys is not None and inserted else keys
+        for handler, handles_remote, handles_inserts in CacheInvalidation.__handlers__.get(topic, []):
+            if remote and not handles_remote:
+                continue
+            handler_keys = keys if handles_inserts else changed
+            if handler_keys is not None and not handler_keys:
+                continue
+            try:
+                handler(handler_keys)
+            except Exception:
+                CacheInvalidation.__logger__.exception(f"Cache invalidation handler for '{topic}' failed")
+
+    @staticmethod
+    def _conninfo() -> str:
+        # The dedicated LISTEN connection uses psycopg directly, outside of the SQLAlchemy pool
+        url = make_url(settings.database_url).set(drivername="postgresql")
+        return url.render_as_string(hide_password=False)
+
+    @staticmethod
+    async def listen():
+        """
+        Apply invalidations broadcast by other workers until cancelled.
+
+        Notifications sent while disconnected are lost, so every cache is cleared after
+        the connection is (re-)established.
+        """
+        if not CacheInvalidation.__handlers__:
+            return
+
+        received = MetricsRegistry.counter("cache_invalidation_notifications_total")
+        backoff = CacheInvalidation.RECONNECT_DELAY_INITIAL_IN_SECONDS
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(
+                    CacheInvalidation._conninfo(), autocommit=True
+                ) as connection:
+                    await connection.execute(f"LISTEN {CacheInvalidation.CHANNEL}")
+                    for topic in CacheInvalidation.__handlers__:
+                        CacheInvalidation.apply(topic, None, remote=True)
+                    backoff = CacheInvalidation.RECONNECT_DELAY_INITIAL_IN_SECONDS
+                    CacheInvalidation.__logger__.info(f"Listening for cache invalidations on '{CacheInvalidation.CHANNEL}'")
+
+                    async for notification in connection.notifies():
+                        received.inc()
+                        payload = orjson.loads(notification.payload)
+                        # This worker's own commits were applied right after committing
+                        if payload.get("origin") == CacheInvalidation._origin():
+                            continue
+                        keys, inserted = payload["keys"], payload.get("inserted", [])
+                        if keys is not None:
+                            keys = keys + inserted
+                        CacheInvalidation.apply(payload["topic"], keys, remote=True, inserted=inserted)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                CacheInvalidation.__logger__.exception(
+                    f"Cache invalidation listener failed, reconnecting in {backoff}s"
+                )
+                for topic in CacheInvalidation.__handlers__:
+                    CacheInvalidation.apply(topic, None, remote=True)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, CacheInvalidation.RECONNECT_DELAY_MAX_IN_SECONDS)
@@ -1,52 +1,207 @@
+from contextvars import ContextVar
+
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine
 from sqlalchemy.orm import sessionmaker
 from sqlmodel.ext.asyncio.session import AsyncSession
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, contextmanager
 import logging
-from typing import Optional
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
 
 from src import settings
+from . import listeners  # noqa: F401 - registers the session and mapper event listeners
+from .pool_metrics import InstrumentedAsyncAdaptedQueuePool, PoolMetrics
+from .read_replica import ReadReplica
+from .statement_counter import StatementCounter
+
+# Read-only sessions run each statement in its own implicit transaction, without BEGIN or COMMIT round trips
+READ_ONLY_OPTIONS = {"isolation_level": "AUTOCOMMIT"}
+# Snapshot sessions see one consistent snapshot across statements and can keep server-side cursors open
+SNAPSHOT_OPTIONS = {"isolation_level": "REPEATABLE READ", "postgresql_readonly": True}
+# Session info key of the replica serving a read-only session
+REPLICA_SESSION_KEY = "read_replica"
 
 
 class DbContext:
     __engine__: Optional[AsyncEngine] = None
     __session_maker__ = None
+    __read_replicas__: List[ReadReplica] = []
+    __next_replica__ = 0
+    # Engines with the read-only execution options applied, by engine and snapshot flag
+    __read_binds__: Dict[Tuple[AsyncEngine, bool], AsyncEngine] = {}
+
+    # Set once a write is committed; later reads in the same unit of work then go to the primary
+    __wrote__: ContextVar[bool] = ContextVar("db_context_wrote", default=False)
+
+    @staticmethod
+    def _pool_limits() -> Tuple[int, int]:
+        """
+        Pool size and overflow for this process.
+
+        With DATABASE_CONNECTION_BUDGET set, the budget is split evenly across the processes
+        of every role (the uvicorn workers, plus the worker processes when the roles run
+        apart) and the configured pool is shrunk to fit each process's share, so that the
+        web and worker deployments together stay within the budget.
+        """
+        pool_size = settings.database_pool_size
+        max_overflow = settings.database_max_overflow
+        if settings.database_connection_budget:
+            per_process = max(1, settings.database_connection_budget // settings.process_count)
+            pool_size = min(pool_size, per_process)
+            max_overflow = min(max_overflow, per_process - pool_size)
+        return pool_size, max_overflow
+
+    @staticmethod
+    def _create_engine(url: str, name: str) -> AsyncEngine:
+        pool_size, max_overflow = DbContext._pool_limits()
+        engine = create_async_engine(
+            url,
+            echo=False,                    # If True, logs all SQL statements (debugging only)
+            poolclass=InstrumentedAsyncAdaptedQueuePool,
+            pool_size=pool_size,           # Number of connections kept open in the pool
+            max_overflow=max_overflow,     # Extra connections allowed beyond pool_size
+            pool_timeout=settings.database_pool_timeout_in_seconds,  # Seconds to wait before giving up if pool is full
+            pool_recycle=settings.database_pool_recycle_in_seconds,  # Seconds after which a connection is recycled
+            pool_pre_ping=True,            # Tests connections before using them
+            pool_use_lifo=True,            # Use LIFO instead of FIFO for better connection reuse
+        )
+        PoolMetrics.instrument(engine, name)
+        StatementCounter.instrument(engine, name)
+        return engine
+
+    @staticmethod
+    def _create_session_maker(engine: AsyncEngine) -> sessionmaker:
+        return sessionmaker(
+            bind=engine,
+            class_=AsyncSession,
+            expire_on_commit=False,        # Keeps objects "live" after commit
+            autoflush=False,               # Don't auto-flush before queries
+            autocommit=False,              # Explicit transaction control
+        )
 
     @staticmethod
     def initialize():
         if DbContext.__engine__ is None:
-            DbContext.__engine__ = create_async_engine(
-                settings.database_url,
-                echo=False,                    # If True, logs all SQL statements (debugging only)
-                pool_size=10,                  # Number of connections kept open in the pool
-                max_overflow=20,               # Extra connections allowed beyond pool_size
-                pool_timeout=30,               # Seconds to wait before giving up if pool is full
-                pool_recycle=1800,             # Seconds after which a connection is recycled (30 minutes)
-                pool_pre_ping=True,            # Tests connections before using them
-                pool_use_lifo=True,            # Use LIFO instead of FIFO for better connection reuse
-            )
+            DbContext.__engine__ = DbContext._create_engine(settings.database_url, "primary")
+            DbContext.__session_maker__ = DbContext._create_session_maker(DbContext.__engine__)
 
-            DbContext.__session_maker__ = sessionmaker(
-                bind=DbContext.__engine__,
-                class_=AsyncSession,
-                expire_on_commit=False,        # Keeps objects "live" after commit
-                autoflush=False,               # Don't auto-flush before queries
-                autocommit=False,              # Explicit transaction control
+            pool_size, max_overflow = DbContext._pool_limits()
+            logging.info(
+                f"Database pool per process: pool_size={pool_size}, max_overflow={max_overflow} "
+                f"({settings.process_count} {settings.app_role} process(es))"
             )
 
+            read_urls = [url.strip() for url in settings.database_read_urls.split(',') if url.strip()]
+            for index, url in enumerate(read_urls):
+                engine = DbContext._create_engine(url, f"replica_{index}")
+                DbContext.__read_replicas__.append(
+                    ReadReplica(url, engine, DbContext._create_session_maker(engine))
+                )
+            if read_urls:
+                logging.info(f"Configured {len(read_urls)} database read replica(s)")
+
     @staticmethod
     def get_engine() -> AsyncEngine:
         DbContext.initialize()
         return DbContext.__engine__
 
+    @staticmethod
+    @contextmanager
+    def unit_of_work() -> Iterator[None]:
+        """
+        Scope read-your-writes to a request or a message: reads inside go to the primary only
+        once a write was committed inside, whatever the task committed before.
+        """
+        token = DbContext.__wrote__.set(False)
+        try:
+            yield
+        finally:
+            DbContext.__wrote__.reset(token)
+
+    @staticmethod
+    def has_written() -> bool:
+        """Whether a write was committed earlier in the current request or message."""
+        return DbContext.__wrote__.get()
+
+    @staticmethod
+    def is_replica(session: AsyncSession) -> bool:
+        """Whether `session` is served by a read replica, which may lag behind the primary."""
+        return REPLICA_SESSION_KEY in session.info
+
+    @staticmethod
+    def _read_bind(engine: AsyncEngine, snapshot: bool) -> AsyncEngine:
+        key = (engine, snapshot)
+        if key not in DbContext.__read_binds__:
+            DbContext.__read_binds__[key] = engine.execution_options(
+                **(SNAPSHOT_OPTIONS if snapshot else READ_ONLY_OPTIONS)
+            )
+        return DbContext.__read_binds__[key]
+
+    @staticmethod
+    async def _open_read_session(snapshot: bool) -> Optional[AsyncSession]:
+        """
+        Open a session on the next healthy replica, round robin.
+
+        The connection is checked out (and pre-pinged) up front so that an unreachable
+        replica is detected here, marked unhealthy and skipped, instead of failing the query.
+        Returns None when no replica is usable.
+        """
+        replicas = DbContext.__read_replicas__
+        for _ in range(len(replicas)):
+            replica = replicas[DbContext.__next_replica__ % len(replicas)]
+            DbContext.__next_replica__ += 1
+            if not replica.is_healthy():
+                continue
+
+            session: AsyncSession = replica.session_maker(bind=DbContext._read_bind(replica.engine, snapshot))
+            try:
+                await session.connection()
+                replica.mark_healthy()
+                session.info[REPLICA_SESSION_KEY] = replica.name
+                return session
+            except (DBAPIError, OSError):
+                await session.close()
+                replica.mark_unhealthy(settings.database_replica_retry_in_seconds)
+                logging.warning(
+                    f"Read replica {replica.name} is unavailable, skipping it for "
+                    f"{settings.database_replica_retry_in_seconds}s", exc_info=True
+                )
+        return None
+
     @staticmethod
     @asynccontextmanager
-    async def get_session_async():
+    async def get_session_async(read_only: bool = False, snapshot: bool = False):
+        """
+        Open a session that commits on success and rolls back on error.
+
+        The primary's connection is only checked out by the first statement. With `read_only=True`
+        nothing is committed: statements run in autocommit mode, each in its own implicit
+        transaction, and the connection goes back to the pool when the session closes. Add
+        `snapshot=True` for reads that need one consistent snapshot across their statements, or
+        a server-side cursor; they run in a single REPEATABLE READ, READ ONLY transaction.
+
+        A read-only session is served by a read replica when DATABASE_READ_URLS is set, falling
+        back to the primary when every replica is down, or when a write was already committed
+        in the current `unit_of_work` (DATABASE_READ_YOUR_WRITES).
+        """
         DbContext.initialize()
-        session: AsyncSession = DbContext.__session_maker__()
+
+        session: Optional[AsyncSession] = None
+        if read_only and DbContext.__read_replicas__:
+            if not (settings.database_read_your_writes and DbContext.__wrote__.get()):
+                session = await DbContext._open_read_session(snapshot)
+        if session is None and read_only:
+            session = DbContext.__session_maker__(bind=DbContext._read_bind(DbContext.__engine__, snapshot))
+        elif session is None:
+            session = DbContext.__session_maker__()
+
         try:
             yield session
-            await session.commit()
+            if not read_only:
+                wrote = session.in_transaction()
+                await session.commit()
+                if wrote:
+                    DbContext.__wrote__.set(True)
         except Exception as e:
             await session.rollback()
             logging.exception("Database session error occurred")
@@ -54,6 +209,22 @@ class DbContext:
         finally:
             await session.close()
 
+    @staticmethod
+    def session_dependency(read_only: bool = False) -> Callable[[], AsyncIterator[AsyncSession]]:
+        """
+        A FastAPI dependency providing a session opened by `get_session_async`.
+
+        Declare it with `Depends(..., scope="function")`, so that the session is committed and
+        its connection returned to the pool as soon as the endpoint returns, before the response
+        is sent, and rolled back when the endpoint raises. No connection is checked out for
+        requests that fail before their first statement.
+        """
+        async def session() -> AsyncIterator[AsyncSession]:
+            async with DbContext.get_session_async(read_only) as db_session:
+                yield db_session
+
+        return session
+
     @staticmethod
     async def dispose_engine():
         """Dispose of the engine and close all connections. Useful for shutdown."""
@@ -61,3 +232,8 @@ class DbContext:
             await DbContext.__engine__.dispose()
             DbContext.__engine__ = None
             DbContext.__session_maker__ = None
+        DbContext.__read_binds__ = {}
+
+        for replica in DbContext.__read_replicas__:
+            await replica.engine.dispose()
+        DbContext.__read_replicas__ = []
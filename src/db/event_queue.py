@@ -0,0 +1,223 @@
+import logging
+from collections import Counter
+from datetime import timedelta
+from typing import Dict, List, Optional, Sequence
+from uuid import uuid4
+
+from sqlalchemy import BigInteger, Text, column, delete, func, insert, select, tuple_, update, values
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src import settings
+from src.entities.event_queue_message import EventDeadLetter, EventQueueMessage
+from src.metrics import MetricsRegistry
+from .context import DbContext
+
+
+class EventQueue:
+    """
+    Message queue on the event_queue table, shared by every process using the database.
+
+    `receive` leases a batch of visible messages with SELECT ... FOR UPDATE SKIP LOCKED, so
+    concurrent receivers, in any process, never get the same message while its lease lasts.
+    A leased message is invisible for EVENT_QUEUE_VISIBILITY_TIMEOUT_IN_SECONDS; `settle` then
+    deletes it when it was processed, or makes it visible again after a retry delay when it
+    failed. A message that is not settled in time is delivered again, so delivery is at least
+    once. After EVENT_QUEUE_MAX_ATTEMPTS deliveries a message is moved to event_dead_letter.
+
+    `publish` adds messages within a session's transaction, which makes the queue a
+    transactional outbox: the messages become visible if and only if the transaction commits.
+    """
+
+    __logger__ = logging.getLogger(__name__)
+
+    @staticmethod
+    def _count(queue: str, result: str, amount: int):
+        if amount:
+            MetricsRegistry.counter("event_queue_messages_total", {"queue": queue, "result": result}).inc(amount)
+
+    @staticmethod
+    async def publish(
+        session: AsyncSession,
+        queue: str,
+        payloads: Sequence[dict],
+        keys: Optional[Sequence[Optional[str]]] = None
+    ) -> None:
+        """
+        Add messages to `queue` in the transaction of `session`.
+
+        Args:
+            session: Session whose transaction the messages are committed or rolled back with
+            queue: Name of the queue
+            payloads: JSON payload of each message
+            keys: Partition key of each message, e.g. the ID of the entity it is about
+        """
+        if not payloads:
+            return
+        keys = keys if keys is not None else [None] * len(payloads)
+        table = EventQueueMessage.__table__
+        await session.exec(insert(table).values([
+            {"queue": queue, "key": key, "payload": payload} for payload, key in zip(payloads, keys)
+        ]))
+
+    @staticmethod
+    async def receive(queue: str, max_messages: Optional[int] = None) -> List[Dict]:
+        """
+        Lease up to `max_messages` visible messages of `queue`, oldest first.
+
+        Returns:
+            The messages as dicts with `id`, `queue`, `key`, `payload`, `attempts` (deliveries,
+            this one included), `lease_id` and `created_at`; pass them back to `settle`
+        """
+        table = EventQueueMessage.__table__
+        max_messages = max_messages or settings.event_queue_batch_size
+        lease_id = uuid4()
+
+        leased = select(table.c.id).where(
+            table.c.queue == queue,
+            table.c.visible_at <= func.now()
+        ).order_by(table.c.visible_at, table.c.id).limit(max_messages).with_for_update(skip_locked=True).cte("leased")
+
+        statement = update(table).where(table.c.id == leased.c.id).values(
+            attempts=table.c.attempts + 1,
+            lease_id=lease_id,
+            visible_at=func.now() + timedelta(seconds=settings.event_queue_visibility_timeout_in_seconds)
+        ).returning(table.c.id, table.c.key, table.c.payload, table.c.attempts, table.c.created_at)
+
+        async with DbContext.get_engine().begin() as connection:
+            rows = (await connection.execute(statement)).all()
+
+            # Leased before, but never settled: the receivers failed or ran past the visibility timeout
+            expired = {
+                row.id: f"Not settled within the visibility timeout in {row.attempts - 1} deliveries"
+                for row in rows if row.attempts > settings.event_queue_max_attempts
+            }
+            if expired:
+                await EventQueue._dead_letter(connection, expired)
+
+        messages = [
+            {
+                "id": row.id,
+                "queue": queue,
+                "key": row.key,
+                "payload": row.payload,
+                "attempts": row.attempts,
+                "lease_id": lease_id,
+                "created_at": row.created_at,
+            }
+            for row in sorted(rows, key=lambda row: row.id) if row.id not in expired
+        ]
+        EventQueue._count(queue, "received", len(messages))
+        EventQueue._count(queue, "dead_lettered", len(expired))
+        return messages
+
+    @staticmethod
+    async def settle(messages: Sequence[Dict], errors: Sequence[Optional[Exception]]) -> None:
+        """
+        Acknowledge processed messages and return failed ones to the queue, in one transaction.
+
+        A message whose error is None is deleted. A failed one is made visible again after
+        EVENT_QUEUE_RETRY_DELAY_IN_SECONDS, doubled for every earlier delivery, or moved to
+        event_dead_letter once it was delivered EVENT_QUEUE_MAX_ATTEMPTS times. Messages whose
+        lease expired in the meantime are left alone, as they may be with another receiver.
+
+        Args:
+            messages: Messages returned by `receive`
+            errors: One result per message: None when it was processed, or the exception it failed with
+        """
+        table = EventQueueMessage.__table__
+        processed = [message for message, error in zip(messages, errors) if error is None]
+        failed = [(message, error) for message, error in zip(messages, errors) if error is not None]
+        dead = {
+            message["id"]: f"{type(error).__name__}: {error}"
+            for message, error in failed if message["attempts"] >= settings.event_queue_max_attempts
+        }
+        retried = [message for message, _ in failed if message["id"] not in dead]
+
+        def leased(batch: Sequence[Dict]):
+            return tuple_(table.c.id, table.c.lease_id).in_([(message["id"], message["lease_id"]) for message in batch])
+
+        acked = released = dead_lettered = 0
+        async with DbContext.get_engine().begin() as connection:
+            if processed:
+                result = await connection.execute(delete(table).where(leased(processed)))
+                acked = result.rowcount
+            if retried:
+                # make_interval(years, months, weeks, days, hours, mins, secs)
+                delay = func.make_interval(
+                    0, 0, 0, 0, 0, 0, settings.event_queue_retry_delay_in_seconds * func.power(2, table.c.attempts - 1)
+                )
+                result = await connection.execute(update(table).where(leased(retried)).values(
+                    lease_id=None,
+                    visible_at=func.now() + delay
+                ))
+                released = result.rowcount
+            if dead:
+                dead_lettered = await EventQueue._dead_letter(
+                    connection, dead, [message for message in messages if message["id"] in dead]
+                )
+
+        lost = len(messages) - acked - released - dead_lettered
+        if lost:
+            EventQueue.__logger__.warning(
+                f"{lost} message(s) were settled after their lease expired and may be delivered again"
+            )
+
+        for queue, count in Counter(message["queue"] for message in processed).items():
+            EventQueue._count(queue, "acked", count)
+        for queue, count in Counter(message["queue"] for message in retried).items():
+            EventQueue._count(queue, "retried", count)
+        for queue, count in Counter(message["queue"] for message in messages if message["id"] in dead).items():
+            EventQueue._count(queue, "dead_lettered", count)
+
+    @staticmethod
+    async def _dead_letter(
+        connection: AsyncConnection,
+        errors: Dict[int, str],
+        messages: Optional[Sequence[Dict]] = None
+    ) -> int:
+        """Move messages to event_dead_letter with their error; with `messages`, only while their lease lasts."""
+        table = EventQueueMessage.__table__
+        dead_letters = EventDeadLetter.__table__
+
+        condition = table.c.id.in_(list(errors))
+        if messages is not None:
+            condition = tuple_(table.c.id, table.c.lease_id).in_(
+                [(message["id"], message["lease_id"]) for message in messages]
+            )
+        moved = delete(table).where(condition).returning(
+            table.c.id, table.c.queue, table.c.key, table.c.payload, table.c.attempts, table.c.created_at
+        ).cte("moved")
+        reasons = values(
+            column("id", BigInteger), column("error", Text), name="reasons"
+        ).data(list(errors.items()))
+
+        columns = ["id", "queue", "key", "payload", "attempts", "created_at"]
+        # rowcount is not reported for statements with data-modifying CTEs, so the rows are counted from RETURNING
+        result = await connection.execute(insert(dead_letters).from_select(
+            [*columns, "error"],
+            select(*[moved.c[name] for name in columns], reasons.c.error).join(reasons, reasons.c.id == moved.c.id)
+        ).returning(dead_letters.c.id))
+        return len(result.all())
+
+    @staticmethod
+    async def redrive(queue: str) -> int:
+        """
+        Move every dead letter of `queue` back to the queue, keeping its ID, for another
+        EVENT_QUEUE_MAX_ATTEMPTS deliveries. Returns the number of messages moved.
+        """
+        table = EventQueueMessage.__table__
+        dead_letters = EventDeadLetter.__table__
+
+        moved = delete(dead_letters).where(dead_letters.c.queue == queue).returning(
+            dead_letters.c.id, dead_letters.c.queue, dead_letters.c.key, dead_letters.c.payload, dead_letters.c.created_at
+        ).cte("moved")
+        columns = ["id", "queue", "key", "payload", "created_at"]
+        async with DbContext.get_engine().begin() as connection:
+            result = await connection.execute(
+                insert(table).from_select(columns, select(*[moved.c[name] for name in columns])).returning(table.c.id)
+            )
+            count = len(result.all())
+
+        EventQueue.__logger__.info(f"Moved {count} dead letter(s) back to queue '{queue}'")
+        return count
@@ -2,11 +2,39 @@ from datetime import datetime, timezone
 
 from sqlalchemy import event
 from sqlalchemy.engine import Connection
-from sqlalchemy.orm import Mapper
+from sqlalchemy.orm import Mapper, Session
 from sqlmodel import SQLModel
 
+from .cache_invalidation import CacheInvalidation
+
 
 @event.listens_for(SQLModel, "before_update", propagate=True)
 def update_modified_on(mapper: Mapper, connection: Connection, target):
     if hasattr(target, "modified_on"):
         target.modified_on = datetime.now(timezone.utc)
+
+
+@event.listens_for(SQLModel, "after_update", propagate=True)
+@event.listens_for(SQLModel, "after_delete", propagate=True)
+def track_changed_entity(mapper: Mapper, connection: Connection, target):
+    # Entities changed through the unit of work; statement-level writes call CacheInvalidation.track
+    session = Session.object_session(target)
+    if session is not None:
+        CacheInvalidation.track(session, mapper.local_table.name, [target.id])
+
+
+@event.listens_for(Session, "before_commit")
+def publish_cache_invalidations(session: Session):
+    CacheInvalidation.publish(session)
+
+
+@event.listens_for(Session, "after_commit")
+def apply_cache_invalidations(session: Session):
+    inserted = CacheInvalidation.inserted(session)
+    for topic, keys in CacheInvalidation.discard(session).items():
+        CacheInvalidation.apply(topic, keys, inserted=inserted.get(topic))
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_cache_invalidations(session: Session):
+    CacheInvalidation.discard(session)
@@ -0,0 +1,101 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from src.metrics import MetricsRegistry
+
+
+class InstrumentedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that records how long each checkout waited for a connection.
+
+    SQLAlchemy has no pool event that fires before a checkout starts waiting, so the
+    wait is timed around the pool's internal get instead.
+    """
+
+    metrics_name = "primary"
+
+    def _do_get(self):
+        started_at = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            MetricsRegistry.histogram(
+                "db_pool_checkout_wait_seconds", {"pool": self.metrics_name}
+            ).observe(time.perf_counter() - started_at)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics_name = self.metrics_name
+        return pool
+
+
+class PoolMetrics:
+    # ASGI scope of the request being handled; None outside of a tracked scope
+    __scope__: ContextVar[Optional[dict]] = ContextVar("db_pool_request_scope", default=None)
+
+    @staticmethod
+    @contextmanager
+    def track_route(scope: dict) -> Iterator[None]:
+        """Attribute the connections checked out by the current task and its children to the route of `scope`."""
+        token = PoolMetrics.__scope__.set(scope)
+        try:
+            yield
+        finally:
+            PoolMetrics.__scope__.reset(token)
+
+    @staticmethod
+    def _route() -> str:
+        scope = PoolMetrics.__scope__.get()
+        if scope is None:
+            return "background"
+        # Set by the router once the request is matched, which happens before any endpoint runs;
+        # labelled by name, since the path of a route does not include the prefix of its router
+        route = scope.get("route")
+        return getattr(route, "name", None) or "unmatched"
+
+    @staticmethod
+    def instrument(engine: AsyncEngine, name: str):
+        """Publish pool gauges and event counters for `engine` under the `pool` label `name`."""
+        sync_engine = engine.sync_engine
+        labels = {"pool": name}
+        if isinstance(sync_engine.pool, InstrumentedAsyncAdaptedQueuePool):
+            sync_engine.pool.metrics_name = name
+
+        checkouts = MetricsRegistry.counter("db_pool_checkouts_total", labels)
+        connects = MetricsRegistry.counter("db_pool_connections_opened_total", labels)
+        invalidations = MetricsRegistry.counter("db_pool_connections_invalidated_total", labels)
+
+        @event.listens_for(sync_engine, "checkout")
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            checkouts.inc()
+            connection_record.info["checked_out_at"] = time.perf_counter()
+            connection_record.info["checked_out_by"] = PoolMetrics._route()
+
+        @event.listens_for(sync_engine, "checkin")
+        def on_checkin(dbapi_connection, connection_record):
+            checked_out_at = connection_record.info.pop("checked_out_at", None)
+            if checked_out_at is not None:
+                route = connection_record.info.pop("checked_out_by")
+                MetricsRegistry.histogram(
+                    "db_connection_hold_seconds", {"pool": name, "route": route}
+                ).observe(time.perf_counter() - checked_out_at)
+
+        @event.listens_for(sync_engine, "connect")
+        def on_connect(dbapi_connection, connection_record):
+            connects.inc()
+
+        @event.listens_for(sync_engine, "invalidate")
+        def on_invalidate(dbapi_connection, connection_record, exception):
+            invalidations.inc()
+
+        # Gauges read the engine's current pool, which is replaced when the engine is disposed
+        MetricsRegistry.gauge("db_pool_size", lambda: sync_engine.pool.size(), labels)
+        MetricsRegistry.gauge("db_pool_checked_out", lambda: sync_engine.pool.checkedout(), labels)
+        MetricsRegistry.gauge("db_pool_idle", lambda: sync_engine.pool.checkedin(), labels)
+        MetricsRegistry.gauge("db_pool_overflow_in_use", lambda: max(0, sync_engine.pool.overflow()), labels)
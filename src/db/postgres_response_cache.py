@@ -0,0 +1,121 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Set
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from src.cache import CachedResponse, ResponseCacheBackend
+from src.entities.response_cache_entry import ResponseCacheEntry, ResponseCacheGeneration
+from .context import DbContext
+
+
+class PostgresResponseCacheBackend(ResponseCacheBackend):
+    """
+    Backend on the UNLOGGED response_cache table, shared by every worker and node.
+
+    Expired rows are only skipped on read; every `CLEANUP_EVERY` writes they are deleted,
+    together with the rows beyond `max_entries` that expire first.
+
+    Each topic has a generation in response_cache_generation, bumped in the transaction
+    that deletes the topic's rows. A response is only stored while the generation it read
+    before running the endpoint is current. The generation row is share-locked while the
+    response is stored, so a store and an invalidation never interleave. A response computed
+    from data older than the last invalidation is therefore never stored.
+    """
+
+    shared = True
+    CLEANUP_EVERY = 100
+
+    def __init__(self, max_entries: int, ttl_in_seconds: float):
+        self.__max_entries__ = max_entries
+        self.__ttl_in_seconds__ = ttl_in_seconds
+        self.__writes__ = 0
+        self.__tasks__: Set[asyncio.Task] = set()
+        self.__logger__ = logging.getLogger(__name__)
+
+    async def generation(self, topic: str) -> int:
+        generations = ResponseCacheGeneration.__table__
+        statement = select(generations.c.generation).where(generations.c.topic == topic)
+        async with DbContext.get_engine().connect() as connection:
+            return (await connection.execute(statement)).scalar() or 0
+
+    async def get(self, key: str, topic: str) -> Optional[CachedResponse]:
+        table = ResponseCacheEntry.__table__
+        statement = select(table.c.status_code, table.c.headers, table.c.body).where(
+            table.c.key == key,
+            table.c.expires_at > func.now()
+        )
+        async with DbContext.get_engine().connect() as connection:
+            row = (await connection.execute(statement)).first()
+
+        if row is None:
+            return None
+        return CachedResponse(
+            status_code=row.status_code,
+            headers=[(name.encode("latin-1"), value.encode("latin-1")) for name, value in row.headers],
+            body=row.body
+        )
+
+    async def set(self, key: str, topic: str, response: CachedResponse, generation: int) -> None:
+        table = ResponseCacheEntry.__table__
+        values = {
+            "key": key,
+            "topic": topic,
+            "status_code": response.status_code,
+            "headers": [[name.decode("latin-1"), value.decode("latin-1")] for name, value in response.headers],
+            "body": response.body,
+            "expires_at": datetime.now(timezone.utc) + timedelta(seconds=self.__ttl_in_seconds__),
+        }
+        statement = insert(table).values(values)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.key],
+            set_={name: statement.excluded[name] for name in values if name != "key"}
+        )
+
+        generations = ResponseCacheGeneration.__table__
+        self.__writes__ += 1
+        async with DbContext.get_engine().begin() as connection:
+            # Waits for an invalidation creating the row to commit, so that the lock below covers the first one too
+            await connection.execute(
+                insert(generations).values(topic=topic, generation=0).on_conflict_do_nothing(
+                    index_elements=[generations.c.topic]
+                )
+            )
+            current = (await connection.execute(
+                select(generations.c.generation).where(generations.c.topic == topic).with_for_update(read=True)
+            )).scalar_one()
+            if current != generation:
+                return
+            await connection.execute(statement)
+            if self.__writes__ % self.CLEANUP_EVERY == 0:
+                await self._cleanup(connection)
+
+    async def _cleanup(self, connection):
+        table = ResponseCacheEntry.__table__
+        await connection.execute(delete(table).where(table.c.expires_at <= func.now()))
+        overflow = select(table.c.key).order_by(table.c.expires_at.desc()).offset(self.__max_entries__)
+        await connection.execute(delete(table).where(table.c.key.in_(overflow)))
+
+    async def _delete_topic(self, topic: str):
+        table = ResponseCacheEntry.__table__
+        generations = ResponseCacheGeneration.__table__
+        bump = insert(generations).values(topic=topic, generation=1)
+        bump = bump.on_conflict_do_update(
+            index_elements=[generations.c.topic],
+            set_={"generation": generations.c.generation + 1}
+        )
+        try:
+            async with DbContext.get_engine().begin() as connection:
+                # Bumped first: the row lock waits for the stores in progress, whose rows the delete then sees
+                await connection.execute(bump)
+                await connection.execute(delete(table).where(table.c.topic == topic))
+        except Exception:
+            self.__logger__.exception(f"Failed to invalidate cached responses of '{topic}'")
+
+    def invalidate(self, topic: str) -> None:
+        # Called right after a commit, from synchronous session event code
+        task = asyncio.get_running_loop().create_task(self._delete_topic(topic))
+        self.__tasks__.add(task)
+        task.add_done_callback(self.__tasks__.discard)
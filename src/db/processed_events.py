@@ -0,0 +1,52 @@
+from datetime import timedelta
+from typing import Collection, Set
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from src import settings
+from src.entities.processed_event import ProcessedEvent
+from .context import DbContext
+
+
+class ProcessedEvents:
+    """
+    IDs of the messages each consumer processed, in the processed_event table, shared by
+    every process using the database.
+
+    IDs are kept for SAMPLE_EVENT_DEDUP_RETENTION_IN_SECONDS; every `CLEANUP_EVERY` additions
+    in a process, the older ones are deleted.
+    """
+
+    CLEANUP_EVERY = 100
+    __additions__ = 0
+
+    @staticmethod
+    async def find(consumer: str, message_ids: Collection[str]) -> Set[str]:
+        """Return which of `message_ids` were processed by `consumer`."""
+        if not message_ids:
+            return set()
+        table = ProcessedEvent.__table__
+        statement = select(table.c.message_id).where(
+            table.c.consumer == consumer,
+            table.c.message_id.in_(list(message_ids))
+        )
+        async with DbContext.get_engine().connect() as connection:
+            return set((await connection.execute(statement)).scalars())
+
+    @staticmethod
+    async def add(consumer: str, message_ids: Collection[str]) -> None:
+        """Record `message_ids` as processed by `consumer`; IDs recorded before are left as they are."""
+        if not message_ids:
+            return
+        table = ProcessedEvent.__table__
+        statement = insert(table).values([
+            {"consumer": consumer, "message_id": message_id} for message_id in message_ids
+        ]).on_conflict_do_nothing(index_elements=[table.c.consumer, table.c.message_id])
+
+        ProcessedEvents.__additions__ += 1
+        async with DbContext.get_engine().begin() as connection:
+            await connection.execute(statement)
+            if ProcessedEvents.__additions__ % ProcessedEvents.CLEANUP_EVERY == 0:
+                retention = timedelta(seconds=settings.sample_event_dedup_retention_in_seconds)
+                await connection.execute(delete(table).where(table.c.processed_at < func.now() - retention))
@@ -0,0 +1,25 @@
+import time
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import sessionmaker
+
+
+class ReadReplica:
+    """A read-only database endpoint and its health as seen by this worker."""
+
+    def __init__(self, url: str, engine: AsyncEngine, session_maker: sessionmaker):
+        self.name = make_url(url).render_as_string(hide_password=True)
+        self.engine = engine
+        self.session_maker = session_maker
+        self.__unhealthy_until__ = 0.0
+
+    def is_healthy(self) -> bool:
+        # Once the retry delay has passed the replica is tried again; a failed checkout marks it down again
+        return time.monotonic() >= self.__unhealthy_until__
+
+    def mark_unhealthy(self, retry_in_seconds: float):
+        self.__unhealthy_until__ = time.monotonic() + retry_in_seconds
+
+    def mark_healthy(self):
+        self.__unhealthy_until__ = 0.0
@@ -0,0 +1,43 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.metrics import MetricsRegistry
+
+
+class StatementCount:
+    """Mutable tally shared by every task spawned while handling one request."""
+
+    def __init__(self):
+        self.value = 0
+
+
+class StatementCounter:
+    # Holds the tally of the request being handled; None outside of a tracked scope
+    __current__: ContextVar[Optional[StatementCount]] = ContextVar("db_statement_count", default=None)
+
+    @staticmethod
+    @contextmanager
+    def track() -> Iterator[StatementCount]:
+        """Count the SQL statements executed by the current task and its children."""
+        count = StatementCount()
+        token = StatementCounter.__current__.set(count)
+        try:
+            yield count
+        finally:
+            StatementCounter.__current__.reset(token)
+
+    @staticmethod
+    def instrument(engine: AsyncEngine, name: str):
+        """Count every statement sent through `engine`, per request and in the `db_statements_total` counter."""
+        statements = MetricsRegistry.counter("db_statements_total", {"pool": name})
+
+        @event.listens_for(engine.sync_engine, "before_cursor_execute")
+        def on_execute(connection, cursor, statement, parameters, context, executemany):
+            statements.inc()
+            count = StatementCounter.__current__.get()
+            if count is not None:
+                count.value += 1
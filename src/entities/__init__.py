@@ -1 +1,4 @@
-from .sample_entity import SampleEntity
\ No newline at end of file
+from .event_queue_message import EventDeadLetter, EventQueueMessage
+from .processed_event import ProcessedEvent
+from .response_cache_entry import ResponseCacheEntry, ResponseCacheGeneration
+from .sample_entity import SampleEntity
@@ -0,0 +1,61 @@
+from datetime import datetime
+from typing import Dict, Optional
+from uuid import UUID
+
+from sqlalchemy import BigInteger, Column, DateTime, Identity, Index, Integer, Text, Uuid, func
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlmodel import Field, SQLModel
+
+from src import settings
+
+
+class EventQueueMessage(SQLModel, table=True):
+    """
+    Message of the built-in Postgres event queue, deleted once acknowledged.
+
+    A message is visible, and can be received, once `visible_at` has passed. Receiving it
+    leases it: `visible_at` moves a visibility timeout ahead and `lease_id` identifies the
+    receiver, whose acknowledgement only applies while it still holds the lease.
+    """
+
+    __tablename__ = "event_queue"
+    __table_args__ = (
+        # Serves the receive query: the visible messages of one queue, oldest first
+        Index("ix_event_queue_queue_visible_at", "queue", "visible_at", "id"),
+        {"schema": f"{settings.database_schema}"},
+    )
+
+    id: Optional[int] = Field(default=None, sa_column=Column(BigInteger, Identity(), primary_key=True))
+    queue: str = Field(sa_column=Column(Text, nullable=False))
+    # Partition key of the message, e.g. the ID of the entity it is about
+    key: Optional[str] = Field(default=None, sa_column=Column(Text, nullable=True))
+    payload: Dict = Field(sa_column=Column(JSONB, nullable=False))
+    attempts: int = Field(default=0, sa_column=Column(Integer, nullable=False, server_default="0"))
+    lease_id: Optional[UUID] = Field(default=None, sa_column=Column(Uuid, nullable=True))
+    visible_at: Optional[datetime] = Field(
+        default=None, sa_column=Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    )
+    created_at: Optional[datetime] = Field(
+        default=None, sa_column=Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    )
+
+
+class EventDeadLetter(SQLModel, table=True):
+    """Message moved out of the event queue after failing EVENT_QUEUE_MAX_ATTEMPTS times."""
+
+    __tablename__ = "event_dead_letter"
+    __table_args__ = (
+        Index("ix_event_dead_letter_queue_failed_at", "queue", "failed_at"),
+        {"schema": f"{settings.database_schema}"},
+    )
+
+    id: int = Field(sa_column=Column(BigInteger, primary_key=True))
+    queue: str = Field(sa_column=Column(Text, nullable=False))
+    key: Optional[str] = Field(default=None, sa_column=Column(Text, nullable=True))
+    payload: Dict = Field(sa_column=Column(JSONB, nullable=False))
+    attempts: int = Field(sa_column=Column(Integer, nullable=False))
+    error: Optional[str] = Field(default=None, sa_column=Column(Text, nullable=True))
+    created_at: datetime = Field(sa_column=Column(DateTime(timezone=True), nullable=False))
+    failed_at: Optional[datetime] = Field(
+        default=None, sa_column=Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    )
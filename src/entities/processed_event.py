@@ -0,0 +1,27 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Column, DateTime, Index, Text, func
+from sqlmodel import Field, SQLModel
+
+from src import settings
+
+
+class ProcessedEvent(SQLModel, table=True):
+    """
+    ID of a message a consumer processed, kept for SAMPLE_EVENT_DEDUP_RETENTION_IN_SECONDS so
+    that every worker process skips it when it is delivered again (SAMPLE_EVENT_DEDUP_DURABLE).
+    """
+
+    __tablename__ = "processed_event"
+    __table_args__ = (
+        # Serves the deletion of the IDs past their retention
+        Index("ix_processed_event_processed_at", "processed_at"),
+        {"schema": f"{settings.database_schema}"},
+    )
+
+    consumer: str = Field(sa_column=Column(Text, primary_key=True))
+    message_id: str = Field(sa_column=Column(Text, primary_key=True))
+    processed_at: Optional[datetime] = Field(
+        default=None, sa_column=Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    )
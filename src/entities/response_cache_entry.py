@@ -0,0 +1,37 @@
+from datetime import datetime
+from typing import List
+
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer, LargeBinary, Text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlmodel import Field, SQLModel
+
+from src import settings
+
+
+class ResponseCacheEntry(SQLModel, table=True):
+    """Serialised GET response shared by every worker when RESPONSE_CACHE_BACKEND is `postgres`."""
+
+    __tablename__ = "response_cache"
+    __table_args__ = (
+        Index("ix_response_cache_topic", "topic"),
+        # Cached responses can be recomputed, so they are not worth WAL writes or crash safety
+        {"schema": f"{settings.database_schema}", "prefixes": ["UNLOGGED"]},
+    )
+
+    key: str = Field(sa_column=Column(Text, primary_key=True))
+    topic: str = Field(sa_column=Column(Text, nullable=False))
+    status_code: int = Field(sa_column=Column(Integer, nullable=False))
+    headers: List = Field(sa_column=Column(JSONB, nullable=False))
+    body: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
+    expires_at: datetime = Field(sa_column=Column(DateTime(timezone=True), nullable=False))
+
+
+class ResponseCacheGeneration(SQLModel, table=True):
+    """Invalidation counter of a response cache topic, bumped with every invalidation of the topic."""
+
+    __tablename__ = "response_cache_generation"
+    # Reset together with response_cache after a crash
+    __table_args__ = {"schema": f"{settings.database_schema}", "prefixes": ["UNLOGGED"]}
+
+    topic: str = Field(sa_column=Column(Text, primary_key=True))
+    generation: int = Field(sa_column=Column(BigInteger, nullable=False))
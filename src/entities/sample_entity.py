@@ -2,8 +2,8 @@ import enum
 from typing import Optional, Dict
 from uuid import UUID
 
-from sqlalchemy import Column, BigInteger, Text
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import Column, BigInteger, Text, Index, Computed, func, literal_column, text, true
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
 from sqlmodel import Field
 
 from src import settings
@@ -15,9 +15,62 @@ class SampleEnum(enum.Enum):
     VALUE_TWO = "value_two"
 
 
+# Text search configuration used for search_vector and for full-text queries against it
+SEARCH_TEXT_CONFIG = "english"
+
+# Top-level keys of a JSONB object as a JSONB array (empty for other values). jsonb_path_ops
+# cannot serve the ? key existence operators, so key filters use @> on this indexed expression
+JSONB_KEYS_SQL = "jsonb_path_query_array({column}, 'strict $.keyvalue().key', '{{}}', true)"
+
+
+def jsonb_keys(column):
+    """`JSONB_KEYS_SQL` of `column`, rendered so that it matches the expression indexes below."""
+    return func.jsonb_path_query_array(
+        column, literal_column("'strict $.keyvalue().key'"), literal_column("'{}'"), true()
+    )
+
+
 class SampleEntity(BaseEntityMixin, table=True):
     __tablename__ = "sample_table"
-    __table_args__ = {"schema": f"{settings.database_schema}"}
+    __table_args__ = (
+        # Maintained by Postgres for full-text search; not mapped, so it is never loaded or serialised
+        Column(
+            "search_vector",
+            TSVECTOR,
+            Computed(
+                f"to_tsvector('{SEARCH_TEXT_CONFIG}', coalesce(string_field, '') || ' ' || coalesce(optional_text, ''))",
+                persisted=True,
+            ),
+        ),
+        Index("ix_sample_table_created_on_id", "created_on", "id"),  # Keyset pagination on (created_on, id)
+        Index(
+            "ix_sample_table_string_field_trgm", "string_field",
+            postgresql_using="gin", postgresql_ops={"string_field": "gin_trgm_ops"},
+        ),
+        Index("ix_sample_table_string_field_prefix", text("lower(string_field) text_pattern_ops")),
+        Index("ix_sample_table_search_vector", "search_vector", postgresql_using="gin"),
+        # JSONB filters: @> and JSONPath on the documents, key existence on their top-level keys
+        Index(
+            "ix_sample_table_required_jsonb_path", "required_jsonb",
+            postgresql_using="gin", postgresql_ops={"required_jsonb": "jsonb_path_ops"},
+        ),
+        Index(
+            "ix_sample_table_optional_jsonb_path", "optional_jsonb",
+            postgresql_using="gin", postgresql_ops={"optional_jsonb": "jsonb_path_ops"},
+        ),
+        Index(
+            "ix_sample_table_required_jsonb_keys",
+            text(f"({JSONB_KEYS_SQL.format(column='required_jsonb')}) jsonb_path_ops"),
+            postgresql_using="gin",
+        ),
+        Index(
+            "ix_sample_table_optional_jsonb_keys",
+            text(f"({JSONB_KEYS_SQL.format(column='optional_jsonb')}) jsonb_path_ops"),
+            postgresql_using="gin",
+        ),
+        {"schema": f"{settings.database_schema}"},
+    )
+    __mapper_args__ = {"exclude_properties": ["search_vector"]}
 
 
     required_uuid: UUID = Field(nullable=False) # For Foreign Key reference : Field(foreign_key=f"{settings.database_schema}.table_name.id")
@@ -1 +1,3 @@
-from .sample_event_poller import SampleEventPoller
\ No newline at end of file
+from .message_deduplicator import MessageDeduplicator
+from .postgres_event_poller import PostgresEventPoller
+from .sample_event_poller import SampleEventPoller
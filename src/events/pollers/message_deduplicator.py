@@ -0,0 +1,137 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional, Set, Tuple
+
+from src import settings
+from src.cache import IdSet, LruIdSet, RotatingBloomFilter
+from src.db.processed_events import ProcessedEvents
+from src.metrics import MetricsRegistry
+
+
+class MessageDeduplicator:
+    """
+    Recognises messages a poller already processed by their ID, so that a redelivered
+    message is acknowledged without being processed again.
+
+    Processed IDs are remembered in a bounded in-process `IdSet`. With `durable`, they are
+    also recorded in the processed_event table under `consumer`, and IDs the set does not
+    know for certain are looked up there once per received batch, which catches messages
+    processed by another process, or before a restart. A Bloom filter hit is only trusted
+    when confirmed by the table; without it, a false positive skips a new message.
+
+    Delivery stays at least once: a message redelivered while it is still being processed,
+    or processed again after its ID was forgotten, is not recognised.
+    """
+
+    def __init__(self, seen: IdSet, consumer: str, id_field: str = "id", durable: bool = False):
+        self.__seen__ = seen
+        self.__consumer__ = consumer
+        self.__id_field__ = id_field
+        self.__durable__ = durable
+        self.__pending__: List[Tuple[List[str], asyncio.Future]] = []
+        self.__recording__ = False
+        self.__tasks__: Set[asyncio.Task] = set()
+        self.__logger__ = logging.getLogger(__name__)
+
+        labels = {"poller": consumer}
+        self.__new_messages__ = MetricsRegistry.counter("event_dedup_messages_total", {**labels, "result": "new"})
+        self.__memory_hits__ = MetricsRegistry.counter("event_dedup_messages_total", {**labels, "result": "memory_hit"})
+        self.__durable_hits__ = MetricsRegistry.counter("event_dedup_messages_total", {**labels, "result": "durable_hit"})
+        MetricsRegistry.gauge("event_dedup_hit_ratio", self._hit_ratio, labels)
+        MetricsRegistry.gauge("event_dedup_ids", lambda: len(self.__seen__), labels)
+        MetricsRegistry.gauge("event_dedup_bytes", lambda: self.__seen__.nbytes, labels)
+
+    @staticmethod
+    def from_settings(consumer: str) -> Optional["MessageDeduplicator"]:
+        """The deduplicator configured by the SAMPLE_EVENT_DEDUP settings, or None when disabled."""
+        if settings.sample_event_dedup == "lru":
+            seen = LruIdSet(settings.sample_event_dedup_max_ids)
+        elif settings.sample_event_dedup == "bloom":
+            seen = RotatingBloomFilter(
+                settings.sample_event_dedup_max_ids, settings.sample_event_dedup_false_positive_rate
+            )
+        else:
+            return None
+        return MessageDeduplicator(
+            seen, consumer, settings.sample_event_dedup_id_field, settings.sample_event_dedup_durable
+        )
+
+    def _hit_ratio(self) -> float:
+        # Share of the checked messages that were duplicates
+        hits = self.__memory_hits__.value + self.__durable_hits__.value
+        checked = hits + self.__new_messages__.value
+        return round(hits / checked, 4) if checked else 0.0
+
+    def _message_id(self, msg) -> Optional[str]:
+        message_id = msg.get(self.__id_field__) if isinstance(msg, dict) else None
+        return None if message_id is None else str(message_id)
+
+    async def split(self, msgs: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """Split received messages into the new ones and the already processed ones, each in received order."""
+        ids = [self._message_id(msg) for msg in msgs]
+        memory_hits = {message_id for message_id in ids if message_id is not None and message_id in self.__seen__}
+        duplicates = memory_hits if self.__seen__.exact or not self.__durable__ else set()
+
+        durable_hits: Set[str] = set()
+        if self.__durable__:
+            unknown = {message_id for message_id in ids if message_id is not None} - duplicates
+            try:
+                durable_hits = await ProcessedEvents.find(self.__consumer__, unknown)
+            except Exception:
+                # Processing a duplicate is safer than skipping a new message
+                self.__logger__.exception(f"Error looking up {len(unknown)} processed message ID(s)")
+            for message_id in durable_hits:
+                self.__seen__.add(message_id)
+            duplicates = duplicates | durable_hits
+
+        new, skipped = [], []
+        for msg, message_id in zip(msgs, ids):
+            if message_id in duplicates:
+                skipped.append(msg)
+                (self.__memory_hits__ if message_id in memory_hits else self.__durable_hits__).inc()
+            else:
+                new.append(msg)
+        self.__new_messages__.inc(len(new))
+        return new, skipped
+
+    async def record(self, msgs: List[Dict]) -> None:
+        """Remember processed messages; with `durable`, once their IDs are committed to processed_event."""
+        ids = [message_id for message_id in map(self._message_id, msgs) if message_id is not None]
+        for message_id in ids:
+            self.__seen__.add(message_id)
+        if not self.__durable__ or not ids:
+            return
+
+        # Group commit: the IDs recorded while one insert runs are inserted together by the next
+        recorded = asyncio.get_running_loop().create_future()
+        self.__pending__.append((ids, recorded))
+        if not self.__recording__:
+            self.__recording__ = True
+            task = asyncio.create_task(self._record_pending())
+            self.__tasks__.add(task)
+            task.add_done_callback(self.__tasks__.discard)
+        try:
+            await recorded
+        except Exception:
+            self.__logger__.exception(f"Error recording {len(ids)} processed message ID(s)")
+
+    async def _record_pending(self):
+        try:
+            while self.__pending__:
+                pending, self.__pending__ = self.__pending__, []
+                try:
+                    await ProcessedEvents.add(self.__consumer__, list(dict.fromkeys(
+                        message_id for ids, _ in pending for message_id in ids
+                    )))
+                    outcome = None
+                except Exception as ex:
+                    outcome = ex
+                for _, recorded in pending:
+                    if recorded.done():
+                        continue
+                    if outcome is None:
+                        recorded.set_result(None)
+                    else:
+                        recorded.set_exception(outcome)
+        finally:
+            self.__recording__ = False
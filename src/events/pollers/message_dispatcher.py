@@ -0,0 +1,85 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Collection, Dict, Hashable, Optional, Set
+
+
+class MessageDispatcher:
+    """
+    Handles messages, or batches of messages, concurrently, up to `concurrency` at a time.
+
+    `partition_keys` returns the partition keys of a submitted item. Items sharing a key are
+    handled one after the other, in the order they were submitted, whatever the outcome of the
+    previous one; items without keys run independently. An item waiting for a previous one of
+    its keys only takes a handling slot once that one is done, so it never keeps the items of
+    other keys waiting; up to `concurrency` items can wait so. `submit` waits while every slot
+    it needs is taken, which pushes back on the receiver. `handle` is expected to deal with its
+    own errors.
+    """
+
+    def __init__(
+        self,
+        handle: Callable[[Any], Awaitable[None]],
+        concurrency: int,
+        partition_keys: Optional[Callable[[Any], Collection[Hashable]]] = None
+    ):
+        self.__handle__ = handle
+        self.__partition_keys__ = partition_keys
+        self.__semaphore__ = asyncio.Semaphore(concurrency)
+        # Items waiting for a previous item of their keys, which hold no handling slot meanwhile
+        self.__waiting__ = asyncio.Semaphore(concurrency)
+        self.__tasks__: Set[asyncio.Task] = set()
+        # Last submitted task of every partition key that still has one in flight
+        self.__tails__: Dict[Hashable, asyncio.Task] = {}
+
+    async def submit(self, item: Any):
+        """Wait for a free slot, then start handling `item`, or start waiting for the previous items of its keys."""
+        keys = set(self.__partition_keys__(item)) if self.__partition_keys__ else set()
+        previous = {self.__tails__[key] for key in keys if key in self.__tails__}
+        await (self.__waiting__ if previous else self.__semaphore__).acquire()
+
+        task = asyncio.create_task(self._run(item, previous))
+        self.__tasks__.add(task)
+        task.add_done_callback(self.__tasks__.discard)
+        for key in keys:
+            self.__tails__[key] = task
+            task.add_done_callback(lambda done, key=key: self._release_tail(key, done))
+
+    def _release_tail(self, key: Hashable, task: asyncio.Task):
+        if self.__tails__.get(key) is task:
+            del self.__tails__[key]
+
+    async def _run(self, item: Any, previous: Set[asyncio.Task]):
+        if previous:
+            try:
+                # Only waits for the previous items of the same keys to finish; their failures are not ours
+                await asyncio.wait(previous)
+                await self.__semaphore__.acquire()
+            finally:
+                self.__waiting__.release()
+        try:
+            await self.__handle__(item)
+        finally:
+            self.__semaphore__.release()
+
+    async def drain(self, timeout: Optional[float] = None) -> int:
+        """
+        Wait for the items in flight to be handled.
+
+        Items still running after `timeout` seconds, or when the drain itself is cancelled,
+        are cancelled. Returns the number of items cancelled.
+        """
+        tasks = set(self.__tasks__)
+        if not tasks:
+            return 0
+
+        pending = tasks
+        try:
+            _, pending = await asyncio.wait(tasks, timeout=timeout)
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.wait(pending)
+        return len(pending)
+
+    def __len__(self) -> int:
+        return len(self.__tasks__)
@@ -0,0 +1,66 @@
+import asyncio
+from typing import Dict, List, Optional, Set, Tuple
+
+from src.db.event_queue import EventQueue
+from src.events.processor import BaseEventProcessor
+from .sample_event_poller import SampleEventPoller
+
+
+class PostgresEventPoller(SampleEventPoller):
+    """
+    Receives messages from a queue of the built-in Postgres event queue (SAMPLE_EVENT_TRANSPORT=postgres).
+
+    Every receive leases up to EVENT_QUEUE_BATCH_SIZE messages; any number of pollers, in any
+    number of worker processes, can receive from the same queue without getting the same
+    message while it is leased. Processed messages are deleted, failed ones retried and
+    eventually dead-lettered, see `EventQueue`. The processor is given the whole message:
+    its `payload`, and its `id`, `key`, `attempts` and `created_at`.
+
+    Outcomes are settled with group commit: while one settle transaction runs, the outcomes
+    of the messages finishing meanwhile are collected and settled together in the next one,
+    instead of committing once per message.
+    """
+
+    def __init__(self, event_processor: BaseEventProcessor, queue: str, **kwargs):
+        super().__init__(event_processor, **kwargs)
+        self.__queue__ = queue
+        self.__pending__: List[Tuple[List[Dict], List[Optional[Exception]], asyncio.Future]] = []
+        self.__settling__ = False
+        self.__tasks__: Set[asyncio.Task] = set()
+
+    async def __receive__(self) -> List[Dict]:
+        return await EventQueue.receive(self.__queue__)
+
+    async def __acknowledge__(self, msgs: List[Dict], errors: List[Optional[Exception]]) -> None:
+        settled = asyncio.get_running_loop().create_future()
+        self.__pending__.append((msgs, errors, settled))
+        if not self.__settling__:
+            self.__settling__ = True
+            task = asyncio.create_task(self._settle_pending())
+            # The event loop only keeps a weak reference to the task
+            self.__tasks__.add(task)
+            task.add_done_callback(self.__tasks__.discard)
+        await settled
+
+    async def _settle_pending(self):
+        try:
+            while self.__pending__:
+                pending, self.__pending__ = self.__pending__, []
+                try:
+                    await EventQueue.settle(
+                        [msg for msgs, _, _ in pending for msg in msgs],
+                        [error for _, errors, _ in pending for error in errors]
+                    )
+                    outcome = None
+                except Exception as ex:
+                    outcome = ex
+                for _, _, settled in pending:
+                    # The message may have been cancelled while it waited
+                    if settled.done():
+                        continue
+                    if outcome is None:
+                        settled.set_result(None)
+                    else:
+                        settled.set_exception(outcome)
+        finally:
+            self.__settling__ = False
@@ -1,62 +1,264 @@
 import asyncio
+import inspect
 import logging
-from typing import Dict, List
+import time
+from typing import Dict, Hashable, List, Optional, Set
 
 from src import settings
+from src.db.context import DbContext
 from src.events.processor import BaseEventProcessor
+from src.metrics import MetricsRegistry
+from .message_deduplicator import MessageDeduplicator
+from .message_dispatcher import MessageDispatcher
 
 
 class SampleEventPoller:
-    def __init__(self, event_processor: BaseEventProcessor):
+    """
+    Receives messages and hands them to the event processor, up to `concurrency` at a time.
+
+    Receiving and processing overlap: `receivers` tasks keep up to `prefetch_batches` received
+    batches buffered while the messages before them are processed, and only wait once the
+    buffer is full. Several receivers help when a receive round trip is slow compared to
+    processing a batch; their batches are processed in the order they arrive. After an empty receive it waits SAMPLE_EVENT_POLLING_IDLE_INTERVAL_MIN_IN_SECONDS,
+    doubled on every further empty receive up to SAMPLE_EVENT_POLLING_IDLE_INTERVAL_MAX_IN_SECONDS,
+    and it receives again straight away while messages keep coming.
+
+    A processor with `processes_batches` set is given each received batch at once; when the
+    batch fails as a whole, its messages are processed again one by one, so that a poison
+    message only fails itself. With a `partition_key`, messages carrying the same value for
+    that field are processed in the order they were received. When the poller is stopped or
+    cancelled, the messages in flight are given SAMPLE_EVENT_POLLING_DRAIN_TIMEOUT_IN_SECONDS
+    to finish. With a `deduplicator` (SAMPLE_EVENT_DEDUP), messages whose ID was already
+    processed are acknowledged without being processed again.
+    """
+
+    def __init__(
+        self,
+        event_processor: BaseEventProcessor,
+        concurrency: Optional[int] = None,
+        partition_key: Optional[str] = None,
+        prefetch_batches: Optional[int] = None,
+        receivers: Optional[int] = None,
+        deduplicator: Optional[MessageDeduplicator] = None
+    ):
         self.__backoff_initial_in_seconds__ = settings.sample_event_polling_backoff_initial_in_seconds
         self.__backoff_max_in_seconds__ = settings.sample_event_polling_backoff_max_in_seconds
+        self.__idle_interval_min_in_seconds__ = settings.sample_event_polling_idle_interval_min_in_seconds
+        self.__idle_interval_max_in_seconds__ = settings.sample_event_polling_idle_interval_max_in_seconds
+        self.__drain_timeout_in_seconds__ = settings.sample_event_polling_drain_timeout_in_seconds
+        self.__prefetch_batches__ = prefetch_batches or settings.sample_event_polling_prefetch_batches
+        self.__receivers__ = receivers or settings.sample_event_polling_receivers
+
+        if partition_key is None:
+            partition_key = settings.sample_event_polling_partition_key
+        self.__partition_key__ = partition_key or None
 
         self.__event_processor__ = event_processor
+        if deduplicator is None:
+            deduplicator = MessageDeduplicator.from_settings(type(self).__name__)
+        self.__deduplicator__ = deduplicator
+        self.__batches__ = event_processor.processes_batches
+        self.__dispatcher__ = MessageDispatcher(
+            self._process_batch if self.__batches__ else self._process,
+            concurrency or settings.sample_event_polling_concurrency,
+            self._partition_keys if self.__partition_key__ else None
+        )
+        self.__buffered__ = 0
         self.__logger__ = logging.getLogger(__name__)
         self.__is_running__ = False
 
+        labels = {"poller": type(self).__name__}
+        self.__processed__ = MetricsRegistry.counter("event_messages_total", {**labels, "result": "processed"})
+        self.__failed__ = MetricsRegistry.counter("event_messages_total", {**labels, "result": "failed"})
+        self.__processing_seconds__ = MetricsRegistry.histogram("event_processing_seconds", labels)
+        self.__batch_fallbacks__ = MetricsRegistry.counter("event_batch_fallbacks_total", labels)
+        self.__receives__ = MetricsRegistry.counter("event_receives_total", {**labels, "result": "messages"})
+        self.__empty_receives__ = MetricsRegistry.counter("event_receives_total", {**labels, "result": "empty"})
+        MetricsRegistry.gauge("event_messages_in_flight", lambda: len(self.__dispatcher__), labels)
+        MetricsRegistry.gauge("event_messages_buffered", lambda: self.__buffered__, labels)
+
     async def poll_messages(self) -> None:
         self.__is_running__ = True
-        backoff = self.__backoff_initial_in_seconds__
+        # None marks the end of the stream, once every receiver has stopped
+        buffer: asyncio.Queue[Optional[List[Dict]]] = asyncio.Queue(maxsize=self.__prefetch_batches__)
+        receiver = asyncio.create_task(self._run_receivers(buffer))
 
         self.__logger__.info("Event poller started")
 
         try:
-            while self.__is_running__:
-                try:
-                    msgs = await asyncio.to_thread(self.__receive__)
-                    if not msgs:
-                        await asyncio.sleep(backoff)
-                        backoff = self.__backoff_initial_in_seconds__
-                        continue
-
+            while (msgs := await buffer.get()) is not None:
+                if self.__deduplicator__ is not None:
+                    msgs = await self._skip_duplicates(msgs)
+                if not msgs:
+                    continue
+                if self.__batches__:
+                    await self.__dispatcher__.submit(msgs)
+                    self.__buffered__ -= len(msgs)
+                else:
                     for msg in msgs:
-                        try:
-                            await self.__event_processor__.process(msg)
-                            self.__logger__.info("Processed message successfully")
-                        except Exception as ex:
-                            self.__logger__.exception("Error processing message: %s", ex)
-
-                    backoff = self.__backoff_initial_in_seconds__
-
-                except asyncio.CancelledError:
-                    self.__logger__.info("Polling cancelled, shutting down gracefully")
-                    raise
-                except Exception:
-                    self.__logger__.exception("Top-level polling error; backing off %.1fs", backoff)
-                    await asyncio.sleep(backoff)
-                    backoff = min(backoff * 2, self.__backoff_max_in_seconds__)
+                        await self.__dispatcher__.submit(msg)
+                        self.__buffered__ -= 1
+        except asyncio.CancelledError:
+            self.__logger__.info("Polling cancelled, shutting down gracefully")
+            raise
         finally:
             self.__is_running__ = False
+            receiver.cancel()
+            await asyncio.gather(receiver, return_exceptions=True)
+            if self.__buffered__:
+                self.__logger__.info(f"Leaving {self.__buffered__} received message(s) unprocessed")
+                self.__buffered__ = 0
+            await self._drain()
             self.__logger__.info("Event poller stopped")
 
+    async def _skip_duplicates(self, msgs: List[Dict]) -> List[Dict]:
+        msgs, duplicates = await self.__deduplicator__.split(msgs)
+        if duplicates:
+            self.__buffered__ -= len(duplicates)
+            self.__logger__.info(f"Skipping {len(duplicates)} message(s) already processed")
+            # Acknowledged as processed, so that the broker stops redelivering them
+            await self._acknowledge(duplicates, [None] * len(duplicates))
+        return msgs
+
+    async def _run_receivers(self, buffer: asyncio.Queue):
+        await asyncio.gather(*(self._receive_loop(buffer) for _ in range(self.__receivers__)))
+        await buffer.put(None)
+
+    async def _receive_loop(self, buffer: asyncio.Queue):
+        backoff = self.__backoff_initial_in_seconds__
+        idle_interval = 0.0
+
+        while self.__is_running__:
+            try:
+                msgs = await self._receive()
+            except Exception:
+                self.__logger__.exception("Top-level polling error; backing off %.1fs", backoff)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.__backoff_max_in_seconds__)
+                continue
+            backoff = self.__backoff_initial_in_seconds__
+
+            if not msgs:
+                self.__empty_receives__.inc()
+                idle_interval = min(
+                    idle_interval * 2 or self.__idle_interval_min_in_seconds__,
+                    self.__idle_interval_max_in_seconds__
+                )
+                await asyncio.sleep(idle_interval)
+                continue
+
+            # Messages keep coming: receive again as soon as the buffer has room
+            self.__receives__.inc()
+            idle_interval = 0.0
+            self.__buffered__ += len(msgs)
+            await buffer.put(msgs)
+
+    async def _receive(self) -> List[Dict]:
+        if inspect.iscoroutinefunction(self.__receive__):
+            return await self.__receive__()
+        return await asyncio.to_thread(self.__receive__)
+
+    async def _drain(self):
+        in_flight = len(self.__dispatcher__)
+        if in_flight:
+            self.__logger__.info(f"Waiting for {in_flight} message(s) in flight")
+        cancelled = await self.__dispatcher__.drain(self.__drain_timeout_in_seconds__)
+        if cancelled:
+            self.__logger__.warning(
+                f"Cancelled {cancelled} message(s) still in flight after {self.__drain_timeout_in_seconds__}s"
+            )
+
+    def _message_key(self, msg: Dict) -> Optional[Hashable]:
+        key = msg.get(self.__partition_key__) if isinstance(msg, dict) else None
+        # Unhashable values such as nested objects are keyed by their text
+        return key if key is None or isinstance(key, Hashable) else str(key)
+
+    def _partition_keys(self, item) -> Set[Hashable]:
+        # A batch waits for, and holds back, every partition key it contains
+        keys = {self._message_key(msg) for msg in item} if self.__batches__ else {self._message_key(item)}
+        keys.discard(None)
+        return keys
+
+    async def _process(self, msg: Dict):
+        started_at = time.perf_counter()
+        error: Optional[Exception] = None
+        try:
+            with DbContext.unit_of_work():
+                await self.__event_processor__.process(msg)
+            self.__processed__.inc()
+            self.__logger__.info("Processed message successfully")
+        except Exception as ex:
+            error = ex
+            self.__failed__.inc()
+            self.__logger__.exception("Error processing message: %s", ex)
+        finally:
+            self.__processing_seconds__.observe(time.perf_counter() - started_at)
+        await self._complete([msg], [error])
+
+    async def _process_batch(self, msgs: List[Dict]):
+        started_at = time.perf_counter()
+        try:
+            with DbContext.unit_of_work():
+                results = await self.__event_processor__.process_batch(msgs)
+        except Exception as ex:
+            self.__batch_fallbacks__.inc()
+            self.__logger__.exception(
+                "Error processing a batch of %d message(s), processing them one by one: %s", len(msgs), ex
+            )
+            # In order, so that messages of the same partition key keep their order
+            for msg in msgs:
+                await self._process(msg)
+            return
+
+        elapsed = time.perf_counter() - started_at
+        if len(results) != len(msgs):
+            self.__logger__.error(f"process_batch returned {len(results)} result(s) for {len(msgs)} message(s)")
+            results = list(results)[:len(msgs)]
+            results += [ValueError("No result returned for the message")] * (len(msgs) - len(results))
+
+        for error in results:
+            # The batch time is shared evenly between its messages
+            self.__processing_seconds__.observe(elapsed / len(msgs))
+            if error is None:
+                self.__processed__.inc()
+            else:
+                self.__failed__.inc()
+                self.__logger__.error("Error processing message: %s", error, exc_info=error)
+        self.__logger__.info(f"Processed batch of {len(msgs)} message(s)")
+        await self._complete(msgs, results)
+
+    async def _complete(self, msgs: List[Dict], errors: List[Optional[Exception]]):
+        if self.__deduplicator__ is not None:
+            # Recorded before acknowledging, so that a message redelivered after a failed acknowledgement is skipped
+            await self.__deduplicator__.record([msg for msg, error in zip(msgs, errors) if error is None])
+        await self._acknowledge(msgs, errors)
+
+    async def _acknowledge(self, msgs: List[Dict], errors: List[Optional[Exception]]):
+        try:
+            if inspect.iscoroutinefunction(self.__acknowledge__):
+                await self.__acknowledge__(msgs, errors)
+            else:
+                await asyncio.to_thread(self.__acknowledge__, msgs, errors)
+        except Exception:
+            # The broker redelivers what was not acknowledged
+            self.__logger__.exception(f"Error acknowledging {len(msgs)} message(s)")
+
     def __receive__(self) -> List[Dict]:
         """
         Override this method to implement actual message receiving logic.
-        This is a synchronous method that will be run in a thread pool.
+        A synchronous implementation is run in a thread pool; one defined with `async def`
+        is awaited on the event loop, for clients with native asyncio support.
         """
         return []
 
+    async def __acknowledge__(self, msgs: List[Dict], errors: List[Optional[Exception]]) -> None:
+        """
+        Override this method to tell the broker the outcome of processed messages, e.g. to
+        delete the processed ones and release the failed ones for redelivery.
+        Called with one error per message: None when it was processed. Like `__receive__`,
+        it may be synchronous, and is then run in a thread pool.
+        """
+
     def stop(self):
         """Signal the poller to stop gracefully"""
         self.__is_running__ = False
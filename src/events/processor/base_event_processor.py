@@ -1,7 +1,12 @@
 import abc
+from typing import List, Optional, Sequence
 
 
 class BaseEventProcessor(abc.ABC):
+    # Set to True in processors whose `process_batch` applies a batch at once; pollers then
+    # hand it every batch they receive instead of calling `process` for each event
+    processes_batches = False
+
     @abc.abstractmethod
     async def process(self, event):
         """
@@ -14,3 +19,30 @@ class BaseEventProcessor(abc.ABC):
             Exception: If processing fails
         """
         pass
+
+    async def process_batch(self, events: Sequence) -> List[Optional[Exception]]:
+        """
+        Process several events at once, e.g. in one transaction with bulk statements.
+
+        By default each event is processed on its own with `process`. Processors that
+        override it set `processes_batches` to have pollers call it.
+
+        Args:
+            events: The events to process, in the order they were received
+
+        Returns:
+            One result per event, in the same order: None when the event was processed, or
+            the exception it failed with. These events are not retried.
+
+        Raises:
+            Exception: If the batch as a whole fails; nothing of it must then have been
+                applied, since every event is processed again on its own with `process`
+        """
+        results: List[Optional[Exception]] = []
+        for event in events:
+            try:
+                await self.process(event)
+                results.append(None)
+            except Exception as ex:
+                results.append(ex)
+        return results
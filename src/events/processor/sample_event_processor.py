@@ -1,9 +1,12 @@
 import logging
+from typing import List, Optional, Sequence
 
+from src.db.context import DbContext
 from src.events.processor.base_event_processor import BaseEventProcessor
 
 
 class SampleEventProcessor(BaseEventProcessor):
+    processes_batches = True
 
     def __init__(self):
         self.__logger__ = logging.getLogger(__name__)
@@ -17,3 +20,34 @@ class SampleEventProcessor(BaseEventProcessor):
         """
         self.__logger__.info(f"Processing event: {event}")
         # Add your event processing logic here
+
+    async def process_batch(self, events: Sequence) -> List[Optional[Exception]]:
+        """
+        Process a batch of events in one transaction. Implement your business logic here.
+
+        Events that cannot be processed are reported in the results and left out of the batch;
+        an exception raised from the session rolls the whole batch back, after which the
+        poller processes every event on its own with `process`.
+
+        Args:
+            events: The events to process
+
+        Returns:
+            None for each processed event, or the exception it failed with
+        """
+        results: List[Optional[Exception]] = []
+        valid_events = []
+        for event in events:
+            if isinstance(event, dict):
+                results.append(None)
+                valid_events.append(event)
+            else:
+                results.append(ValueError(f"Unexpected event: {event!r}"))
+
+        # The connection is only checked out by the first statement, so an empty batch costs nothing
+        async with DbContext.get_session_async() as session:
+            self.__logger__.info(f"Processing {len(valid_events)} event(s)")
+            # Add your batch processing logic here, with bulk statements on `session`
+            # (e.g. the multi-row statements of SampleService.bulk_create); it is committed once
+
+        return results
@@ -1,9 +1,14 @@
 import asyncio
 
-from .pollers import SampleEventPoller
+from src import settings
+from src.services import SampleService
+from .pollers import PostgresEventPoller, SampleEventPoller
 from .processor import SampleEventProcessor
 
 async def register_event_pollers():
     event_processor = SampleEventProcessor()
-    sqs_poller = SampleEventPoller(event_processor)
-    await sqs_poller.poll_messages()
+    if settings.sample_event_transport == "postgres":
+        poller = PostgresEventPoller(event_processor, SampleService.EVENTS_QUEUE)
+    else:
+        poller = SampleEventPoller(event_processor)
+    await poller.poll_messages()
@@ -0,0 +1,3 @@
+from .metrics_registry import Counter, Histogram, MetricsRegistry
+
+__all__ = ["Counter", "Histogram", "MetricsRegistry"]
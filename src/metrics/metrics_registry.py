@@ -0,0 +1,88 @@
+import bisect
+import os
+from typing import Callable, Dict, Optional, Sequence
+
+# Upper bounds in seconds; suits connection waits and query latencies
+DEFAULT_LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: int = 1):
+        self.value += amount
+
+
+class Histogram:
+    """Fixed-bucket histogram; `snapshot` reports cumulative bucket counts like Prometheus."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.__bounds__ = sorted(buckets)
+        self.__counts__ = [0] * (len(self.__bounds__) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.__counts__[bisect.bisect_left(self.__bounds__, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self) -> dict:
+        buckets = {}
+        cumulative = 0
+        for bound, count in zip(self.__bounds__, self.__counts__):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        buckets["+Inf"] = self.count
+        return {"count": self.count, "sum": round(self.sum, 6), "buckets": buckets}
+
+
+class MetricsRegistry:
+    """
+    Process-wide registry of in-memory metrics.
+
+    Each uvicorn worker keeps its own registry, so a snapshot describes the worker that served it.
+    """
+
+    __counters__: Dict[str, Counter] = {}
+    __histograms__: Dict[str, Histogram] = {}
+    __gauges__: Dict[str, Callable[[], float]] = {}
+
+    @staticmethod
+    def _key(name: str, labels: Optional[Dict[str, str]]) -> str:
+        if not labels:
+            return name
+        return name + "{" + ",".join(f'{key}="{value}"' for key, value in sorted(labels.items())) + "}"
+
+    @staticmethod
+    def counter(name: str, labels: Optional[Dict[str, str]] = None) -> Counter:
+        key = MetricsRegistry._key(name, labels)
+        if key not in MetricsRegistry.__counters__:
+            MetricsRegistry.__counters__[key] = Counter()
+        return MetricsRegistry.__counters__[key]
+
+    @staticmethod
+    def histogram(
+        name: str,
+        labels: Optional[Dict[str, str]] = None,
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS
+    ) -> Histogram:
+        key = MetricsRegistry._key(name, labels)
+        if key not in MetricsRegistry.__histograms__:
+            MetricsRegistry.__histograms__[key] = Histogram(buckets)
+        return MetricsRegistry.__histograms__[key]
+
+    @staticmethod
+    def gauge(name: str, read: Callable[[], float], labels: Optional[Dict[str, str]] = None):
+        """Register a gauge whose value is read when a snapshot is taken."""
+        MetricsRegistry.__gauges__[MetricsRegistry._key(name, labels)] = read
+
+    @staticmethod
+    def snapshot() -> dict:
+        return {
+            "pid": os.getpid(),
+            "counters": {key: counter.value for key, counter in sorted(MetricsRegistry.__counters__.items())},
+            "gauges": {key: read() for key, read in sorted(MetricsRegistry.__gauges__.items())},
+            "histograms": {key: histogram.snapshot() for key, histogram in sorted(MetricsRegistry.__histograms__.items())},
+        }
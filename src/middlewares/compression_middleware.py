@@ -0,0 +1,238 @@
+import logging
+import zlib
+from typing import Callable, Dict, List, Optional, Sequence
+
+from fastapi import FastAPI
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src import settings
+from src.metrics import MetricsRegistry
+from src.utils.etag_utils import EtagUtils
+
+# Optional codecs; an encoding whose module is missing is not offered
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class GzipEncoder:
+    def __init__(self, level: int):
+        self.__compressor__ = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        # A sync flush ends every chunk on a byte boundary, so the client can decode what it has received
+        return self.__compressor__.compress(data) + self.__compressor__.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class BrotliEncoder:
+    def __init__(self, level: int):
+        self.__compressor__ = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        output = self.__compressor__.process(data)
+        return output + (self.__compressor__.finish() if final else self.__compressor__.flush())
+
+
+class ZstdEncoder:
+    def __init__(self, level: int):
+        self.__compressor__ = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        output = self.__compressor__.compress(data)
+        return output + self.__compressor__.flush(
+            zstandard.COMPRESSOBJ_FLUSH_FINISH if final else zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+
+
+# Encoder factory and level used when COMPRESSION_LEVELS does not set one, by content coding
+ENCODERS: Dict[str, Callable[[int], object]] = {"gzip": GzipEncoder}
+DEFAULT_LEVELS: Dict[str, int] = {"gzip": 6, "br": 4, "zstd": 3}
+if brotli is not None:
+    ENCODERS["br"] = BrotliEncoder
+if zstandard is not None:
+    ENCODERS["zstd"] = ZstdEncoder
+
+# No body, or a body whose meaning would change
+_UNCOMPRESSED_STATUSES = {204, 206, 304}
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses with the content coding negotiated from `Accept-Encoding`.
+
+    `encodings` lists the codings offered, most preferred first; among the codings the client
+    accepts with the highest q-value, the first one in this list is used. Only the content types
+    of `levels` are compressed, each at its own level per coding. Bodies are compressed chunk by
+    chunk as they are sent, so streaming responses stay streamed; a body is only held back until
+    it reaches `minimum_size`, and bodies smaller than that are sent as they are.
+
+    A compressed response's ETag is suffixed with its coding, so that the compressed and
+    uncompressed forms never share a strong validator; a 304 keeps the suffixed ETag the
+    client sent back.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        encodings: Sequence[str],
+        levels: Dict[str, Dict[str, int]],
+        minimum_size: int
+    ):
+        self.app = app
+        self.__encodings__ = [encoding for encoding in encodings if encoding in ENCODERS]
+        self.__levels__ = levels
+        self.__minimum_size__ = minimum_size
+
+        self.__responses__ = {
+            encoding: MetricsRegistry.counter("compression_responses_total", {"encoding": encoding})
+            for encoding in self.__encodings__
+        }
+        self.__bytes_in__ = {
+            encoding: MetricsRegistry.counter("compression_bytes_in_total", {"encoding": encoding})
+            for encoding in self.__encodings__
+        }
+        self.__bytes_out__ = {
+            encoding: MetricsRegistry.counter("compression_bytes_out_total", {"encoding": encoding})
+            for encoding in self.__encodings__
+        }
+
+    def _negotiate(self, accept_encoding: str) -> Optional[str]:
+        qualities: Dict[str, float] = {}
+        for item in accept_encoding.split(","):
+            name, _, params = item.partition(";")
+            name = name.strip().lower()
+            if not name:
+                continue
+            quality = 1.0
+            for param in params.split(";"):
+                key, _, value = param.partition("=")
+                if key.strip().lower() == "q":
+                    try:
+                        quality = float(value)
+                    except ValueError:
+                        quality = 0.0
+            qualities[name] = quality
+
+        best, best_quality = None, 0.0
+        for encoding in self.__encodings__:
+            quality = qualities.get(encoding, qualities.get("*", 0.0))
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    def _level(self, headers: Headers, status: int, encoding: str) -> Optional[int]:
+        """The level to compress this response at, or None when it must be sent as it is."""
+        if status < 200 or status in _UNCOMPRESSED_STATUSES or "content-encoding" in headers:
+            return None
+        if "no-transform" in headers.get("cache-control", ""):
+            return None
+        content_type = headers.get("content-type", "").partition(";")[0].strip().lower()
+        if content_type not in self.__levels__:
+            return None
+        content_length = headers.get("content-length")
+        if content_length is not None and int(content_length) < self.__minimum_size__:
+            return None
+        return self.__levels__[content_type].get(encoding, DEFAULT_LEVELS[encoding])
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        encoding = self._negotiate(request_headers.get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        headers: Optional[MutableHeaders] = None
+        level: Optional[int] = None
+        encoder = None
+        pending: List[bytes] = []
+        pending_size = 0
+
+        async def compress(message: Message):
+            nonlocal start, headers, level, encoder, pending_size
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=list(message.get("headers", [])))
+                level = self._level(headers, message["status"], encoding)
+                if level is None:
+                    if message["status"] == 304 and "etag" in headers:
+                        # Answer with the ETag of the compressed form when that is the one the client has
+                        etag = EtagUtils.with_coding(headers["etag"], encoding)
+                        if etag in request_headers.get("if-none-match", ""):
+                            headers["etag"] = etag
+                            message = {**message, "headers": headers.raw}
+                    await send(message)
+                    return
+                headers.add_vary_header("Accept-Encoding")
+                start = {**message, "headers": headers.raw}
+                return
+
+            if level is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if encoder is None:
+                # Hold the start of the body back until it is clear whether it is worth compressing
+                pending.append(body)
+                pending_size += len(body)
+                if more_body and pending_size < self.__minimum_size__:
+                    return
+                body = b"".join(pending)
+                pending.clear()
+                if pending_size < self.__minimum_size__:
+                    await send(start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+
+                del headers["content-length"]
+                headers["content-encoding"] = encoding
+                if "etag" in headers:
+                    headers["etag"] = EtagUtils.with_coding(headers["etag"], encoding)
+                self.__responses__[encoding].inc()
+                await send(start)
+                encoder = ENCODERS[encoding](level)
+
+            if not body and more_body:
+                return
+            output = encoder.compress(body, final=not more_body)
+            self.__bytes_in__[encoding].inc(len(body))
+            self.__bytes_out__[encoding].inc(len(output))
+            await send({"type": "http.response.body", "body": output, "more_body": more_body})
+
+        await self.app(scope, receive, compress)
+
+
+def add_compression_middleware(application: FastAPI):
+    """Compress responses unless COMPRESSION_ENCODINGS is empty."""
+    encodings = [encoding.strip() for encoding in settings.compression_encodings.split(",") if encoding.strip()]
+    if not encodings:
+        return
+
+    missing = [encoding for encoding in encodings if encoding not in ENCODERS]
+    if missing:
+        logging.getLogger(__name__).warning(
+            f"Compression encodings {', '.join(missing)} are not offered; install 'brotli' for br and 'zstandard' for zstd"
+        )
+
+    application.add_middleware(
+        CompressionMiddleware,
+        encodings=encodings,
+        levels=settings.compression_levels,
+        minimum_size=settings.compression_minimum_size
+    )
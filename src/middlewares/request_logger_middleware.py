@@ -4,6 +4,10 @@ import uuid
 
 from fastapi import Request, FastAPI
 
+from src.db.context import DbContext
+from src.db.pool_metrics import PoolMetrics
+from src.db.statement_counter import StatementCounter
+
 
 def add_request_logger_middleware(application: FastAPI):
     @application.middleware("http")
@@ -20,15 +24,18 @@ def add_request_logger_middleware(application: FastAPI):
             f"Incoming Request: {request.method} {request.url} | Request ID: {request_id} | Correlation ID: {correlation_id} | Client: {request.client.host}"
         )
 
-        response = await call_next(request)
+        with StatementCounter.track() as statement_count, PoolMetrics.track_route(request.scope), \
+                DbContext.unit_of_work():
+            response = await call_next(request)
 
         end_time = datetime.datetime.now(datetime.UTC)
         process_time = (end_time - start_time).total_seconds()
         logging.info(
-            f"Outgoing Response: {response.status_code} | Request ID: {request_id} | Correlation ID: {correlation_id} | Time: {process_time:.2f}s"
+            f"Outgoing Response: {response.status_code} | Request ID: {request_id} | Correlation ID: {correlation_id} | Time: {process_time:.2f}s | DB Statements: {statement_count.value}"
         )
 
         response.headers["X-Request-ID"] = request_id
         response.headers["X-Correlation-ID"] = correlation_id
+        response.headers["X-DB-Statements"] = str(statement_count.value)
 
         return response
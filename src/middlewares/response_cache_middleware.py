@@ -0,0 +1,178 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from fastapi import FastAPI
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src import settings
+from src.cache import CachedResponse, MemoryResponseCacheBackend, ResponseCacheBackend
+from src.db.cache_invalidation import CacheInvalidation
+from src.db.postgres_response_cache import PostgresResponseCacheBackend
+from src.metrics import MetricsRegistry
+from src.utils.etag_utils import EtagUtils
+
+# Recomputed for every response, or describing a single response rather than the resource
+_UNCACHED_HEADERS = {b"content-length", b"x-cache", b"vary"}
+# CORS headers answer the Origin of one request, and must not be replayed to another caller
+_UNCACHED_HEADER_PREFIX = b"access-control-"
+
+
+def _is_stored(name: bytes) -> bool:
+    name = name.lower()
+    return name not in _UNCACHED_HEADERS and not name.startswith(_UNCACHED_HEADER_PREFIX)
+
+
+class ResponseCacheMiddleware:
+    """
+    Caches the serialised 200 responses of GET endpoints, keyed by path and sorted query parameters.
+
+    `paths` maps each cached path to a CacheInvalidation topic; a committed write to the
+    topic drops all of its cached responses. Concurrent misses for the same key in a worker
+    wait for the first one instead of all running the endpoint. A request sent with
+    `Cache-Control: no-cache` skips the lookup and refreshes the entry.
+    """
+
+    def __init__(self, app: ASGIApp, backend: ResponseCacheBackend, paths: Dict[str, str], max_entry_bytes: int):
+        self.app = app
+        self.__backend__ = backend
+        self.__paths__ = paths
+        self.__max_entry_bytes__ = max_entry_bytes
+        self.__inflight__: Dict[str, asyncio.Future] = {}
+        self.__logger__ = logging.getLogger(__name__)
+
+        self.__hits__ = MetricsRegistry.counter("response_cache_requests_total", {"result": "hit"})
+        self.__misses__ = MetricsRegistry.counter("response_cache_requests_total", {"result": "miss"})
+        self.__coalesced__ = MetricsRegistry.counter("response_cache_requests_total", {"result": "coalesced"})
+
+        # A shared backend is invalidated once, by the worker that committed the write
+        for topic in set(paths.values()):
+            CacheInvalidation.subscribe(
+                topic, lambda keys, topic=topic: backend.invalidate(topic), remote=not backend.shared
+            )
+
+    @staticmethod
+    def _key(scope: Scope) -> str:
+        query = parse_qsl(scope["query_string"].decode("latin-1"), keep_blank_values=True)
+        return scope["path"] + "?" + urlencode(sorted(query))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] != "GET" or scope["path"] not in self.__paths__:
+            await self.app(scope, receive, send)
+            return
+
+        topic = self.__paths__[scope["path"]]
+        key = self._key(scope)
+        request_headers = Headers(scope=scope)
+
+        if "no-cache" not in request_headers.get("cache-control", ""):
+            cached = await self._lookup(key, topic)
+            if cached is None and key in self.__inflight__:
+                # The same response is being computed; shield it from this request being cancelled
+                cached = await asyncio.shield(self.__inflight__[key])
+                if cached is not None:
+                    self.__coalesced__.inc()
+            elif cached is not None:
+                self.__hits__.inc()
+
+            if cached is not None:
+                await self._send_cached(cached, request_headers, send)
+                return
+
+        self.__misses__.inc()
+        await self._fill(scope, receive, send, key, topic)
+
+    async def _lookup(self, key: str, topic: str) -> Optional[CachedResponse]:
+        try:
+            return await self.__backend__.get(key, topic)
+        except Exception:
+            self.__logger__.exception("Response cache lookup failed")
+            return None
+
+    async def _send_cached(self, cached: CachedResponse, request_headers: Headers, send: Send):
+        etag = next((value.decode("latin-1") for name, value in cached.headers if name == b"etag"), None)
+        if etag and EtagUtils.is_not_modified(etag, None, request_headers.get("if-none-match"), None):
+            await send({"type": "http.response.start", "status": 304, "headers": [(b"etag", etag.encode("latin-1"))]})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        headers = cached.headers + [
+            (b"content-length", str(len(cached.body)).encode("latin-1")),
+            (b"x-cache", b"HIT"),
+        ]
+        await send({"type": "http.response.start", "status": cached.status_code, "headers": headers})
+        await send({"type": "http.response.body", "body": cached.body})
+
+    async def _fill(self, scope: Scope, receive: Receive, send: Send, key: str, topic: str):
+        future = None
+        if key not in self.__inflight__:
+            future = asyncio.get_running_loop().create_future()
+            self.__inflight__[key] = future
+
+        status_code = 0
+        stored_headers: List[Tuple[bytes, bytes]] = []
+        chunks: List[bytes] = []
+        size = 0
+        cacheable = False
+
+        async def capture(message: Message):
+            nonlocal status_code, stored_headers, size, cacheable
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                raw_headers = list(message.get("headers", []))
+                stored_headers = [(name, value) for name, value in raw_headers if _is_stored(name)]
+                cacheable = status_code == 200 and not any(name.lower() == b"set-cookie" for name, _ in raw_headers)
+                message = {**message, "headers": raw_headers + [(b"x-cache", b"MISS")]}
+            elif message["type"] == "http.response.body" and cacheable:
+                chunks.append(message.get("body", b""))
+                size += len(chunks[-1])
+                if size > self.__max_entry_bytes__:
+                    cacheable = False
+                    chunks.clear()
+            await send(message)
+
+        response = None
+        try:
+            try:
+                generation = await self.__backend__.generation(topic)
+            except Exception:
+                self.__logger__.exception("Response cache generation lookup failed")
+                generation = None
+            await self.app(scope, receive, capture)
+            if cacheable and generation is not None:
+                response = CachedResponse(status_code=status_code, headers=stored_headers, body=b"".join(chunks))
+                try:
+                    await self.__backend__.set(key, topic, response, generation)
+                except Exception:
+                    self.__logger__.exception("Response cache store failed")
+        finally:
+            if future is not None:
+                del self.__inflight__[key]
+                future.set_result(response)
+
+
+def add_response_cache_middleware(application: FastAPI, paths: Dict[str, str]):
+    """Cache the GET responses of `paths` (path -> invalidation topic) unless RESPONSE_CACHE_TTL_IN_SECONDS is 0."""
+    if not settings.response_cache_ttl_in_seconds:
+        return
+
+    if settings.response_cache_backend == "postgres":
+        backend = PostgresResponseCacheBackend(
+            max_entries=settings.response_cache_max_entries,
+            ttl_in_seconds=settings.response_cache_ttl_in_seconds
+        )
+    else:
+        backend = MemoryResponseCacheBackend(
+            max_entries=settings.response_cache_max_entries,
+            max_bytes=settings.response_cache_max_bytes,
+            ttl_in_seconds=settings.response_cache_ttl_in_seconds
+        )
+
+    application.add_middleware(
+        ResponseCacheMiddleware,
+        backend=backend,
+        paths=paths,
+        max_entry_bytes=settings.response_cache_max_entry_bytes
+    )
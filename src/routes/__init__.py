@@ -1,7 +1,9 @@
 from .hello_world.hello_world_routes import router as hello_world_router
+from .metrics.metrics_routes import router as metrics_router
 from .sample import router as sample_router
 
 __all__ = [
     "hello_world_router",
+    "metrics_router",
     "sample_router",
 ]
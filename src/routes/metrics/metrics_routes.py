@@ -0,0 +1,16 @@
+from fastapi import APIRouter
+
+from src.metrics import MetricsRegistry
+
+router = APIRouter()
+
+
+@router.get("/")
+async def get_metrics():
+    """
+    In-memory metrics of the worker process that serves the request.
+
+    Counters and gauges are reported by name (with labels in braces); histograms
+    report count, sum and cumulative bucket counts keyed by upper bound.
+    """
+    return MetricsRegistry.snapshot()
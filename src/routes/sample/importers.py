@@ -0,0 +1,108 @@
+import csv
+from typing import AsyncIterable, AsyncIterator, Tuple, Union
+
+import orjson
+from pydantic import ValidationError
+
+from .schemas import ExportFormat, SampleEntityImportRow
+
+JSON_FIELDS = ("required_jsonb", "optional_jsonb")
+
+
+async def iter_lines(stream: AsyncIterable[bytes]) -> AsyncIterator[Tuple[int, bytes]]:
+    """Split a byte stream into numbered lines without buffering more than one partial line."""
+    buffer = b""
+    line_number = 0
+    async for chunk in stream:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            yield line_number, line
+    if buffer:
+        yield line_number + 1, buffer
+
+
+async def iter_csv_records(stream: AsyncIterable[bytes]) -> AsyncIterator[Tuple[int, Union[dict, str]]]:
+    """
+    Parse a CSV byte stream with a header row into numbered records.
+
+    Quoted fields may span several lines; a record is complete once its double quotes
+    are balanced. Yields (line number, record) pairs, or (line number, error message)
+    for lines that cannot be decoded.
+    """
+    header = None
+    pending = ""
+    first_line_number = 0
+
+    async for line_number, line in iter_lines(stream):
+        try:
+            text = line.decode("utf-8")
+        except UnicodeDecodeError:
+            pending = ""
+            yield line_number, "Line is not valid UTF-8"
+            continue
+
+        if not pending:
+            first_line_number = line_number
+        pending += text + "\n"
+        if pending.count('"') % 2:
+            continue
+
+        fields = next(csv.reader([pending]))
+        pending = ""
+        if not any(fields):
+            continue
+        if header is None:
+            header = fields
+            continue
+        if len(fields) != len(header):
+            yield first_line_number, f"Expected {len(header)} fields, got {len(fields)}"
+            continue
+        yield first_line_number, dict(zip(header, fields))
+
+    if pending:
+        yield first_line_number, "Unterminated quoted field"
+
+
+async def iter_ndjson_records(stream: AsyncIterable[bytes]) -> AsyncIterator[Tuple[int, Union[dict, str]]]:
+    """Parse an NDJSON byte stream into numbered records, or error messages for invalid lines."""
+    async for line_number, line in iter_lines(stream):
+        if not line.strip():
+            continue
+        try:
+            record = orjson.loads(line)
+        except orjson.JSONDecodeError as e:
+            yield line_number, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield line_number, "Expected a JSON object"
+            continue
+        yield line_number, record
+
+
+def validate_import_record(record: dict, data_format: ExportFormat) -> dict:
+    """
+    Validate one parsed record into the field values of a SampleEntity.
+
+    CSV values are strings, so empty fields are treated as missing and JSON columns are decoded first.
+
+    Raises:
+        ValueError: If the record is not a valid sample entity
+    """
+    if data_format == ExportFormat.CSV:
+        record = {key: value for key, value in record.items() if value != ""}
+        for field in JSON_FIELDS:
+            if field in record:
+                try:
+                    record[field] = orjson.loads(record[field])
+                except orjson.JSONDecodeError as e:
+                    raise ValueError(f"{field}: invalid JSON: {e}")
+
+    try:
+        row = SampleEntityImportRow.model_validate(record)
+    except ValidationError as e:
+        raise ValueError("; ".join(
+            f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+        ))
+    return row.model_dump(exclude_none=True)
@@ -1,21 +1,179 @@
+from datetime import datetime
+from typing import Awaitable, Callable, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException, Query, status
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.cache import SingleFlight
 from src.db.context import DbContext
 from src.entities.sample_entity import SampleEntity
-from src.services import SampleService
+from src import settings
+from src.services import SampleService, CountMode, SearchMode, BulkItemStatus, BulkItemResult, JsonbColumn, JsonbFilter
+from src.utils.etag_utils import EtagUtils
 from .schemas import (
+    ExportFormat,
     SampleEntityCreate,
     SampleEntityUpdate,
     SampleEntityResponse,
     SampleEntityListResponse,
+    SampleEntityBulkCreate,
+    SampleEntityBulkUpdate,
+    SampleEntityBulkDelete,
+    BulkOperationResponse,
+    ImportRejectedRow,
+    ImportResponse,
     DeleteResponse
 )
+from .importers import iter_csv_records, iter_ndjson_records, validate_import_record
+from .serializers import encode_csv, encode_csv_header, encode_ndjson, entity_dict, row_dicts
 
 router = APIRouter()
 sample_service = SampleService()
 
+# Concurrent identical reads in a worker share one session and one query
+read_flight = SingleFlight("sample_reads")
+
+# Committed when the endpoint returns, before the response is sent; declared with scope="function".
+# The bulk and import endpoints keep their own session blocks instead, so that the connection is
+# back in the pool before their potentially large responses are serialised
+write_session = DbContext.session_dependency()
+
+
+async def shared_read(key: tuple, read: Callable[[AsyncSession], Awaitable]):
+    """Run `read` in a read-only session, or wait for the identical read already in flight."""
+    async def run():
+        async with DbContext.get_session_async(read_only=True) as session:
+            return await read(session)
+
+    # A request that already wrote reads from the primary, so it does not share replica reads
+    return await read_flight.do(key + (DbContext.has_written(),), run)
+
+
+def parse_ids(values: list[str]) -> list[UUID]:
+    try:
+        entity_ids = [UUID(value.strip()) for item in values for value in item.split(",") if value.strip()]
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="ids must be UUIDs")
+
+    if not entity_ids or len(entity_ids) > settings.sample_batch_get_max_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Between 1 and {settings.sample_batch_get_max_ids} ids are required"
+        )
+    return entity_ids
+
+
+def parse_jsonb_filter(
+    column: JsonbColumn,
+    contains: Optional[str],
+    keys: Optional[list[str]],
+    path: Optional[str]
+) -> Optional[JsonbFilter]:
+    if contains is None and not keys and path is None:
+        return None
+
+    if contains is not None:
+        try:
+            document = orjson.loads(contains)
+        except orjson.JSONDecodeError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="jsonb_contains must be valid JSON")
+        if not isinstance(document, (dict, list)):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="jsonb_contains must be a JSON object or array"
+            )
+        # Canonical, so that equivalent filters share cached counts and coalesced reads
+        contains = orjson.dumps(document, option=orjson.OPT_SORT_KEYS).decode()
+
+    if path is not None and not path.strip():
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="jsonb_path cannot be empty")
+
+    return JsonbFilter(column=column, contains=contains, keys=tuple(sorted(set(keys or ()))), path=path)
+
+
+def set_validators(response: Response, entity_id: UUID, modified_on: datetime):
+    response.headers["ETag"] = EtagUtils.entity_etag(entity_id, modified_on)
+    response.headers["Last-Modified"] = EtagUtils.last_modified(modified_on)
+
+
+def page_etag(entities: list, total: Optional[int], count_mode: CountMode) -> str:
+    return EtagUtils.page_etag(((entity.id, entity.modified_on) for entity in entities), total, count_mode.value)
+
+
+# Enough to compute a page ETag and its next cursor without loading the JSONB columns
+PAGE_VERSION_COLUMNS = [SampleEntity.id, SampleEntity.created_on, SampleEntity.modified_on]
+
+
+# Fields of SampleEntityResponse, in order, and the columns selected for them by the fast serialization path
+RESPONSE_FIELDS = list(SampleEntityResponse.model_fields)
+RESPONSE_COLUMNS = [SampleEntity.__table__.c[field] for field in RESPONSE_FIELDS]
+
+# Always loaded with a sparse fieldset, for ETags and cursors, but only returned when requested
+VERSION_FIELDS = [column.key for column in PAGE_VERSION_COLUMNS]
+
+FIELDS_DESCRIPTION = f"Comma-separated fields to return, out of: {', '.join(RESPONSE_FIELDS)}"
+
+
+def parse_fields(fields: Optional[str]) -> Optional[list[str]]:
+    if fields is None:
+        return None
+
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested.difference(RESPONSE_FIELDS)
+    if not requested or unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}" if unknown else "fields cannot be empty"
+        )
+    # Response model order, so that the same fieldset always gives the same response
+    return [field for field in RESPONSE_FIELDS if field in requested]
+
+
+def response_columns(fields: Optional[list[str]] = None) -> Optional[list]:
+    """
+    Columns to load as rows instead of entities: the requested `fields` followed by the
+    version columns they lack, or every response column on the fast serialization path.
+    Rows are encoded with `row_dicts`, which drops the trailing columns that were not requested.
+    """
+    if fields is None:
+        return RESPONSE_COLUMNS if settings.sample_fast_serialization else None
+
+    table = SampleEntity.__table__
+    return [table.c[field] for field in fields] + [table.c[field] for field in VERSION_FIELDS if field not in fields]
+
+
+def json_response(content, response: Response) -> Response:
+    """
+    Encode `content` with orjson as is, skipping response model validation.
+
+    The route keeps its `response_model`, so the OpenAPI schema is unchanged; the headers
+    already set on `response` are carried over.
+    """
+    # OPT_UTC_Z writes UTC times with a Z suffix, as the response models do
+    body = orjson.dumps(content, option=orjson.OPT_UTC_Z)
+    return Response(content=body, media_type="application/json", headers=dict(response.headers))
+
+
+def list_response(page: SampleEntityListResponse, items: list[dict], response: Response) -> Response:
+    # Only the envelope is validated; the items are encoded as they are
+    content = page.model_dump(mode="json")
+    content["items"] = items
+    return json_response(content, response)
+
+
+def to_bulk_response(results: list[BulkItemResult]) -> BulkOperationResponse:
+    failed = sum(1 for result in results if result.status == BulkItemStatus.FAILED)
+    not_found = sum(1 for result in results if result.status == BulkItemStatus.NOT_FOUND)
+    return BulkOperationResponse(
+        results=results,
+        succeeded=len(results) - failed - not_found,
+        failed=failed + not_found
+    )
+
 
 @router.post(
     "/",
@@ -24,7 +182,11 @@ sample_service = SampleService()
     summary="Create a new sample entity",
     description="Create a new sample entity with the provided data"
 )
-async def create_sample_entity(entity_data: SampleEntityCreate):
+async def create_sample_entity(
+    entity_data: SampleEntityCreate,
+    response: Response,
+    session: AsyncSession = Depends(write_session, scope="function")
+):
     """
     Create a new sample entity.
 
@@ -36,10 +198,165 @@ async def create_sample_entity(entity_data: SampleEntityCreate):
     - **optional_jsonb**: Optional JSONB field
     - **big_int**: Big integer field (default: 1)
     """
+    entity = SampleEntity(**entity_data.model_dump())
+    created_entity = await sample_service.create(session, entity)
+    set_validators(response, created_entity.id, created_entity.modified_on)
+    return created_entity
+
+
+# Bulk routes are registered before the /{entity_id} routes so that "bulk" is not parsed as an ID
+@router.post(
+    "/bulk",
+    response_model=BulkOperationResponse,
+    summary="Create many sample entities",
+    description="Create many sample entities in one request, with a result per item"
+)
+async def bulk_create_sample_entities(bulk_data: SampleEntityBulkCreate):
+    """
+    Create many sample entities.
+
+    - **items**: Entities to create, same fields as the single create endpoint
+
+    Rows are written with multi-row INSERT statements in chunks of SAMPLE_BULK_CHUNK_SIZE.
+    A failing item is reported with status `failed` and does not prevent the others from being created.
+    """
+    async with DbContext.get_session_async() as session:
+        results = await sample_service.bulk_create(session, [item.model_dump() for item in bulk_data.items])
+        return to_bulk_response(results)
+
+
+@router.patch(
+    "/bulk",
+    response_model=BulkOperationResponse,
+    summary="Update many sample entities",
+    description="Partially update many sample entities in one request, with a result per item"
+)
+async def bulk_update_sample_entities(bulk_data: SampleEntityBulkUpdate):
+    """
+    Update many sample entities.
+
+    - **items**: Each item holds the `id` to update and the fields to change; omitted or null fields are left unchanged
+
+    Items whose entity does not exist (or is inactive/deleted) are reported with status `not_found`.
+    """
+    async with DbContext.get_session_async() as session:
+        items = [(item.id, item.model_dump(exclude={"id"})) for item in bulk_data.items]
+        results = await sample_service.bulk_update(session, items)
+        return to_bulk_response(results)
+
+
+@router.delete(
+    "/bulk",
+    response_model=BulkOperationResponse,
+    summary="Delete many sample entities",
+    description="Delete many sample entities in one request (soft delete by default)"
+)
+async def bulk_delete_sample_entities(
+    bulk_data: SampleEntityBulkDelete,
+    hard_delete: bool = Query(False, description="Permanently delete from database")
+):
+    """
+    Delete many sample entities.
+
+    - **ids**: IDs of the entities to delete
+    - **hard_delete**: If true, permanently delete from database; if false, soft delete (default: false)
+    """
+    async with DbContext.get_session_async() as session:
+        results = await sample_service.bulk_delete(session, bulk_data.ids, hard_delete)
+        return to_bulk_response(results)
+
+
+@router.post(
+    "/import",
+    response_model=ImportResponse,
+    summary="Import sample entities",
+    description="Load sample entities from an NDJSON or CSV request body using COPY",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/x-ndjson": {"schema": {"type": "string"}},
+                "text/csv": {"schema": {"type": "string"}},
+            },
+        }
+    }
+)
+async def import_sample_entities(
+    request: Request,
+    data_format: ExportFormat = Query(ExportFormat.NDJSON, alias="format", description="Format of the request body")
+):
+    """
+    Import sample entities.
+
+    - **format**: `ndjson` (one JSON object per line, default) or `csv` (with a header row)
+
+    Each row has the fields of the create endpoint plus an optional `id`; a row whose `id`
+    already exists replaces that entity. Files produced by the export endpoint can be imported as is.
+    The body is read, validated and copied into the database as it arrives. Invalid rows are
+    skipped and reported by line number; the valid rows are loaded in one transaction.
+    """
+    parse = iter_csv_records if data_format == ExportFormat.CSV else iter_ndjson_records
+    rejected: list[ImportRejectedRow] = []
+    rows_rejected = 0
+
+    async def valid_rows():
+        nonlocal rows_rejected
+        async for line_number, record in parse(request.stream()):
+            try:
+                if isinstance(record, str):
+                    raise ValueError(record)
+                yield validate_import_record(record, data_format)
+            except ValueError as e:
+                rows_rejected += 1
+                if len(rejected) < settings.sample_import_max_reported_rejections:
+                    rejected.append(ImportRejectedRow(line=line_number, error=str(e)))
+
     async with DbContext.get_session_async() as session:
-        entity = SampleEntity(**entity_data.model_dump())
-        created_entity = await sample_service.create(session, entity)
-        return created_entity
+        result = await sample_service.copy_import(session, valid_rows())
+
+    return ImportResponse(
+        rows_loaded=result.rows_upserted,
+        rows_rejected=rows_rejected,
+        elapsed_seconds=round(result.elapsed_seconds, 3),
+        rows_per_second=round(result.rows_per_second, 1),
+        rejected=rejected
+    )
+
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    summary="Export sample entities",
+    description="Stream every sample entity as NDJSON or CSV",
+    responses={200: {"content": {"application/x-ndjson": {}, "text/csv": {}}}}
+)
+async def export_sample_entities(
+    data_format: ExportFormat = Query(ExportFormat.NDJSON, alias="format", description="Output format"),
+    include_inactive: bool = Query(False, description="Include inactive/deleted entities")
+):
+    """
+    Export sample entities, newest first.
+
+    - **format**: `ndjson` (one JSON object per line, default) or `csv` (with a header row)
+    - **include_inactive**: Include inactive/deleted entities (default: false)
+
+    Rows are read from a server-side cursor and written to the response as they arrive,
+    so memory use stays constant regardless of the number of rows exported.
+    """
+    async def export_rows():
+        # One snapshot for the whole export, which also keeps the server-side cursor open
+        async with DbContext.get_session_async(read_only=True, snapshot=True) as session:
+            if data_format == ExportFormat.CSV:
+                yield encode_csv_header(SampleEntity.__mapper__.columns.keys())
+            async for rows in sample_service.stream_all(session, include_inactive):
+                yield encode_csv(rows) if data_format == ExportFormat.CSV else encode_ndjson(rows)
+
+    media_type = "text/csv" if data_format == ExportFormat.CSV else "application/x-ndjson"
+    return StreamingResponse(
+        export_rows(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="samples.{data_format.value}"'}
+    )
 
 
 @router.get(
@@ -48,22 +365,90 @@ async def create_sample_entity(entity_data: SampleEntityCreate):
     summary="Get sample entity by ID",
     description="Retrieve a specific sample entity by its UUID"
 )
-async def get_sample_entity(entity_id: UUID):
+async def get_sample_entity(
+    entity_id: UUID,
+    request: Request,
+    response: Response,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)
+):
     """
     Get a sample entity by ID.
 
     - **entity_id**: UUID of the entity to retrieve
+    - **fields**: Only return these fields; the other columns are not read from the database
+
+    The response carries `ETag` and `Last-Modified` headers. With `If-None-Match` or
+    `If-Modified-Since`, only `modified_on` is read first and `304 Not Modified` is
+    returned when the entity has not changed.
     """
-    async with DbContext.get_session_async() as session:
-        entity = await sample_service.get_by_id(session, entity_id)
+    fields = parse_fields(fields)
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
 
-        if not entity:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Sample entity with ID {entity_id} not found"
-            )
+    if if_none_match is not None or if_modified_since is not None:
+        modified_on = await shared_read(
+            ("version", entity_id), lambda session: sample_service.get_version(session, entity_id)
+        )
+        if modified_on is not None:
+            etag = EtagUtils.entity_etag(entity_id, modified_on)
+            if EtagUtils.is_not_modified(etag, modified_on, if_none_match, if_modified_since):
+                not_modified = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+                set_validators(not_modified, entity_id, modified_on)
+                return not_modified
+
+    columns = response_columns(fields) if fields else None
+    entity = await shared_read(
+        ("entity", entity_id, fields and tuple(fields)),
+        lambda session: sample_service.get_by_id(session, entity_id, columns)
+    )
+
+    if not entity:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Sample entity with ID {entity_id} not found"
+        )
 
-        return entity
+    set_validators(response, entity.id, entity.modified_on)
+    if fields:
+        return json_response(row_dicts([entity], fields)[0], response)
+    if settings.sample_fast_serialization:
+        return json_response(entity_dict(entity, RESPONSE_FIELDS), response)
+    return entity
+
+
+async def list_sample_entities_by_ids(
+    entity_ids: list[UUID],
+    fields: Optional[list[str]],
+    if_none_match: Optional[str],
+    response: Response
+):
+    columns = response_columns(fields) if fields else None
+    entities, missing_ids = await shared_read(
+        ("ids", tuple(entity_ids), fields and tuple(fields)),
+        lambda session: sample_service.get_by_ids(session, entity_ids, columns)
+    )
+
+    etag = page_etag(entities, len(entities), CountMode.EXACT)
+    if EtagUtils.is_not_modified(etag, None, if_none_match, None):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
+    if fields or settings.sample_fast_serialization:
+        page = SampleEntityListResponse(
+            items=[], total=len(entities), skip=0, limit=len(entity_ids), missing_ids=missing_ids
+        )
+        if fields:
+            return list_response(page, row_dicts(entities, fields), response)
+        return list_response(page, [entity_dict(entity, RESPONSE_FIELDS) for entity in entities], response)
+
+    return SampleEntityListResponse(
+        items=entities,
+        total=len(entities),
+        count_mode=CountMode.EXACT,
+        skip=0,
+        limit=len(entity_ids),
+        missing_ids=missing_ids
+    )
 
 
 @router.get(
@@ -73,9 +458,23 @@ async def get_sample_entity(entity_id: UUID):
     description="Retrieve a paginated list of sample entities"
 )
 async def list_sample_entities(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(100, ge=1, le=1000, description="Maximum number of records to return"),
-    include_inactive: bool = Query(False, description="Include inactive/deleted entities")
+    include_inactive: bool = Query(False, description="Include inactive/deleted entities"),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous page's next_cursor"),
+    count_mode: CountMode = Query(CountMode.EXACT, description="How the total is computed"),
+    ids: Optional[list[str]] = Query(None, description="Only these IDs, comma-separated or repeated"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    jsonb_column: JsonbColumn = Query(JsonbColumn.REQUIRED, description="JSONB column the jsonb_* filters apply to"),
+    jsonb_contains: Optional[str] = Query(
+        None, description='JSON the column must contain (@>), e.g. {"status": "active"}'
+    ),
+    jsonb_key: Optional[list[str]] = Query(None, description="Top-level key the column must have; repeat for several"),
+    jsonb_path: Optional[str] = Query(
+        None, description='JSONPath predicate the column must satisfy (@@), e.g. $.tags[*] == "red"'
+    )
 ):
     """
     List sample entities with pagination.
@@ -83,17 +482,72 @@ async def list_sample_entities(
     - **skip**: Number of records to skip (default: 0)
     - **limit**: Maximum number of records to return (default: 100, max: 1000)
     - **include_inactive**: Include inactive/deleted entities (default: false)
+    - **cursor**: Continue after the page that returned this `next_cursor`; cannot be combined with skip
+    - **count_mode**: `exact` (default), `estimated` (planner statistics), `cached` (exact, reused for a short TTL) or `none`
+
+    - **ids**: Return these active entities instead of a page, in the given order, with the
+      IDs that were not found in `missing_ids`; cannot be combined with skip or cursor
+    - **fields**: Only return these fields of each item; the other columns are not read from the database
+    - **jsonb_column**: `required_jsonb` (default) or `optional_jsonb`, filtered by the following
+    - **jsonb_contains**: Only entities whose column contains this JSON object or array
+    - **jsonb_key**: Only entities whose column has these top-level keys
+    - **jsonb_path**: Only entities whose column satisfies this JSONPath predicate
+
+    JSONB filters are combined with AND and served by GIN `jsonb_path_ops` indexes; JSONPath
+    predicates use the index for equality checks on a path, such as `$.a.b == 1`.
+
+    The response carries an `ETag` covering the page items and total. With `If-None-Match`,
+    the page is first read without its JSONB columns and `304 Not Modified` is returned
+    when the ETag still matches.
     """
-    async with DbContext.get_session_async() as session:
-        entities = await sample_service.get_all(session, skip, limit, include_inactive)
-        total = await sample_service.count(session, include_inactive)
-
-        return SampleEntityListResponse(
-            items=entities,
-            total=total,
-            skip=skip,
-            limit=limit
+    fields = parse_fields(fields)
+    jsonb_filter = parse_jsonb_filter(jsonb_column, jsonb_contains, jsonb_key, jsonb_path)
+    if_none_match = request.headers.get("if-none-match")
+
+    if ids is not None:
+        if skip or cursor or jsonb_filter:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="ids cannot be combined with skip, cursor or JSONB filters"
+            )
+        return await list_sample_entities_by_ids(parse_ids(ids), fields, if_none_match, response)
+
+    page = (skip, limit, include_inactive, cursor, count_mode)
+
+    try:
+        if if_none_match is not None:
+            versions, total = await shared_read(
+                ("page_versions",) + page + (jsonb_filter,),
+                lambda session: sample_service.get_page(session, *page, PAGE_VERSION_COLUMNS, jsonb_filter)
+            )
+            etag = page_etag(versions, total, count_mode)
+            if EtagUtils.is_not_modified(etag, None, if_none_match, None):
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+        columns = response_columns(fields)
+        entities, total = await shared_read(
+            ("page",) + page + (fields and tuple(fields), jsonb_filter),
+            lambda session: sample_service.get_page(session, *page, columns, jsonb_filter)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    response.headers["ETag"] = page_etag(entities, total, count_mode)
+    next_cursor = sample_service.next_cursor(entities, limit)
+    if columns:
+        page = SampleEntityListResponse(
+            items=[], total=total, count_mode=count_mode, skip=skip, limit=limit, next_cursor=next_cursor
         )
+        return list_response(page, row_dicts(entities, fields or RESPONSE_FIELDS), response)
+
+    return SampleEntityListResponse(
+        items=entities,
+        total=total,
+        count_mode=count_mode,
+        skip=skip,
+        limit=limit,
+        next_cursor=next_cursor
+    )
 
 
 @router.get(
@@ -103,9 +557,13 @@ async def list_sample_entities(
     description="Search sample entities by string field"
 )
 async def search_sample_entities(
+    response: Response,
     q: str = Query(..., min_length=1, description="Search term"),
     skip: int = Query(0, ge=0, description="Number of records to skip"),
-    limit: int = Query(100, ge=1, le=1000, description="Maximum number of records to return")
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of records to return"),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous page's X-Next-Cursor header"),
+    mode: SearchMode = Query(SearchMode.SUBSTRING, description="How the search term is matched"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)
 ):
     """
     Search sample entities by string field (case-insensitive).
@@ -113,10 +571,29 @@ async def search_sample_entities(
     - **q**: Search term
     - **skip**: Number of records to skip (default: 0)
     - **limit**: Maximum number of records to return (default: 100, max: 1000)
+    - **cursor**: Continue after the page that returned this cursor; cannot be combined with skip
+    - **mode**: `substring` (default, most similar first), `prefix` (newest first) or
+      `fulltext` (web-search syntax over string_field and optional_text, most relevant first)
+    - **fields**: Only return these fields of each result; the other columns are not read from the database
+
+    The cursor for the next page is returned in the `X-Next-Cursor` response header.
     """
-    async with DbContext.get_session_async() as session:
-        entities = await sample_service.search_by_string_field(session, q, skip, limit)
-        return entities
+    fields = parse_fields(fields)
+    columns = response_columns(fields)
+
+    try:
+        entities, next_cursor = await shared_read(
+            ("search", q, skip, limit, cursor, mode, fields and tuple(fields)),
+            lambda session: sample_service.search_page(session, q, skip, limit, cursor, mode, columns)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if columns:
+        return json_response(row_dicts(entities, fields or RESPONSE_FIELDS), response)
+    return entities
 
 
 @router.put(
@@ -125,32 +602,54 @@ async def search_sample_entities(
     summary="Update sample entity",
     description="Update an existing sample entity"
 )
-async def update_sample_entity(entity_id: UUID, entity_data: SampleEntityUpdate):
+async def update_sample_entity(
+    entity_id: UUID,
+    entity_data: SampleEntityUpdate,
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(write_session, scope="function")
+):
     """
     Update a sample entity.
 
     - **entity_id**: UUID of the entity to update
     - All fields are optional; only provided fields will be updated
-    """
-    async with DbContext.get_session_async() as session:
-        # Filter out None values to only update provided fields
-        update_data = {k: v for k, v in entity_data.model_dump().items() if v is not None}
 
-        if not update_data:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="No fields provided for update"
-            )
+    With `If-Match`, the entity is only updated if its ETag is still the given one, checked
+    by the UPDATE itself; otherwise `412 Precondition Failed` is returned.
+    """
+    expected_modified_on = None
+    if_match = request.headers.get("if-match")
+    if if_match is not None:
+        try:
+            expected_modified_on = EtagUtils.expected_modified_on(if_match, entity_id)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=str(e))
+
+    # Filter out None values to only update provided fields
+    update_data = {k: v for k, v in entity_data.model_dump().items() if v is not None}
+
+    if not update_data:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No fields provided for update"
+        )
 
-        updated_entity = await sample_service.update(session, entity_id, update_data)
+    updated_entity = await sample_service.update(session, entity_id, update_data, expected_modified_on)
 
-        if not updated_entity:
+    if not updated_entity:
+        if expected_modified_on is not None and await sample_service.get_version(session, entity_id):
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Sample entity with ID {entity_id} not found"
+                status_code=status.HTTP_412_PRECONDITION_FAILED,
+                detail=f"Sample entity with ID {entity_id} has been modified"
             )
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Sample entity with ID {entity_id} not found"
+        )
 
-        return updated_entity
+    set_validators(response, updated_entity.id, updated_entity.modified_on)
+    return updated_entity
 
 
 @router.patch(
@@ -159,14 +658,20 @@ async def update_sample_entity(entity_id: UUID, entity_data: SampleEntityUpdate)
     summary="Partially update sample entity",
     description="Partially update an existing sample entity"
 )
-async def patch_sample_entity(entity_id: UUID, entity_data: SampleEntityUpdate):
+async def patch_sample_entity(
+    entity_id: UUID,
+    entity_data: SampleEntityUpdate,
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(write_session, scope="function")
+):
     """
     Partially update a sample entity (alias for PUT endpoint).
 
     - **entity_id**: UUID of the entity to update
     - All fields are optional; only provided fields will be updated
     """
-    return await update_sample_entity(entity_id, entity_data)
+    return await update_sample_entity(entity_id, entity_data, request, response, session)
 
 
 @router.delete(
@@ -177,7 +682,8 @@ async def patch_sample_entity(entity_id: UUID, entity_data: SampleEntityUpdate):
 )
 async def delete_sample_entity(
     entity_id: UUID,
-    hard_delete: bool = Query(False, description="Permanently delete from database")
+    hard_delete: bool = Query(False, description="Permanently delete from database"),
+    session: AsyncSession = Depends(write_session, scope="function")
 ):
     """
     Delete a sample entity.
@@ -185,19 +691,17 @@ async def delete_sample_entity(
     - **entity_id**: UUID of the entity to delete
     - **hard_delete**: If true, permanently delete from database; if false, soft delete (default: false)
     """
-    async with DbContext.get_session_async() as session:
-        success = await sample_service.delete(session, entity_id, hard_delete)
-
-        if not success:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Sample entity with ID {entity_id} not found"
-            )
+    success = await sample_service.delete(session, entity_id, hard_delete)
 
-        delete_type = "permanently deleted" if hard_delete else "soft deleted"
-        return DeleteResponse(
-            success=True,
-            message=f"Sample entity {delete_type} successfully",
-            id=entity_id
+    if not success:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Sample entity with ID {entity_id} not found"
         )
 
+    delete_type = "permanently deleted" if hard_delete else "soft deleted"
+    return DeleteResponse(
+        success=True,
+        message=f"Sample entity {delete_type} successfully",
+        id=entity_id
+    )
@@ -1,9 +1,18 @@
+import enum
 from datetime import datetime
 from typing import Optional, Dict
 from uuid import UUID
 
 from pydantic import BaseModel, Field, ConfigDict
 
+from src import settings
+from src.services import CountMode, BulkItemStatus
+
+
+class ExportFormat(str, enum.Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
 
 class SampleEntityBase(BaseModel):
     """Base schema for SampleEntity with common fields"""
@@ -21,6 +30,16 @@ class SampleEntityCreate(SampleEntityBase):
     pass
 
 
+class SampleEntityImportRow(SampleEntityBase):
+    """Schema for one row of a bulk import; rows with an existing id replace that entity"""
+    id: Optional[UUID] = Field(None, description="Existing entity to replace; a new ID is generated when omitted")
+    is_active: bool = True
+    is_deleted: bool = False
+    created_on: Optional[datetime] = Field(
+        None, description="Creation time of a new entity, the import time when omitted; a replaced entity keeps its own"
+    )
+
+
 class SampleEntityUpdate(BaseModel):
     """Schema for updating an existing SampleEntity (all fields optional)"""
     required_uuid: Optional[UUID] = None
@@ -47,9 +66,12 @@ class SampleEntityResponse(SampleEntityBase):
 class SampleEntityListResponse(BaseModel):
     """Schema for paginated list response"""
     items: list[SampleEntityResponse]
-    total: int
+    total: Optional[int] = Field(None, description="Total matching entities, null when count_mode is none")
+    count_mode: CountMode = Field(CountMode.EXACT, description="How total was computed")
     skip: int
     limit: int
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page, null on the last page")
+    missing_ids: Optional[list[UUID]] = Field(None, description="Requested ids that were not found, only set with ids")
 
 
 class DeleteResponse(BaseModel):
@@ -58,3 +80,57 @@ class DeleteResponse(BaseModel):
     message: str
     id: UUID
 
+
+
+class SampleEntityBulkCreate(BaseModel):
+    """Schema for creating many SampleEntities in one request"""
+    items: list[SampleEntityCreate] = Field(..., min_length=1, max_length=settings.sample_bulk_max_items)
+
+
+class SampleEntityBulkUpdateItem(SampleEntityUpdate):
+    """Schema for one item of a bulk update"""
+    id: UUID
+
+
+class SampleEntityBulkUpdate(BaseModel):
+    """Schema for updating many SampleEntities in one request"""
+    items: list[SampleEntityBulkUpdateItem] = Field(..., min_length=1, max_length=settings.sample_bulk_max_items)
+
+
+class SampleEntityBulkDelete(BaseModel):
+    """Schema for deleting many SampleEntities in one request"""
+    ids: list[UUID] = Field(..., min_length=1, max_length=settings.sample_bulk_max_items)
+
+
+class BulkItemResultResponse(BaseModel):
+    """Schema for the outcome of one item of a bulk operation"""
+    index: int = Field(..., description="Position of the item in the request")
+    id: Optional[UUID]
+    status: BulkItemStatus
+    error: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class BulkOperationResponse(BaseModel):
+    """Schema for bulk operation response"""
+    results: list[BulkItemResultResponse]
+    succeeded: int
+    failed: int
+
+
+class ImportRejectedRow(BaseModel):
+    """Schema for a row rejected by an import"""
+    line: int
+    error: str
+
+
+class ImportResponse(BaseModel):
+    """Schema for import operation response"""
+    rows_loaded: int = Field(..., description="Rows inserted or updated in sample_table")
+    rows_rejected: int
+    elapsed_seconds: float
+    rows_per_second: float
+    rejected: list[ImportRejectedRow] = Field(
+        ..., description="First rejected rows, up to SAMPLE_IMPORT_MAX_REPORTED_REJECTIONS"
+    )
@@ -0,0 +1,44 @@
+import csv
+import io
+from datetime import datetime
+from typing import Any, Iterable, List, Sequence
+
+import orjson
+from sqlalchemy import Row
+
+
+def encode_ndjson(rows: Iterable[Row]) -> bytes:
+    """Serialise rows to newline-delimited JSON, one object per row."""
+    return b"".join(orjson.dumps(dict(row._mapping), option=orjson.OPT_APPEND_NEWLINE) for row in rows)
+
+
+def row_dicts(rows: Iterable[Row], fields: Sequence[str]) -> List[dict]:
+    """Map rows whose leading columns are `fields` to dicts; trailing columns such as window totals are dropped."""
+    return [dict(zip(fields, row)) for row in rows]
+
+
+def entity_dict(entity: Any, fields: Sequence[str]) -> dict:
+    return {field: getattr(entity, field) for field in fields}
+
+
+def encode_csv_header(columns: List[str]) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(columns)
+    return buffer.getvalue().encode("utf-8")
+
+
+def encode_csv(rows: Iterable[Row]) -> bytes:
+    """Serialise rows to CSV lines; JSON values are written as JSON text and NULL as an empty field."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_csv_value(value) for value in row])
+    return buffer.getvalue().encode("utf-8")
+
+
+def _csv_value(value):
+    if isinstance(value, (dict, list)):
+        return orjson.dumps(value).decode("utf-8")
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
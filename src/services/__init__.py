@@ -1,4 +1,7 @@
-from .sample_service import SampleService
-__all__ = ["SampleService"]
-
-
+from .sample_service import (
+    SampleService, CountMode, SearchMode, BulkItemStatus, BulkItemResult, ImportResult, JsonbColumn, JsonbFilter
+)
+__all__ = [
+    "SampleService", "CountMode", "SearchMode", "BulkItemStatus", "BulkItemResult", "ImportResult",
+    "JsonbColumn", "JsonbFilter"
+]
@@ -1,11 +1,99 @@
+import enum
 import logging
-from typing import List, Optional
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
 from uuid import UUID
 
-from sqlalchemy import select, func
+from sqlalchemy import (
+    select, func, tuple_, text, cast, insert, update, delete, values, column, any_, bindparam, literal, Row, Text
+)
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import DOUBLE_PRECISION, JSONB, JSONPATH
+from sqlalchemy.exc import DBAPIError
+import orjson
+from psycopg import sql
+from psycopg.types.json import Jsonb
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from src.entities.sample_entity import SampleEntity
+from src import settings
+from src.cache import TtlCache
+from src.db.cache_invalidation import CacheInvalidation
+from src.db.context import DbContext
+from src.db.event_queue import EventQueue
+from src.entities.event_queue_message import EventQueueMessage
+from src.entities.sample_entity import SampleEntity, SEARCH_TEXT_CONFIG, jsonb_keys
+from src.utils.cursor_utils import CursorUtils
+from src.utils.data_loader import DataLoader
+
+
+class CountMode(str, enum.Enum):
+    """How the total of a paginated list is computed."""
+    EXACT = "exact"            # COUNT(*) fused into the page query
+    ESTIMATED = "estimated"    # Planner statistics, no table scan
+    CACHED = "cached"          # Exact count reused per filter for a short TTL
+    NONE = "none"              # Total is not computed
+
+
+class SearchMode(str, enum.Enum):
+    """How a search term is matched against sample entities."""
+    SUBSTRING = "substring"    # Match anywhere in string_field
+    PREFIX = "prefix"          # Match the start of string_field
+    FULLTEXT = "fulltext"      # Ranked full-text match on string_field and optional_text
+
+
+class BulkItemStatus(str, enum.Enum):
+    CREATED = "created"
+    UPDATED = "updated"
+    DELETED = "deleted"
+    NOT_FOUND = "not_found"
+    FAILED = "failed"
+
+
+@dataclass
+class BulkItemResult:
+    """Outcome of one item of a bulk operation, reported in request order."""
+    index: int
+    id: Optional[UUID]
+    status: BulkItemStatus
+    error: Optional[str] = None
+
+
+@dataclass
+class ImportResult:
+    """Outcome of a COPY import."""
+    rows_copied: int
+    rows_upserted: int
+    elapsed_seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows_copied / self.elapsed_seconds if self.elapsed_seconds > 0 else 0.0
+
+
+class JsonbColumn(str, enum.Enum):
+    """JSONB columns of sample entities that lists can be filtered on."""
+    REQUIRED = "required_jsonb"
+    OPTIONAL = "optional_jsonb"
+
+
+@dataclass(frozen=True)
+class JsonbFilter:
+    """
+    Conditions on one JSONB column of sample entities, all of which must hold.
+
+    Each is served by a GIN jsonb_path_ops index: `contains` and `path` by the index on the
+    column, `keys` by the index on its top-level keys.
+    """
+    column: JsonbColumn = JsonbColumn.REQUIRED
+    contains: Optional[str] = None    # JSON text of a document the column must contain (@>)
+    keys: Tuple[str, ...] = ()        # Top-level keys the column must all have
+    path: Optional[str] = None        # JSONPath predicate the column must satisfy (@@)
+
+
+# (request index, entity id, payload) of one item of a bulk operation
+BulkItem = Tuple[int, UUID, Optional[dict]]
 
 
 class SampleService:
@@ -14,9 +102,135 @@ class SampleService:
     Encapsulates all CRUD operations and business rules.
     """
 
+    # session.info key of the per-session get_by_id batch loader
+    LOADER_SESSION_KEY = "sample_entity_loader"
+    # Event queue the writes are published to with SAMPLE_OUTBOX_ENABLED
+    EVENTS_QUEUE = "sample_events"
+
+    # Shared by every service instance in the worker so cached totals survive across requests
+    __count_cache__ = TtlCache(max_entries=128, ttl_in_seconds=settings.sample_count_cache_ttl_in_seconds)
+
+    # Serialised entities by ID for get_by_id; None when SAMPLE_ENTITY_CACHE_TTL_IN_SECONDS is 0
+    __entity_cache__: Optional[TtlCache] = TtlCache(
+        max_entries=settings.sample_entity_cache_max_entries,
+        ttl_in_seconds=settings.sample_entity_cache_ttl_in_seconds,
+        max_bytes=settings.sample_entity_cache_max_bytes,
+        sizeof=len,
+        name="sample_entity"
+    ) if settings.sample_entity_cache_ttl_in_seconds else None
+    if __entity_cache__ is not None:
+        CacheInvalidation.register(SampleEntity.__tablename__, __entity_cache__)
+
     def __init__(self):
         self.__logger__ = logging.getLogger(__name__)
 
+    async def _publish_events(self, session: AsyncSession, event_type: str, entity_ids: Iterable[UUID]) -> None:
+        """
+        Publish an `event_type` event per written entity to EVENTS_QUEUE, keyed by entity ID,
+        in the transaction of the write (SAMPLE_OUTBOX_ENABLED).
+        """
+        if not settings.sample_outbox_enabled:
+            return
+        keys = [str(entity_id) for entity_id in entity_ids]
+        await EventQueue.publish(session, self.EVENTS_QUEUE, [{"type": event_type, "id": key} for key in keys], keys)
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+        """
+        Decode an opaque pagination cursor into its (created_on, id) keyset.
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        created_on, entity_id = CursorUtils.decode(cursor, 2)
+        try:
+            return datetime.fromisoformat(created_on), UUID(entity_id)
+        except (TypeError, ValueError) as e:
+            raise ValueError("Invalid cursor") from e
+
+    @staticmethod
+    def _check_pagination(skip: int, cursor: Optional[str]):
+        # A cursor already points past the previous pages, so an OFFSET would skip rows of this one
+        if cursor and skip:
+            raise ValueError("Use either skip or cursor for pagination, not both")
+
+    @staticmethod
+    def _decode_search_cursor(cursor: str, mode: SearchMode) -> Tuple:
+        if mode == SearchMode.PREFIX:
+            return SampleService.decode_cursor(cursor)
+
+        score, entity_id = CursorUtils.decode(cursor, 2)
+        try:
+            return float(score), UUID(entity_id)
+        except (TypeError, ValueError) as e:
+            raise ValueError("Invalid cursor") from e
+
+    @staticmethod
+    def _escape_like(term: str) -> str:
+        # Search terms are matched literally, so LIKE wildcards in them must not act as wildcards
+        return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+    @staticmethod
+    def next_cursor(entities: List[SampleEntity], limit: int) -> Optional[str]:
+        """
+        Build the cursor pointing after the last entity of a full page.
+
+        Returns:
+            Opaque cursor string, or None when the page is the last one
+        """
+        if not entities or len(entities) < limit:
+            return None
+        last = entities[-1]
+        return CursorUtils.encode(last.created_on, last.id)
+
+    @staticmethod
+    def _paginate(statement, skip: int, limit: int, keyset: Optional[Tuple[datetime, UUID]]):
+        # (created_on, id) gives a total order, so a keyset seek never skips or repeats rows
+        statement = statement.order_by(SampleEntity.created_on.desc(), SampleEntity.id.desc())
+        if keyset is not None:
+            statement = statement.where(tuple_(SampleEntity.created_on, SampleEntity.id) < keyset)
+        return statement.offset(skip).limit(limit)
+
+    @staticmethod
+    def _column_datetime(value: datetime) -> datetime:
+        # Timestamps are stored without a time zone, in UTC
+        if SampleEntity.__table__.c.modified_on.type.timezone or value.tzinfo is None:
+            return value
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+    @staticmethod
+    def _list_filters(include_inactive: bool, jsonb_filter: Optional[JsonbFilter] = None) -> list:
+        filters = [] if include_inactive else [SampleEntity.is_deleted == False, SampleEntity.is_active == True]
+        if jsonb_filter is not None:
+            filters.extend(SampleService._jsonb_filters(jsonb_filter))
+        return filters
+
+    @staticmethod
+    def _jsonb_filters(jsonb_filter: JsonbFilter) -> list:
+        # Only operators that jsonb_path_ops supports, so that the GIN indexes can serve every one
+        # Values are bound as text and cast by the database
+        column = SampleEntity.__table__.c[jsonb_filter.column.value]
+        filters = []
+        if jsonb_filter.contains is not None:
+            filters.append(column.contains(cast(literal(jsonb_filter.contains, Text), JSONB)))
+        if jsonb_filter.keys:
+            keys = orjson.dumps(list(jsonb_filter.keys)).decode()
+            filters.append(jsonb_keys(column).bool_op("@>")(cast(literal(keys, Text), JSONB)))
+        if jsonb_filter.path is not None:
+            filters.append(column.bool_op("@@")(cast(literal(jsonb_filter.path, Text), JSONPATH)))
+        return filters
+
+    @staticmethod
+    async def _validate_jsonb_filter(session: AsyncSession, jsonb_filter: Optional[JsonbFilter]):
+        # Malformed JSONPath is only detected by Postgres; check it before it fails the page query
+        if jsonb_filter is None or jsonb_filter.path is None:
+            return
+        try:
+            await session.exec(select(cast(literal(jsonb_filter.path, Text), JSONPATH)))
+        except DBAPIError as e:
+            message = getattr(getattr(e.orig, "diag", None), "message_primary", None) or str(e.orig)
+            raise ValueError(f"Invalid JSONPath: {message}") from e
+
     async def create(self, session: AsyncSession, entity: SampleEntity) -> SampleEntity:
         """
         Create a new sample entity.
@@ -32,34 +246,105 @@ class SampleService:
             Exception: If creation fails
         """
         try:
-            session.add(entity)
-            await session.flush()
-            await session.refresh(entity)
-            self.__logger__.info(f"Created sample entity with ID: {entity.id}")
-            return entity
+            # One INSERT ... RETURNING instead of INSERT + SELECT to refresh the instance
+            statement = insert(SampleEntity).values(**entity.model_dump()).returning(SampleEntity)
+            result = await session.exec(statement)
+            created_entity = result.scalar_one()
+            CacheInvalidation.track(session, SampleEntity.__tablename__, [created_entity.id], inserted=True)
+            await self._publish_events(session, "sample.created", [created_entity.id])
+            self.__logger__.info(f"Created sample entity with ID: {created_entity.id}")
+            return created_entity
         except Exception as e:
             self.__logger__.exception(f"Error creating sample entity: {e}")
             raise
 
-    async def get_by_id(self, session: AsyncSession, entity_id: UUID) -> Optional[SampleEntity]:
+    def _loader(self, session: AsyncSession) -> DataLoader:
+        # One loader per session, so that batches never mix the reads of different sessions
+        loader = session.info.get(self.LOADER_SESSION_KEY)
+        if loader is None:
+            loader = DataLoader(lambda entity_ids: self._load_by_ids(session, entity_ids))
+            session.info[self.LOADER_SESSION_KEY] = loader
+        return loader
+
+    async def _load_by_ids(self, session: AsyncSession, entity_ids: List[UUID]) -> Dict[UUID, SampleEntity]:
+        """
+        Load active entities by ID from the entity cache, and the rest with one `id = ANY(:ids)` query.
+
+        Only rows read from the primary are cached: a lagging replica could otherwise put back
+        a version that a committed write has just invalidated.
+        """
+        cache = self.__entity_cache__
+        found: Dict[UUID, SampleEntity] = {}
+        missing = entity_ids
+        fill = cache is not None and not DbContext.is_replica(session)
+
+        if cache is not None:
+            missing = []
+            for entity_id in entity_ids:
+                cached = cache.get(str(entity_id))
+                if cached is not None:
+                    found[entity_id] = SampleEntity.model_validate(orjson.loads(cached))
+                else:
+                    missing.append(entity_id)
+            generation = cache.generation
+
+        if missing:
+            for entity in (await self._select_by_ids(session, missing)).values():
+                found[entity.id] = entity
+                if fill:
+                    cache.set(str(entity.id), orjson.dumps(entity.model_dump()), generation)
+
+        self.__logger__.info(
+            f"Loaded {len(found)}/{len(entity_ids)} sample entities by ID ({len(entity_ids) - len(missing)} cached)"
+        )
+        return found
+
+    async def _select_by_ids(
+        self,
+        session: AsyncSession,
+        entity_ids: Sequence[UUID],
+        columns: Optional[Sequence] = None
+    ) -> Dict[UUID, SampleEntity]:
+        # One `id = ANY(:ids)` query for the active entities, or rows of `columns` (which must include id)
+        ids = bindparam("ids", list(entity_ids), type_=postgresql.ARRAY(SampleEntity.__table__.c.id.type))
+        statement = select(*columns) if columns else select(SampleEntity)
+        statement = statement.where(SampleEntity.id == any_(ids), *self._list_filters(include_inactive=False))
+
+        result = await session.exec(statement)
+        if columns:
+            return {row.id: row for row in result.all()}
+        return {entity.id: entity for entity in result.scalars()}
+
+    async def get_by_id(
+        self,
+        session: AsyncSession,
+        entity_id: UUID,
+        columns: Optional[Sequence] = None
+    ) -> Optional[SampleEntity]:
         """
         Retrieve a sample entity by ID.
 
+        Calls made for the same session in the same event loop tick, e.g. from
+        `asyncio.gather`, are batched into a single query. Entities are served from the
+        in-process entity cache when present; a cached entity is a new instance that is
+        not attached to `session`. A `columns` read is neither batched nor cached.
+
         Args:
             session: Database session
             entity_id: UUID of the entity to retrieve
+            columns: SampleEntity columns to load instead of the whole entity
 
         Returns:
-            SampleEntity if found, None otherwise
+            SampleEntity (or row of `columns`) if found, None otherwise
         """
         try:
-            statement = select(SampleEntity).where(
-                SampleEntity.id == entity_id,
-                SampleEntity.is_deleted == False,
-                SampleEntity.is_active == True
-            )
-            result = await session.exec(statement)
-            entity = result.scalar_one_or_none()
+            if columns:
+                statement = select(*columns).where(
+                    SampleEntity.id == entity_id, *self._list_filters(include_inactive=False)
+                )
+                entity = (await session.exec(statement)).first()
+            else:
+                entity = await self._loader(session).load(entity_id)
 
             if entity:
                 self.__logger__.info(f"Retrieved sample entity with ID: {entity_id}")
@@ -71,64 +356,146 @@ class SampleService:
             self.__logger__.exception(f"Error retrieving sample entity by ID {entity_id}: {e}")
             raise
 
+    async def get_by_ids(
+        self,
+        session: AsyncSession,
+        entity_ids: Sequence[UUID],
+        columns: Optional[Sequence] = None
+    ) -> Tuple[List[SampleEntity], List[UUID]]:
+        """
+        Retrieve many sample entities by ID with a single query.
+
+        Args:
+            session: Database session
+            entity_ids: IDs to retrieve; duplicates are returned once
+            columns: SampleEntity columns to load instead of whole entities; must include id.
+                Such reads bypass the entity cache
+
+        Returns:
+            Tuple of the entities found (rows of `columns` when given), in the order of
+            `entity_ids`, and the IDs not found
+        """
+        unique_ids = list(dict.fromkeys(entity_ids))
+        try:
+            if columns:
+                rows = await self._select_by_ids(session, unique_ids, columns)
+                entities = [rows.get(entity_id) for entity_id in unique_ids]
+            else:
+                entities = await self._loader(session).load_many(unique_ids)
+        except Exception as e:
+            self.__logger__.exception(f"Error retrieving {len(unique_ids)} sample entities by ID: {e}")
+            raise
+
+        found = [entity for entity in entities if entity is not None]
+        missing_ids = [entity_id for entity_id, entity in zip(unique_ids, entities) if entity is None]
+        if missing_ids:
+            self.__logger__.warning(f"Sample entities not found with IDs: {', '.join(map(str, missing_ids))}")
+        return found, missing_ids
+
+    async def get_version(self, session: AsyncSession, entity_id: UUID) -> Optional[datetime]:
+        """
+        Retrieve the `modified_on` of a sample entity without loading the entity.
+
+        Served from the entity cache when present, otherwise only the column is selected.
+
+        Args:
+            session: Database session
+            entity_id: UUID of the entity
+
+        Returns:
+            modified_on if the entity is found, None otherwise
+        """
+        cache = self.__entity_cache__
+        if cache is not None:
+            cached = cache.get(str(entity_id))
+            if cached is not None:
+                return datetime.fromisoformat(orjson.loads(cached)["modified_on"])
+
+        try:
+            statement = select(SampleEntity.modified_on).where(
+                SampleEntity.id == entity_id,
+                SampleEntity.is_deleted == False,
+                SampleEntity.is_active == True
+            )
+            result = await session.exec(statement)
+            return result.scalar_one_or_none()
+        except Exception as e:
+            self.__logger__.exception(f"Error retrieving version of sample entity {entity_id}: {e}")
+            raise
+
     async def get_all(
         self,
         session: AsyncSession,
         skip: int = 0,
         limit: int = 100,
-        include_inactive: bool = False
+        include_inactive: bool = False,
+        cursor: Optional[str] = None,
+        columns: Optional[Sequence] = None,
+        jsonb_filter: Optional[JsonbFilter] = None
     ) -> List[SampleEntity]:
         """
         Retrieve all sample entities with pagination.
 
+        Pages are ordered by (created_on, id) descending. When a cursor is given the
+        page starts right after the row it points to (keyset pagination), which stays
+        fast on deep pages; otherwise `skip` is applied as a plain OFFSET. `skip` and
+        `cursor` cannot be combined.
+
         Args:
             session: Database session
             skip: Number of records to skip (for pagination)
             limit: Maximum number of records to return
             include_inactive: Whether to include inactive/deleted entities
+            cursor: Opaque cursor returned by `next_cursor` for the previous page
+            columns: SampleEntity columns to load instead of whole entities
+            jsonb_filter: Conditions on a JSONB column the entities must satisfy
 
         Returns:
-            List of SampleEntity instances
-        """
-        try:
-            statement = select(SampleEntity)
+            List of SampleEntity instances, or of rows of `columns` when given
 
-            if not include_inactive:
-                statement = statement.where(
-                    SampleEntity.is_deleted == False,
-                    SampleEntity.is_active == True
-                )
+        Raises:
+            ValueError: If the cursor or the JSONPath of `jsonb_filter` is malformed, or
+                both `skip` and `cursor` are given
+        """
+        self._check_pagination(skip, cursor)
+        keyset = self.decode_cursor(cursor) if cursor else None
+        await self._validate_jsonb_filter(session, jsonb_filter)
 
-            statement = statement.offset(skip).limit(limit).order_by(SampleEntity.created_on.desc())
+        try:
+            statement = select(*columns) if columns else select(SampleEntity)
+            statement = statement.where(*self._list_filters(include_inactive, jsonb_filter))
+            statement = self._paginate(statement, skip, limit, keyset)
 
             result = await session.exec(statement)
-            entities = result.scalars().all()
+            entities = result.all() if columns else result.scalars().all()
 
-            self.__logger__.info(f"Retrieved {len(entities)} sample entities (skip={skip}, limit={limit})")
+            self.__logger__.info(
+                f"Retrieved {len(entities)} sample entities (skip={skip}, limit={limit}, cursor={bool(keyset)})"
+            )
             return list(entities)
         except Exception as e:
             self.__logger__.exception(f"Error retrieving sample entities: {e}")
             raise
 
-    async def count(self, session: AsyncSession, include_inactive: bool = False) -> int:
+    async def count(
+        self,
+        session: AsyncSession,
+        include_inactive: bool = False,
+        jsonb_filter: Optional[JsonbFilter] = None
+    ) -> int:
         """
         Count total number of sample entities.
 
         Args:
             session: Database session
             include_inactive: Whether to include inactive/deleted entities
+            jsonb_filter: Conditions on a JSONB column the entities must satisfy
 
         Returns:
             Total count of entities
         """
         try:
-            statement = select(func.count(SampleEntity.id))
-
-            if not include_inactive:
-                statement = statement.where(
-                    SampleEntity.is_deleted == False,
-                    SampleEntity.is_active == True
-                )
+            statement = select(func.count(SampleEntity.id)).where(*self._list_filters(include_inactive, jsonb_filter))
 
             result = await session.exec(statement)
             count = result.scalar_one()
@@ -139,11 +506,205 @@ class SampleService:
             self.__logger__.exception(f"Error counting sample entities: {e}")
             raise
 
+    async def stream_all(
+        self,
+        session: AsyncSession,
+        include_inactive: bool = False
+    ) -> AsyncIterator[List[Row]]:
+        """
+        Stream every sample entity as column rows, newest first.
+
+        Rows are fetched through a server-side cursor SAMPLE_EXPORT_BATCH_SIZE at a time,
+        so memory use does not depend on the size of the table. The session must stay
+        open until the iterator is exhausted.
+
+        Args:
+            session: Database session
+            include_inactive: Whether to include inactive/deleted entities
+
+        Yields:
+            Batches of rows exposing the mapped columns of SampleEntity
+        """
+        columns = [SampleEntity.__table__.c[name] for name in SampleEntity.__mapper__.columns.keys()]
+        statement = select(*columns).where(
+            *self._list_filters(include_inactive)
+        ).order_by(
+            SampleEntity.created_on.desc(), SampleEntity.id.desc()
+        ).execution_options(yield_per=settings.sample_export_batch_size)
+
+        exported = 0
+        try:
+            result = await session.stream(statement)
+            async for rows in result.partitions():
+                exported += len(rows)
+                yield rows
+        except Exception as e:
+            self.__logger__.exception(f"Error streaming sample entities after {exported} rows: {e}")
+            raise
+
+        self.__logger__.info(f"Streamed {exported} sample entities")
+
+    async def get_page(
+        self,
+        session: AsyncSession,
+        skip: int = 0,
+        limit: int = 100,
+        include_inactive: bool = False,
+        cursor: Optional[str] = None,
+        count_mode: CountMode = CountMode.EXACT,
+        columns: Optional[Sequence] = None,
+        jsonb_filter: Optional[JsonbFilter] = None
+    ) -> Tuple[List[SampleEntity], Optional[int]]:
+        """
+        Retrieve a page of sample entities together with the list total.
+
+        With `CountMode.EXACT` and offset pagination the total is computed by a
+        `COUNT(*) OVER ()` window in the page query itself, so the page costs a
+        single round trip. Cursor pages and pages past the end fall back to `count`.
+
+        Args:
+            session: Database session
+            skip: Number of records to skip (for pagination)
+            limit: Maximum number of records to return
+            include_inactive: Whether to include inactive/deleted entities
+            cursor: Opaque cursor returned by `next_cursor` for the previous page
+            count_mode: How the total is computed
+            columns: SampleEntity columns to load instead of whole entities
+            jsonb_filter: Conditions on a JSONB column the entities must satisfy
+
+        Returns:
+            Tuple of the page entities (rows of `columns` when given) and the total
+            (None for `CountMode.NONE`)
+
+        Raises:
+            ValueError: If the cursor or the JSONPath of `jsonb_filter` is malformed, or
+                both `skip` and `cursor` are given
+        """
+        if count_mode != CountMode.EXACT or cursor:
+            entities = await self.get_all(session, skip, limit, include_inactive, cursor, columns, jsonb_filter)
+
+            if count_mode == CountMode.EXACT:
+                total = await self.count(session, include_inactive, jsonb_filter)
+            elif count_mode == CountMode.ESTIMATED:
+                total = await self.estimate_count(session, include_inactive, jsonb_filter)
+            elif count_mode == CountMode.CACHED:
+                total = await self.cached_count(session, include_inactive, jsonb_filter)
+            else:
+                total = None
+            return entities, total
+
+        await self._validate_jsonb_filter(session, jsonb_filter)
+
+        try:
+            selected = columns if columns else [SampleEntity]
+            statement = select(*selected, func.count().over().label("total")).where(
+                *self._list_filters(include_inactive, jsonb_filter)
+            )
+            statement = self._paginate(statement, skip, limit, None)
+
+            result = await session.exec(statement)
+            rows = result.all()
+        except Exception as e:
+            self.__logger__.exception(f"Error retrieving sample entities page: {e}")
+            raise
+
+        if not rows:
+            # The window total is only known when the page has rows
+            total = await self.count(session, include_inactive, jsonb_filter) if skip else 0
+            return [], total
+
+        entities = list(rows) if columns else [row[0] for row in rows]
+        self.__logger__.info(
+            f"Retrieved {len(entities)} sample entities (skip={skip}, limit={limit}, total={rows[0].total})"
+        )
+        return entities, rows[0].total
+
+    async def estimate_count(
+        self,
+        session: AsyncSession,
+        include_inactive: bool = False,
+        jsonb_filter: Optional[JsonbFilter] = None
+    ) -> int:
+        """
+        Estimate the number of sample entities from planner statistics.
+
+        The unfiltered total is read from `pg_class.reltuples`; filtered totals use
+        the row estimate of the planner for the filtered query. Neither scans the table.
+
+        Args:
+            session: Database session
+            include_inactive: Whether to include inactive/deleted entities
+            jsonb_filter: Conditions on a JSONB column the entities must satisfy
+
+        Returns:
+            Estimated count of entities
+        """
+        try:
+            if include_inactive and jsonb_filter is None:
+                statement = text("SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:table_name AS regclass)")
+                result = await session.exec(statement, params={"table_name": SampleEntity.__table__.fullname})
+                estimate = result.scalar_one()
+                if estimate >= 0:
+                    return estimate
+                # -1 means the table was never analyzed; let the planner estimate instead
+
+            query = select(SampleEntity.id).where(*self._list_filters(include_inactive, jsonb_filter))
+            plan = await self.explain(session, query)
+            estimate = int(plan["Plan Rows"])
+
+            self.__logger__.info(f"Estimated sample entities count: {estimate}")
+            return estimate
+        except Exception as e:
+            self.__logger__.exception(f"Error estimating sample entities count: {e}")
+            raise
+
+    @staticmethod
+    async def explain(session: AsyncSession, statement) -> dict:
+        """
+        Plan `statement` without running it.
+
+        Args:
+            session: Database session
+            statement: SELECT statement; its parameters are sent bound, as when it runs
+
+        Returns:
+            Root node of the JSON plan
+        """
+        connection = await session.connection()
+        compiled = statement.compile(dialect=connection.dialect, compile_kwargs={"render_postcompile": True})
+        result = await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled.string}", compiled.params)
+        return result.scalar_one()[0]["Plan"]
+
+    async def cached_count(
+        self,
+        session: AsyncSession,
+        include_inactive: bool = False,
+        jsonb_filter: Optional[JsonbFilter] = None
+    ) -> int:
+        """
+        Count sample entities, reusing a recent exact count for the same filter.
+
+        Args:
+            session: Database session
+            include_inactive: Whether to include inactive/deleted entities
+            jsonb_filter: Conditions on a JSONB column the entities must satisfy
+
+        Returns:
+            Count of entities, at most SAMPLE_COUNT_CACHE_TTL_IN_SECONDS old
+        """
+        cache_key = ("count", include_inactive, jsonb_filter)
+        total = self.__count_cache__.get(cache_key)
+        if total is None:
+            total = await self.count(session, include_inactive, jsonb_filter)
+            self.__count_cache__.set(cache_key, total)
+        return total
+
     async def update(
         self,
         session: AsyncSession,
         entity_id: UUID,
-        update_data: dict
+        update_data: dict,
+        expected_modified_on: Optional[datetime] = None
     ) -> Optional[SampleEntity]:
         """
         Update a sample entity.
@@ -152,28 +713,42 @@ class SampleService:
             session: Database session
             entity_id: UUID of the entity to update
             update_data: Dictionary containing fields to update
+            expected_modified_on: Only update the entity if it still has this modified_on
 
         Returns:
-            Updated SampleEntity if found, None otherwise
+            Updated SampleEntity if found (and still at `expected_modified_on`), None otherwise
 
         Raises:
             Exception: If update fails
         """
         try:
-            entity = await self.get_by_id(session, entity_id)
+            # Only provided, mapped fields; id and created_on are never rewritten
+            changes = {
+                field: value for field, value in update_data.items()
+                if field in SampleEntity.__table__.c and field not in ['id', 'created_on']
+            }
+
+            filters = [SampleEntity.id == entity_id, SampleEntity.is_deleted == False, SampleEntity.is_active == True]
+            if expected_modified_on is not None:
+                filters.append(SampleEntity.modified_on == self._column_datetime(expected_modified_on))
+
+            if not changes:
+                # Nothing to write, so modified_on is left as is
+                result = await session.exec(select(SampleEntity).where(*filters))
+                return result.scalar_one_or_none()
+
+            # A single UPDATE ... RETURNING; modified_on is set by the column's onupdate
+            statement = update(SampleEntity).where(*filters).values(**changes).returning(SampleEntity)
+
+            result = await session.exec(statement.execution_options(synchronize_session=False))
+            entity = result.scalar_one_or_none()
 
             if not entity:
                 self.__logger__.warning(f"Cannot update - sample entity not found with ID: {entity_id}")
                 return None
 
-            # Update only provided fields
-            for field, value in update_data.items():
-                if hasattr(entity, field) and field not in ['id', 'created_on']:
-                    setattr(entity, field, value)
-
-            await session.flush()
-            await session.refresh(entity)
-
+            CacheInvalidation.track(session, SampleEntity.__tablename__, [entity_id])
+            await self._publish_events(session, "sample.updated", [entity_id])
             self.__logger__.info(f"Updated sample entity with ID: {entity_id}")
             return entity
         except Exception as e:
@@ -196,32 +771,121 @@ class SampleService:
             Exception: If delete fails
         """
         try:
-            entity = await self.get_by_id(session, entity_id)
+            filters = [SampleEntity.id == entity_id, SampleEntity.is_deleted == False, SampleEntity.is_active == True]
 
-            if not entity:
+            if hard_delete:
+                statement = delete(SampleEntity).where(*filters).returning(SampleEntity.id)
+            else:
+                statement = update(SampleEntity).where(*filters).values(is_deleted=True, is_active=False).returning(SampleEntity.id)
+
+            result = await session.exec(statement.execution_options(synchronize_session=False))
+            if result.scalar_one_or_none() is None:
                 self.__logger__.warning(f"Cannot delete - sample entity not found with ID: {entity_id}")
                 return False
 
-            if hard_delete:
-                await session.delete(entity)
-                self.__logger__.info(f"Hard deleted sample entity with ID: {entity_id}")
-            else:
-                entity.is_deleted = True
-                entity.is_active = False
-                await session.flush()
-                self.__logger__.info(f"Soft deleted sample entity with ID: {entity_id}")
+            CacheInvalidation.track(session, SampleEntity.__tablename__, [entity_id])
+            await self._publish_events(session, "sample.deleted", [entity_id])
 
+            self.__logger__.info(f"{'Hard' if hard_delete else 'Soft'} deleted sample entity with ID: {entity_id}")
             return True
         except Exception as e:
             self.__logger__.exception(f"Error deleting sample entity {entity_id}: {e}")
             raise
 
+    async def search_page(
+        self,
+        session: AsyncSession,
+        search_term: str,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        mode: SearchMode = SearchMode.SUBSTRING,
+        columns: Optional[Sequence] = None
+    ) -> Tuple[List[SampleEntity], Optional[str]]:
+        """
+        Search sample entities and return the cursor for the next page.
+
+        Every mode is served by an index on sample_table:
+        - SUBSTRING: case-insensitive match anywhere in string_field (pg_trgm GIN index),
+          most similar first
+        - PREFIX: case-insensitive match at the start of string_field (text_pattern_ops
+          index on lower(string_field)), newest first
+        - FULLTEXT: web-search style query over string_field and optional_text (GIN index
+          on search_vector), highest ts_rank_cd first
+
+        Args:
+            session: Database session
+            search_term: Term to search for
+            skip: Number of records to skip
+            limit: Maximum number of records to return
+            cursor: Opaque cursor returned by a previous page
+            mode: How search_term is matched and ranked
+            columns: SampleEntity columns to load instead of whole entities; must include
+                id, and created_on for PREFIX
+
+        Returns:
+            Tuple of the matching entities (rows of `columns` when given) and the next page
+            cursor (None on the last page)
+
+        Raises:
+            ValueError: If the cursor is malformed, or both `skip` and `cursor` are given
+        """
+        self._check_pagination(skip, cursor)
+        keyset = self._decode_search_cursor(cursor, mode) if cursor else None
+
+        selected = columns if columns else [SampleEntity]
+
+        try:
+            if mode == SearchMode.PREFIX:
+                # Lowered by the database like the column, since Python case mapping differs for some characters
+                pattern = func.lower(literal(f"{self._escape_like(search_term)}%", Text))
+                statement = select(*selected).where(func.lower(SampleEntity.string_field).like(pattern))
+                statement = self._paginate(statement, skip, limit, keyset)
+            else:
+                if mode == SearchMode.FULLTEXT:
+                    search_vector = SampleEntity.__table__.c.search_vector
+                    query = func.websearch_to_tsquery(SEARCH_TEXT_CONFIG, search_term)
+                    match = search_vector.bool_op("@@")(query)
+                    score = func.ts_rank_cd(search_vector, query)
+                else:
+                    match = SampleEntity.string_field.ilike(f"%{self._escape_like(search_term)}%")
+                    score = func.similarity(SampleEntity.string_field, search_term)
+
+                # float4 scores do not round-trip through Python floats; double precision does
+                score = cast(score, DOUBLE_PRECISION)
+                statement = select(*selected, score.label("score")).where(match)
+                statement = statement.order_by(score.desc(), SampleEntity.id.desc())
+                if keyset is not None:
+                    statement = statement.where(tuple_(score, SampleEntity.id) < keyset)
+                statement = statement.offset(skip).limit(limit)
+
+            statement = statement.where(*self._list_filters(include_inactive=False))
+
+            result = await session.exec(statement)
+            rows = result.all()
+        except Exception as e:
+            self.__logger__.exception(f"Error searching sample entities: {e}")
+            raise
+
+        entities = list(rows) if columns else [row[0] for row in rows]
+        if mode == SearchMode.PREFIX:
+            next_cursor = self.next_cursor(entities, limit)
+        else:
+            next_cursor = CursorUtils.encode(rows[-1].score, entities[-1].id) if rows and len(rows) == limit else None
+
+        self.__logger__.info(
+            f"Search ({mode.value}) for '{search_term}' returned {len(entities)} results"
+        )
+        return entities, next_cursor
+
     async def search_by_string_field(
         self,
         session: AsyncSession,
         search_term: str,
         skip: int = 0,
-        limit: int = 100
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        mode: SearchMode = SearchMode.SUBSTRING
     ) -> List[SampleEntity]:
         """
         Search sample entities by string field (case-insensitive).
@@ -231,25 +895,311 @@ class SampleService:
             search_term: Term to search for in string_field
             skip: Number of records to skip
             limit: Maximum number of records to return
+            cursor: Opaque cursor returned by a previous page
+            mode: How search_term is matched and ranked (see `search_page`)
 
         Returns:
             List of matching SampleEntity instances
+
+        Raises:
+            ValueError: If the cursor is malformed
         """
-        try:
-            statement = select(SampleEntity).where(
-                SampleEntity.string_field.ilike(f"%{search_term}%"),
-                SampleEntity.is_deleted == False,
-                SampleEntity.is_active == True
-            ).offset(skip).limit(limit).order_by(SampleEntity.created_on.desc())
+        entities, _ = await self.search_page(session, search_term, skip, limit, cursor, mode)
+        return entities
+
+    async def bulk_create(self, session: AsyncSession, items: Sequence[dict]) -> List[BulkItemResult]:
+        """
+        Create many sample entities with one multi-row INSERT ... RETURNING per chunk.
+
+        Args:
+            session: Database session
+            items: Field values of the entities to create
 
+        Returns:
+            One BulkItemResult per item, in input order
+        """
+        table = SampleEntity.__table__
+        rows = [SampleEntity(**item).model_dump() for item in items]
+
+        async def insert_chunk(chunk: List[BulkItem]) -> Set[UUID]:
+            statement = insert(table).values([payload for _, _, payload in chunk]).returning(table.c.id)
             result = await session.exec(statement)
-            entities = result.scalars().all()
+            created = set(result.scalars().all())
+            CacheInvalidation.track(session, table.name, created, inserted=True)
+            # Inside the chunk's SAVEPOINT, so a failed chunk publishes nothing
+            await self._publish_events(session, "sample.created", created)
+            return created
 
-            self.__logger__.info(
-                f"Search for '{search_term}' returned {len(entities)} results"
-            )
-            return list(entities)
+        results = await self._bulk_execute(
+            session,
+            [(index, row["id"], row) for index, row in enumerate(rows)],
+            insert_chunk,
+            BulkItemStatus.CREATED
+        )
+        self.__logger__.info(f"Bulk created {self._count_status(results, BulkItemStatus.CREATED)}/{len(items)} sample entities")
+        return results
+
+    async def bulk_update(self, session: AsyncSession, items: Sequence[Tuple[UUID, dict]]) -> List[BulkItemResult]:
+        """
+        Update many sample entities with one UPDATE ... FROM (VALUES ...) RETURNING per chunk.
+
+        Like `update`, only the fields present with a non-null value are changed, and
+        only active, non-deleted entities are updated; an item with nothing to change is
+        reported updated when its entity exists, without writing it. Items of a chunk with
+        the same ID are merged in order into one row, as if applied one after the other.
+
+        Args:
+            session: Database session
+            items: (entity ID, fields to update) pairs
+
+        Returns:
+            One BulkItemResult per item, in input order
+        """
+        table = SampleEntity.__table__
+
+        async def update_chunk(chunk: List[BulkItem]) -> Set[UUID]:
+            # One row per ID, since UPDATE ... FROM applies only one of the rows matching an entity
+            merged: Dict[UUID, dict] = {}
+            for _, entity_id, payload in chunk:
+                merged.setdefault(entity_id, {}).update(
+                    (field, value) for field, value in payload.items()
+                    if value is not None and field in table.c and field not in ("id", "created_on")
+                )
+
+            unchanged = [entity_id for entity_id, payload in merged.items() if not payload]
+            # Nothing to write for them: only check that their entities exist, as `update` does
+            found = set(await self._select_by_ids(session, unchanged, [table.c.id])) if unchanged else set()
+
+            changed = {entity_id: payload for entity_id, payload in merged.items() if payload}
+            if not changed:
+                return found
+
+            fields = sorted({field for payload in changed.values() for field in payload})
+            changes = values(
+                column("id", table.c.id.type),
+                *[column(field, table.c[field].type) for field in fields],
+                name="changes"
+            ).data([
+                (entity_id, *[payload.get(field) for field in fields]) for entity_id, payload in changed.items()
+            ])
+
+            statement = update(table).where(
+                table.c.id == changes.c.id,
+                table.c.is_deleted == False,
+                table.c.is_active == True
+            ).values({
+                # A NULL in the VALUES row means "not provided", keeping the stored value
+                field: func.coalesce(cast(changes.c[field], table.c[field].type), table.c[field])
+                for field in fields
+            }).returning(table.c.id)
+
+            result = await session.exec(statement)
+            updated = set(result.scalars().all())
+            CacheInvalidation.track(session, table.name, updated)
+            await self._publish_events(session, "sample.updated", updated)
+            return updated | found
+
+        results = await self._bulk_execute(
+            session,
+            [(index, entity_id, payload) for index, (entity_id, payload) in enumerate(items)],
+            update_chunk,
+            BulkItemStatus.UPDATED
+        )
+        self.__logger__.info(f"Bulk updated {self._count_status(results, BulkItemStatus.UPDATED)}/{len(items)} sample entities")
+        return results
+
+    async def bulk_delete(
+        self,
+        session: AsyncSession,
+        entity_ids: Sequence[UUID],
+        hard_delete: bool = False
+    ) -> List[BulkItemResult]:
+        """
+        Delete many sample entities with one statement per chunk matching `id = ANY(:ids)`.
+
+        Args:
+            session: Database session
+            entity_ids: IDs of the entities to delete
+            hard_delete: If True, permanently delete from database; if False, soft delete
+
+        Returns:
+            One BulkItemResult per item, in input order
+        """
+        table = SampleEntity.__table__
+
+        async def delete_chunk(chunk: List[BulkItem]) -> Set[UUID]:
+            ids = bindparam("ids", [entity_id for _, entity_id, _ in chunk], type_=postgresql.ARRAY(table.c.id.type))
+            filters = [table.c.id == any_(ids), table.c.is_deleted == False, table.c.is_active == True]
+
+            if hard_delete:
+                statement = delete(table).where(*filters).returning(table.c.id)
+            else:
+                statement = update(table).where(*filters).values(is_deleted=True, is_active=False).returning(table.c.id)
+
+            result = await session.exec(statement)
+            deleted = set(result.scalars().all())
+            CacheInvalidation.track(session, table.name, deleted)
+            await self._publish_events(session, "sample.deleted", deleted)
+            return deleted
+
+        results = await self._bulk_execute(
+            session,
+            [(index, entity_id, None) for index, entity_id in enumerate(entity_ids)],
+            delete_chunk,
+            BulkItemStatus.DELETED
+        )
+        delete_type = "Hard" if hard_delete else "Soft"
+        self.__logger__.info(
+            f"{delete_type} deleted {self._count_status(results, BulkItemStatus.DELETED)}/{len(entity_ids)} sample entities"
+        )
+        return results
+
+    async def _bulk_execute(
+        self,
+        session: AsyncSession,
+        items: List[BulkItem],
+        execute_chunk: Callable[[List[BulkItem]], Awaitable[Set[UUID]]],
+        success_status: BulkItemStatus
+    ) -> List[BulkItemResult]:
+        """
+        Run `execute_chunk` over bounded chunks of `items`, each inside its own SAVEPOINT.
+
+        When a chunk fails, its items are retried one by one so that a single bad item
+        is reported as failed without failing the rest of its chunk.
+        """
+        chunk_size = settings.sample_bulk_chunk_size
+        results: Dict[int, BulkItemResult] = {}
+
+        async def run(chunk: List[BulkItem]) -> None:
+            async with session.begin_nested():
+                affected = await execute_chunk(chunk)
+            for index, entity_id, _ in chunk:
+                status = success_status if entity_id in affected else BulkItemStatus.NOT_FOUND
+                results[index] = BulkItemResult(index=index, id=entity_id, status=status)
+
+        for start in range(0, len(items), chunk_size):
+            chunk = items[start:start + chunk_size]
+            try:
+                await run(chunk)
+                continue
+            except DBAPIError as e:
+                if len(chunk) == 1:
+                    results[chunk[0][0]] = self._failed_result(chunk[0], e)
+                    continue
+                self.__logger__.warning(f"Bulk chunk of {len(chunk)} items failed, retrying items individually: {e.orig}")
+
+            for item in chunk:
+                try:
+                    await run([item])
+                except DBAPIError as e:
+                    results[item[0]] = self._failed_result(item, e)
+
+        return [results[index] for index in sorted(results)]
+
+    def _failed_result(self, item: BulkItem, error: DBAPIError) -> BulkItemResult:
+        index, entity_id, _ = item
+        diag = getattr(error.orig, "diag", None)
+        message = getattr(diag, "message_primary", None) or error.orig.__class__.__name__
+        self.__logger__.warning(f"Bulk item {index} ({entity_id}) failed: {message}")
+        return BulkItemResult(index=index, id=entity_id, status=BulkItemStatus.FAILED, error=message)
+
+    @staticmethod
+    def _count_status(results: List[BulkItemResult], status: BulkItemStatus) -> int:
+        return sum(1 for result in results if result.status == status)
+
+    async def copy_import(self, session: AsyncSession, rows: AsyncIterable[dict]) -> ImportResult:
+        """
+        Load sample entities with COPY FROM STDIN through a staging table.
+
+        Rows are copied into a temporary staging table as `rows` produces them, then
+        upserted into sample_table with a single INSERT ... SELECT ... ON CONFLICT (id).
+        Rows without an `id` get a new one; rows whose `id` already exists replace the
+        stored entity, is_deleted included (the original created_on is kept). A row's
+        created_on is only applied to a new entity. When the same `id` appears more than
+        once, the last row wins.
+
+        Args:
+            session: Database session; the upsert is committed with it
+            rows: Field values of the entities to load
+
+        Returns:
+            ImportResult with the number of rows copied and upserted
+        """
+        table = SampleEntity.__table__
+        column_names = SampleEntity.__mapper__.columns.keys()
+        json_columns = {name for name in column_names if isinstance(table.c[name].type, postgresql.JSONB)}
+
+        # Apply model defaults without building a SampleEntity per row, which costs more than the COPY itself
+        fields = {name: SampleEntity.model_fields[name] for name in column_names}
+        static_defaults = {
+            name: None if field.is_required() else field.default
+            for name, field in fields.items() if field.default_factory is None
+        }
+        default_factories = {name: field.default_factory for name, field in fields.items() if field.default_factory}
+
+        target = sql.Identifier(table.schema, table.name)
+        staging = sql.Identifier("sample_import_staging")
+        columns = sql.SQL(", ").join(sql.Identifier(name) for name in column_names)
+        updates = sql.SQL(", ").join(
+            sql.SQL("{0} = EXCLUDED.{0}").format(sql.Identifier(name))
+            for name in column_names if name not in ("id", "created_on")
+        )
+
+        started_at = time.perf_counter()
+        rows_copied = 0
+        try:
+            connection = await session.connection()
+            raw_connection = await connection.get_raw_connection()
+
+            async with raw_connection.driver_connection.cursor() as cursor:
+                await cursor.execute(sql.SQL(
+                    "CREATE TEMP TABLE {} (LIKE {} INCLUDING DEFAULTS) ON COMMIT DROP"
+                ).format(staging, target))
+
+                async with cursor.copy(sql.SQL("COPY {} ({}) FROM STDIN").format(staging, columns)) as copy:
+                    async for row in rows:
+                        values = {**static_defaults, **row}
+                        for name, factory in default_factories.items():
+                            if name not in row:
+                                values[name] = factory()
+                        await copy.write_row([
+                            Jsonb(values[name]) if name in json_columns and values[name] is not None else values[name]
+                            for name in column_names
+                        ])
+                        rows_copied += 1
+
+                # ctid follows COPY order in the fresh staging table, so DISTINCT ON keeps the last duplicate
+                await cursor.execute(sql.SQL(
+                    "INSERT INTO {target} ({columns}) "
+                    "SELECT DISTINCT ON (id) {columns} FROM {staging} ORDER BY id, ctid DESC "
+                    "ON CONFLICT (id) DO UPDATE SET {updates}"
+                ).format(target=target, columns=columns, staging=staging, updates=updates))
+                rows_upserted = cursor.rowcount
+
+                if settings.sample_outbox_enabled and rows_upserted:
+                    # Every staged ID was inserted or replaced; which of the two is not known
+                    queue_table = EventQueueMessage.__table__
+                    await cursor.execute(sql.SQL(
+                        "INSERT INTO {queue_table} (queue, key, payload) "
+                        "SELECT %(queue)s, id::text, jsonb_build_object('type', 'sample.upserted', 'id', id) "
+                        "FROM (SELECT DISTINCT id FROM {staging}) AS imported"
+                    ).format(queue_table=sql.Identifier(queue_table.schema, queue_table.name), staging=staging),
+                        {"queue": self.EVENTS_QUEUE})
+
+            if rows_upserted:
+                # Any stored entity may have been replaced
+                CacheInvalidation.track(session, table.name)
         except Exception as e:
-            self.__logger__.exception(f"Error searching sample entities: {e}")
+            self.__logger__.exception(f"Error importing sample entities after {rows_copied} rows: {e}")
             raise
 
+        result = ImportResult(
+            rows_copied=rows_copied,
+            rows_upserted=rows_upserted,
+            elapsed_seconds=time.perf_counter() - started_at
+        )
+        self.__logger__.info(
+            f"Imported {result.rows_upserted} sample entities from {result.rows_copied} rows "
+            f"in {result.elapsed_seconds:.2f}s ({result.rows_per_second:.0f} rows/s)"
+        )
+        return result
@@ -0,0 +1,30 @@
+import base64
+import binascii
+
+import orjson
+
+
+class CursorUtils:
+    @staticmethod
+    def encode(*values) -> str:
+        """Encode the keyset values of the last row of a page into an opaque cursor."""
+        payload = orjson.dumps(list(values))
+        return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+    @staticmethod
+    def decode(cursor: str, size: int) -> list:
+        """
+        Decode a cursor produced by `encode` back into its keyset values.
+
+        Raises:
+            ValueError: If the cursor is malformed or does not hold `size` values
+        """
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            values = orjson.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        except (binascii.Error, UnicodeEncodeError, orjson.JSONDecodeError) as e:
+            raise ValueError("Invalid cursor") from e
+
+        if not isinstance(values, list) or len(values) != size:
+            raise ValueError("Invalid cursor")
+        return values
@@ -0,0 +1,62 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Generic, Hashable, List, Optional, Sequence, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class DataLoader(Generic[K, V]):
+    """
+    Batches the `load` calls made in the same event loop tick into one `batch_load` call.
+
+    `batch_load` receives the distinct keys requested, in request order, and returns the
+    values it found by key; keys it does not return resolve to None. A failure of
+    `batch_load` is raised to every caller of the batch.
+    """
+
+    def __init__(self, batch_load: Callable[[List[K]], Awaitable[Dict[K, V]]]):
+        self.__batch_load__ = batch_load
+        self.__pending__: Dict[K, asyncio.Future] = {}
+        self.__tasks__ = set()
+
+    def load(self, key: K) -> Awaitable[Optional[V]]:
+        future = self.__pending__.get(key)
+        if future is not None:
+            return asyncio.shield(future)
+
+        loop = asyncio.get_running_loop()
+        if not self.__pending__:
+            # Runs once every task already scheduled in this tick had a chance to call load
+            loop.call_soon(self._dispatch)
+        future = loop.create_future()
+        self.__pending__[key] = future
+        # Shielded, so that a cancelled caller does not cancel the load of another caller of the same key
+        return asyncio.shield(future)
+
+    async def load_many(self, keys: Sequence[K]) -> List[Optional[V]]:
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def _dispatch(self):
+        batch, self.__pending__ = self.__pending__, {}
+        task = asyncio.ensure_future(self._run(batch))
+        self.__tasks__.add(task)
+        task.add_done_callback(self.__tasks__.discard)
+
+    async def _run(self, batch: Dict[K, asyncio.Future]):
+        try:
+            values = await self.__batch_load__(list(batch))
+        except BaseException as e:
+            for future in batch.values():
+                if future.done():
+                    continue
+                if isinstance(e, Exception):
+                    future.set_exception(e)
+                else:
+                    future.cancel()
+            if not isinstance(e, Exception):
+                raise
+            return
+
+        for key, future in batch.items():
+            if not future.done():
+                future.set_result(values.get(key))
@@ -0,0 +1,119 @@
+import hashlib
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from .settings import COMPRESSION_LEVEL_RANGES
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+class EtagUtils:
+    """
+    Strong validators for entities derived from `id` and `modified_on`.
+
+    An entity ETag is `"<id>.<modified_on in microseconds since the epoch>"`, so an
+    `If-Match` header can be turned back into the `modified_on` a conditional UPDATE
+    must find, without reading the entity first. Naive datetimes are taken as UTC.
+
+    A compressed response carries its ETag suffixed with the content coding, e.g.
+    `"<tag>-gzip"`, so that each coding of a representation has a validator of its own;
+    the suffix is ignored when request headers are compared with the ETag of the entity.
+    """
+
+    @staticmethod
+    def _utc(value: datetime) -> datetime:
+        return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+    @staticmethod
+    def _micros(value: datetime) -> int:
+        delta = EtagUtils._utc(value) - _EPOCH
+        return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+    @staticmethod
+    def entity_etag(entity_id: UUID, modified_on: datetime) -> str:
+        return f'"{entity_id.hex}.{EtagUtils._micros(modified_on)}"'
+
+    @staticmethod
+    def page_etag(versions: Iterable[Tuple[UUID, datetime]], *extra) -> str:
+        """ETag of a list page from the (id, modified_on) of its items and anything else in the body."""
+        digest = hashlib.blake2b(digest_size=16)
+        for entity_id, modified_on in versions:
+            digest.update(entity_id.bytes)
+            digest.update(EtagUtils._micros(modified_on).to_bytes(8, "big", signed=True))
+        digest.update(repr(extra).encode())
+        return f'"{digest.hexdigest()}"'
+
+    @staticmethod
+    def last_modified(modified_on: datetime) -> str:
+        return format_datetime(EtagUtils._utc(modified_on).replace(microsecond=0), usegmt=True)
+
+    @staticmethod
+    def with_coding(etag: str, encoding: str) -> str:
+        """ETag of the representation `etag` identifies, compressed with `encoding`."""
+        if not etag.endswith('"'):
+            return etag
+        return f'{etag[:-1]}-{encoding}"'
+
+    @staticmethod
+    def without_coding(etag: str) -> str:
+        """Undo `with_coding`."""
+        for encoding in COMPRESSION_LEVEL_RANGES:
+            suffix = f'-{encoding}"'
+            if etag.endswith(suffix):
+                return etag[:-len(suffix)] + '"'
+        return etag
+
+    @staticmethod
+    def _tags(header: str) -> List[str]:
+        return [EtagUtils.without_coding(tag.strip()) for tag in header.split(",") if tag.strip()]
+
+    @staticmethod
+    def is_not_modified(
+        etag: str,
+        modified_on: Optional[datetime],
+        if_none_match: Optional[str],
+        if_modified_since: Optional[str]
+    ) -> bool:
+        """
+        Evaluate `If-None-Match` (weak comparison), or `If-Modified-Since` when there is
+        no `If-None-Match`, against the current representation.
+        """
+        if if_none_match is not None:
+            tags = EtagUtils._tags(if_none_match)
+            return "*" in tags or etag in [tag.removeprefix("W/") for tag in tags]
+
+        if if_modified_since is None or modified_on is None:
+            return False
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        # HTTP dates have a one second resolution
+        return EtagUtils._utc(modified_on).replace(microsecond=0) <= since
+
+    @staticmethod
+    def expected_modified_on(if_match: str, entity_id: UUID) -> Optional[datetime]:
+        """
+        Decode the `modified_on` that an `If-Match` header expects for `entity_id`.
+
+        Returns:
+            The expected modified_on, or None for `If-Match: *` (any current version)
+
+        Raises:
+            ValueError: If no strong ETag of `entity_id` is listed, so the header can never match
+        """
+        tags = EtagUtils._tags(if_match)
+        if "*" in tags:
+            return None
+
+        for tag in tags:
+            if len(tag) < 2 or tag[0] != '"' or tag[-1] != '"':
+                continue
+            tag_id, _, micros = tag[1:-1].partition(".")
+            if tag_id == entity_id.hex and micros.isdigit():
+                return _EPOCH + timedelta(microseconds=int(micros))
+        raise ValueError("If-Match does not list a current ETag of this entity")
@@ -1,21 +1,98 @@
+from typing import Dict
+
 from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 from .env_utils import EnvUtils
 
+# Roles a process can run: HTTP only, event pollers and jobs only, or both
+APP_ROLES = ("web", "worker", "all")
+# Levels accepted per content coding
+COMPRESSION_LEVEL_RANGES = {"gzip": (1, 9), "br": (0, 11), "zstd": (1, 22)}
+
 
 class Settings(BaseSettings):
     host: str = Field(alias="HOST")
     port: int = Field(alias="PORT", ge=1, le=65535)
     workers: int = Field(alias="WORKERS", ge=1)
+    app_role: str = Field(alias="APP_ROLE", default="all")
+    # Processes running the event pollers and jobs with APP_ROLE=worker
+    worker_processes: int = Field(alias="WORKER_PROCESSES", default=1, ge=1)
 
     database_url: str = Field(alias="DATABASE_URL")
+    # Comma-separated read replica URLs; read-only sessions are balanced across them
+    database_read_urls: str = Field(alias="DATABASE_READ_URLS", default="")
+    # Seconds an unreachable replica is skipped before it is tried again
+    database_replica_retry_in_seconds: int = Field(alias="DATABASE_REPLICA_RETRY_IN_SECONDS", default=30, ge=1)
+    # Send reads to the primary after a write has been committed in the same request
+    database_read_your_writes: bool = Field(alias="DATABASE_READ_YOUR_WRITES", default=True)
     database_schema: str = Field(alias="DATABASE_SCHEMA", default="public")
+
+    # Connection pool, per worker process and per database endpoint
+    database_pool_size: int = Field(alias="DATABASE_POOL_SIZE", default=10, ge=1)
+    database_max_overflow: int = Field(alias="DATABASE_MAX_OVERFLOW", default=20, ge=0)
+    database_pool_timeout_in_seconds: int = Field(alias="DATABASE_POOL_TIMEOUT_IN_SECONDS", default=30, ge=1)
+    database_pool_recycle_in_seconds: int = Field(alias="DATABASE_POOL_RECYCLE_IN_SECONDS", default=1800)
+    # Total connections the processes of every role may open to one database endpoint; caps the
+    # per-process pool, 0 disables
+    database_connection_budget: int = Field(alias="DATABASE_CONNECTION_BUDGET", default=0, ge=0)
     job_store_database_schema: str = Field(alias="JOB_STORE_DATABASE_SCHEMA", default="public_job_store")
 
     # CORS Configuration - comma-separated list of allowed origins, or "*" for all
     cors_allowed_origins: str = Field(alias="CORS_ALLOWED_ORIGINS", default="*")
 
+    # Seconds a `count_mode=cached` total is reused for the same list filter
+    sample_count_cache_ttl_in_seconds: int = Field(alias="SAMPLE_COUNT_CACHE_TTL_IN_SECONDS", default=30, ge=1)
+
+    # Read-through cache of GET /samples/{id}, per worker; invalidated across workers over LISTEN/NOTIFY
+    sample_entity_cache_ttl_in_seconds: int = Field(alias="SAMPLE_ENTITY_CACHE_TTL_IN_SECONDS", default=60, ge=0)
+    sample_entity_cache_max_entries: int = Field(alias="SAMPLE_ENTITY_CACHE_MAX_ENTRIES", default=10000, ge=1)
+    sample_entity_cache_max_bytes: int = Field(alias="SAMPLE_ENTITY_CACHE_MAX_BYTES", default=64 * 1024 * 1024, ge=1)
+
+    # Cache of serialised GET list/search responses, 0 TTL disables it; backend is `memory` (per worker) or `postgres` (shared)
+    response_cache_ttl_in_seconds: int = Field(alias="RESPONSE_CACHE_TTL_IN_SECONDS", default=5, ge=0)
+    response_cache_backend: str = Field(alias="RESPONSE_CACHE_BACKEND", default="memory")
+    response_cache_max_entries: int = Field(alias="RESPONSE_CACHE_MAX_ENTRIES", default=1000, ge=1)
+    response_cache_max_bytes: int = Field(alias="RESPONSE_CACHE_MAX_BYTES", default=32 * 1024 * 1024, ge=1)
+    # Larger responses are passed through without being cached
+    response_cache_max_entry_bytes: int = Field(alias="RESPONSE_CACHE_MAX_ENTRY_BYTES", default=1024 * 1024, ge=1)
+
+    # Response compression - content codings offered, most preferred first, empty disables it; br and zstd are
+    # opt-in, as they need the optional brotli and zstandard packages
+    compression_encodings: str = Field(alias="COMPRESSION_ENCODINGS", default="gzip")
+    # Smaller bodies are sent uncompressed
+    compression_minimum_size: int = Field(alias="COMPRESSION_MINIMUM_SIZE", default=1024, ge=0)
+    # JSON object of compressed content types to levels per coding; a coding left out uses its default level
+    compression_levels: Dict[str, Dict[str, int]] = Field(
+        alias="COMPRESSION_LEVELS",
+        default={
+            "application/json": {"gzip": 4, "br": 4, "zstd": 3},
+            # Exports stream the whole table, so they favour throughput over ratio
+            "application/x-ndjson": {"gzip": 1, "br": 1, "zstd": 1},
+            "text/csv": {"gzip": 1, "br": 1, "zstd": 1},
+            "text/plain": {},
+            "text/html": {},
+        }
+    )
+
+    # Serialise sample read responses from column rows straight to orjson, without response model validation
+    sample_fast_serialization: bool = Field(alias="SAMPLE_FAST_SERIALIZATION", default=False)
+
+    # IDs accepted by GET /samples/?ids=...
+    sample_batch_get_max_ids: int = Field(alias="SAMPLE_BATCH_GET_MAX_IDS", default=1000, ge=1)
+
+    # Bulk endpoints - items per request, and rows per INSERT/UPDATE/DELETE statement
+    sample_bulk_max_items: int = Field(alias="SAMPLE_BULK_MAX_ITEMS", default=50000, ge=1)
+    sample_bulk_chunk_size: int = Field(alias="SAMPLE_BULK_CHUNK_SIZE", default=1000, ge=1, le=5000)
+
+    # Export endpoint - rows fetched from the server-side cursor per round trip
+    sample_export_batch_size: int = Field(alias="SAMPLE_EXPORT_BATCH_SIZE", default=1000, ge=1)
+
+    # Import endpoint - rejected rows listed in the response (all of them are counted)
+    sample_import_max_reported_rejections: int = Field(
+        alias="SAMPLE_IMPORT_MAX_REPORTED_REJECTIONS", default=100, ge=0
+    )
+
     sample_event_polling_backoff_initial_in_seconds: int = Field(
         alias="SAMPLE_EVENT_POLLING_BACKOFF_INITIAL_IN_SECONDS",
         ge=1
@@ -24,6 +101,55 @@ class Settings(BaseSettings):
         alias="SAMPLE_EVENT_POLLING_BACKOFF_MAX_IN_SECONDS",
         ge=1
     )
+    # Messages processed at once by the event poller
+    sample_event_polling_concurrency: int = Field(alias="SAMPLE_EVENT_POLLING_CONCURRENCY", default=10, ge=1)
+    # Message field whose value orders processing: messages with the same value run one after the other; empty disables it
+    sample_event_polling_partition_key: str = Field(alias="SAMPLE_EVENT_POLLING_PARTITION_KEY", default="")
+    # Seconds the messages in flight are given to finish when the poller stops, before they are cancelled
+    sample_event_polling_drain_timeout_in_seconds: int = Field(
+        alias="SAMPLE_EVENT_POLLING_DRAIN_TIMEOUT_IN_SECONDS", default=30, ge=0
+    )
+    # Received batches buffered ahead of processing; the receiver waits while the buffer is full
+    sample_event_polling_prefetch_batches: int = Field(alias="SAMPLE_EVENT_POLLING_PREFETCH_BATCHES", default=2, ge=1)
+    # Concurrent receive calls; more than one helps when a receive round trip is slow
+    sample_event_polling_receivers: int = Field(alias="SAMPLE_EVENT_POLLING_RECEIVERS", default=1, ge=1)
+    # Wait after an empty receive, doubled on every further empty receive up to the max
+    sample_event_polling_idle_interval_min_in_seconds: float = Field(
+        alias="SAMPLE_EVENT_POLLING_IDLE_INTERVAL_MIN_IN_SECONDS", default=0.5, gt=0
+    )
+    sample_event_polling_idle_interval_max_in_seconds: float = Field(
+        alias="SAMPLE_EVENT_POLLING_IDLE_INTERVAL_MAX_IN_SECONDS", default=5, gt=0
+    )
+    # Where the sample event poller receives from: `none` (override __receive__) or `postgres` (the event_queue table)
+    sample_event_transport: str = Field(alias="SAMPLE_EVENT_TRANSPORT", default="none")
+    # Publish an event to the sample_events queue, in the same transaction, for every sample entity written
+    sample_outbox_enabled: bool = Field(alias="SAMPLE_OUTBOX_ENABLED", default=False)
+    # Skip messages whose ID was already processed: `none`, `lru` (exact) or `bloom` (rotating Bloom filter, in constant memory)
+    sample_event_dedup: str = Field(alias="SAMPLE_EVENT_DEDUP", default="none")
+    # Message field holding the ID; messages without it are always processed
+    sample_event_dedup_id_field: str = Field(alias="SAMPLE_EVENT_DEDUP_ID_FIELD", default="id")
+    # IDs remembered per poller: the latest this many with `lru`, between this many and twice as many with `bloom`
+    sample_event_dedup_max_ids: int = Field(alias="SAMPLE_EVENT_DEDUP_MAX_IDS", default=100000, ge=1)
+    # Share of new messages the Bloom filter takes for duplicates; they are skipped unless the durable table disagrees
+    sample_event_dedup_false_positive_rate: float = Field(
+        alias="SAMPLE_EVENT_DEDUP_FALSE_POSITIVE_RATE", default=0.001, gt=0, lt=1
+    )
+    # Also record processed IDs in the processed_event table, to skip messages processed by another process
+    sample_event_dedup_durable: bool = Field(alias="SAMPLE_EVENT_DEDUP_DURABLE", default=False)
+    # Seconds an ID is kept in processed_event; keep it above the time a message can take to be redelivered
+    sample_event_dedup_retention_in_seconds: int = Field(
+        alias="SAMPLE_EVENT_DEDUP_RETENTION_IN_SECONDS", default=86400, ge=1
+    )
+
+    # Built-in Postgres event queue - messages leased per receive, and seconds a lease lasts before redelivery
+    event_queue_batch_size: int = Field(alias="EVENT_QUEUE_BATCH_SIZE", default=10, ge=1)
+    event_queue_visibility_timeout_in_seconds: int = Field(
+        alias="EVENT_QUEUE_VISIBILITY_TIMEOUT_IN_SECONDS", default=30, ge=1
+    )
+    # Deliveries of a message before it is moved to event_dead_letter
+    event_queue_max_attempts: int = Field(alias="EVENT_QUEUE_MAX_ATTEMPTS", default=5, ge=1)
+    # Wait before a failed message is delivered again, doubled on every further attempt
+    event_queue_retry_delay_in_seconds: int = Field(alias="EVENT_QUEUE_RETRY_DELAY_IN_SECONDS", default=5, ge=0)
     sample_job_frequency: str = Field(alias="SAMPLE_JOB_FREQUENCY")
 
     @field_validator('database_url')
@@ -35,6 +161,64 @@ class Settings(BaseSettings):
             raise ValueError('DATABASE_URL must be a valid PostgreSQL connection string')
         return v
 
+    @field_validator('database_read_urls')
+    @classmethod
+    def validate_database_read_urls(cls, v: str) -> str:
+        for url in filter(None, (url.strip() for url in v.split(','))):
+            if not url.startswith(('postgresql://', 'postgresql+psycopg://', 'postgresql+asyncpg://')):
+                raise ValueError('DATABASE_READ_URLS must be PostgreSQL connection strings')
+        return v
+
+    @field_validator('app_role')
+    @classmethod
+    def validate_app_role(cls, v: str) -> str:
+        if v not in APP_ROLES:
+            raise ValueError("APP_ROLE must be 'web', 'worker' or 'all'")
+        return v
+
+    @field_validator('sample_event_transport')
+    @classmethod
+    def validate_sample_event_transport(cls, v: str) -> str:
+        if v not in ('none', 'postgres'):
+            raise ValueError("SAMPLE_EVENT_TRANSPORT must be 'none' or 'postgres'")
+        return v
+
+    @field_validator('sample_event_dedup')
+    @classmethod
+    def validate_sample_event_dedup(cls, v: str) -> str:
+        if v not in ('none', 'lru', 'bloom'):
+            raise ValueError("SAMPLE_EVENT_DEDUP must be 'none', 'lru' or 'bloom'")
+        return v
+
+    @field_validator('response_cache_backend')
+    @classmethod
+    def validate_response_cache_backend(cls, v: str) -> str:
+        if v not in ('memory', 'postgres'):
+            raise ValueError("RESPONSE_CACHE_BACKEND must be 'memory' or 'postgres'")
+        return v
+
+    @field_validator('compression_encodings')
+    @classmethod
+    def validate_compression_encodings(cls, v: str) -> str:
+        for encoding in filter(None, (encoding.strip() for encoding in v.split(','))):
+            if encoding not in COMPRESSION_LEVEL_RANGES:
+                raise ValueError("COMPRESSION_ENCODINGS must list 'gzip', 'br' or 'zstd'")
+        return v
+
+    @field_validator('compression_levels')
+    @classmethod
+    def validate_compression_levels(cls, v: Dict[str, Dict[str, int]]) -> Dict[str, Dict[str, int]]:
+        levels = {}
+        for content_type, encoding_levels in v.items():
+            for encoding, level in encoding_levels.items():
+                if encoding not in COMPRESSION_LEVEL_RANGES:
+                    raise ValueError(f"COMPRESSION_LEVELS has an unknown encoding '{encoding}'")
+                lowest, highest = COMPRESSION_LEVEL_RANGES[encoding]
+                if not lowest <= level <= highest:
+                    raise ValueError(f"COMPRESSION_LEVELS {encoding} levels must be between {lowest} and {highest}")
+            levels[content_type.strip().lower()] = encoding_levels
+        return levels
+
     @field_validator('sample_event_polling_backoff_max_in_seconds')
     @classmethod
     def validate_backoff(cls, v: int, info) -> int:
@@ -43,6 +227,22 @@ class Settings(BaseSettings):
             raise ValueError('Max backoff must be greater than or equal to initial backoff')
         return v
 
+    @field_validator('sample_event_polling_idle_interval_max_in_seconds')
+    @classmethod
+    def validate_idle_interval(cls, v: float, info) -> float:
+        minimum = info.data.get('sample_event_polling_idle_interval_min_in_seconds')
+        if minimum and v < minimum:
+            raise ValueError('Max idle interval must be greater than or equal to min idle interval')
+        return v
+
+    @property
+    def process_count(self) -> int:
+        """
+        Processes connecting to the database across roles: the uvicorn workers, plus the
+        worker processes when the roles run apart (APP_ROLE=web or worker).
+        """
+        return self.workers if self.app_role == "all" else self.workers + self.worker_processes
+
     model_config = SettingsConfigDict(
         env_file=EnvUtils.get_env_file_path(),
         extra="allow"
@@ -0,0 +1,158 @@
+import asyncio
+import logging
+import multiprocessing
+import signal
+import time
+from multiprocessing.connection import wait
+from typing import Dict, Optional
+
+from src import settings
+from .db.cache_invalidation import CacheInvalidation
+from .db.context import DbContext
+from .events import register_event_pollers
+from .jobs import scheduler
+
+# Seconds a worker process must have run before it is restarted, so that one failing at startup is not respawned in a loop
+RESTART_DELAY_IN_SECONDS = 5
+
+
+class Worker:
+    """
+    Runs the event pollers and the scheduled jobs.
+
+    With APP_ROLE=all they are started by the application lifespan, next to HTTP. With
+    APP_ROLE=worker, `run_pool` runs them in WORKER_PROCESSES processes of their own and the
+    web processes only serve HTTP. Every worker process runs the event pollers; only the first
+    one runs the scheduler, since each scheduler sharing the job store would run every job.
+    """
+
+    __poller_task__: Optional[asyncio.Task] = None
+    __logger__ = logging.getLogger(__name__)
+
+    @staticmethod
+    async def start(run_scheduler: bool = True):
+        """Start the event pollers and, with `run_scheduler`, the scheduler."""
+        Worker.__poller_task__ = asyncio.create_task(register_event_pollers())
+
+        if run_scheduler and not scheduler.running:
+            scheduler.start()
+            Worker.__logger__.info("Scheduler started successfully")
+
+    @staticmethod
+    async def stop():
+        """Stop the event pollers, letting the messages in flight finish, then the scheduler."""
+        poller_task = Worker.__poller_task__
+        Worker.__poller_task__ = None
+        if poller_task and not poller_task.done():
+            poller_task.cancel()
+            try:
+                await poller_task
+            except asyncio.CancelledError:
+                Worker.__logger__.info("Event poller cancelled successfully")
+
+        if scheduler.running:
+            scheduler.shutdown(wait=True)
+            Worker.__logger__.info("Scheduler shutdown complete")
+
+    @staticmethod
+    async def run(index: int = 0):
+        """Run one worker process until SIGINT or SIGTERM."""
+        stopped = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stopped.set)
+
+        Worker.__logger__.info(f"Worker process {index} starting")
+        # Keeps the per-process caches consistent for processors reading through the services
+        invalidation_task = asyncio.create_task(CacheInvalidation.listen())
+        try:
+            await Worker.start(run_scheduler=index == 0)
+            Worker.__logger__.info(f"Worker process {index} started")
+            await stopped.wait()
+        finally:
+            Worker.__logger__.info(f"Worker process {index} shutting down...")
+            await Worker.stop()
+
+            invalidation_task.cancel()
+            try:
+                await invalidation_task
+            except asyncio.CancelledError:
+                pass
+
+            await DbContext.dispose_engine()
+            Worker.__logger__.info(f"Worker process {index} stopped")
+
+    @staticmethod
+    def _run_process(index: int):
+        asyncio.run(Worker.run(index))
+
+    @staticmethod
+    def _wait_for_children(children: Dict[int, multiprocessing.Process], started_at: Dict[int, float]):
+        """
+        Wait until a live child exits, or the earliest restart of an exited one is due.
+
+        An exited child's sentinel stays ready, so waiting on it would return at once until
+        the child is restarted.
+        """
+        timeout = 1.0
+        for index, process in children.items():
+            if not process.is_alive():
+                timeout = min(timeout, max(0.0, started_at[index] + RESTART_DELAY_IN_SECONDS - time.monotonic()))
+        wait([process.sentinel for process in children.values() if process.is_alive()], timeout=timeout)
+
+    @staticmethod
+    def run_pool():
+        """
+        Run WORKER_PROCESSES worker processes until SIGINT or SIGTERM.
+
+        A single process runs in the current one. Otherwise the processes are supervised:
+        one that exits is restarted, and on SIGINT or SIGTERM every process is stopped
+        gracefully before returning.
+        """
+        processes = settings.worker_processes
+        if processes == 1:
+            Worker._run_process(0)
+            return
+
+        context = multiprocessing.get_context("spawn")
+        stopping = False
+
+        def stop(signum, frame):
+            nonlocal stopping
+            stopping = True
+
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGTERM, stop)
+
+        children: Dict[int, multiprocessing.Process] = {}
+        started_at: Dict[int, float] = {}
+
+        def spawn(index: int):
+            process = context.Process(target=Worker._run_process, args=(index,), name=f"worker-{index}")
+            process.start()
+            children[index] = process
+            started_at[index] = time.monotonic()
+
+        Worker.__logger__.info(f"Starting {processes} worker processes")
+        for index in range(processes):
+            spawn(index)
+
+        while not stopping:
+            Worker._wait_for_children(children, started_at)
+            for index, process in list(children.items()):
+                if stopping or process.is_alive():
+                    continue
+                if time.monotonic() - started_at[index] < RESTART_DELAY_IN_SECONDS:
+                    continue
+                Worker.__logger__.warning(
+                    f"Worker process {index} exited with code {process.exitcode}, restarting"
+                )
+                spawn(index)
+
+        Worker.__logger__.info("Stopping worker processes...")
+        for process in children.values():
+            if process.is_alive():
+                process.terminate()
+        for process in children.values():
+            process.join()
+        Worker.__logger__.info("Worker processes stopped")
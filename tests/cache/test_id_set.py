@@ -0,0 +1,76 @@
+import pytest
+
+from src.cache import IdSet, LruIdSet, RotatingBloomFilter
+
+
+def ids(start: int, stop: int) -> list:
+    return [f"message-{n}" for n in range(start, stop)]
+
+
+def test_id_set_is_abstract():
+    with pytest.raises(TypeError):
+        IdSet()
+
+
+def test_lru_set_forgets_the_least_recently_added_ids():
+    seen = LruIdSet(max_ids=3)
+    for message_id in ids(0, 3):
+        seen.add(message_id)
+
+    # Adding an ID again makes it the most recent
+    seen.add("message-0")
+    seen.add("message-3")
+
+    assert [message_id in seen for message_id in ids(0, 4)] == [True, False, True, True]
+    assert len(seen) == 3
+    assert seen.exact
+
+
+def test_lru_set_memory_follows_its_ids():
+    seen = LruIdSet(max_ids=100)
+    empty = seen.nbytes
+    for message_id in ids(0, 100):
+        seen.add(message_id)
+    full = seen.nbytes
+    for message_id in ids(100, 200):
+        seen.add(message_id)
+
+    assert empty < full
+    # Evicted IDs are released; only the dict's own table may have grown
+    assert seen.nbytes < 2 * full
+
+
+def test_bloom_filter_remembers_at_least_the_latest_max_ids():
+    seen = RotatingBloomFilter(max_ids=1000, false_positive_rate=0.01)
+    added = ids(0, 5000)
+    for message_id in added:
+        seen.add(message_id)
+
+    assert all(message_id in seen for message_id in added[-1000:])
+    assert 1000 <= len(seen) <= 2000
+    assert not seen.exact
+
+
+@pytest.mark.parametrize("rate", [0.01, 0.001])
+def test_bloom_filter_false_positive_rate(rate):
+    seen = RotatingBloomFilter(max_ids=10000, false_positive_rate=rate)
+    for message_id in ids(0, 20000):
+        seen.add(message_id)
+
+    false_positives = sum(f"other-{n}" in seen for n in range(20000))
+
+    assert false_positives / 20000 <= 2 * rate
+
+
+def test_bloom_filter_memory_is_constant():
+    seen = RotatingBloomFilter(max_ids=1000, false_positive_rate=0.01)
+    empty = seen.nbytes
+    for message_id in ids(0, 5000):
+        seen.add(message_id)
+
+    lru = LruIdSet(max_ids=1000)
+    for message_id in ids(0, 5000):
+        lru.add(message_id)
+
+    assert seen.nbytes == empty
+    assert seen.nbytes < lru.nbytes / 5
@@ -0,0 +1,88 @@
+import asyncio
+import uuid
+
+import pytest
+
+from src.cache import SingleFlight
+from src.metrics import MetricsRegistry
+
+
+@pytest.fixture
+def flight() -> SingleFlight:
+    return SingleFlight(f"test_{uuid.uuid4().hex}")
+
+
+def slow_call(calls: list, result, delay: float = 0.02):
+    async def call():
+        calls.append(result)
+        await asyncio.sleep(delay)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    return call
+
+
+async def test_concurrent_calls_share_one_execution(flight):
+    calls = []
+
+    results = await asyncio.gather(*(flight.do("key", slow_call(calls, "value")) for _ in range(5)))
+
+    assert results == ["value"] * 5
+    assert calls == ["value"]
+    assert len(flight) == 0
+
+
+async def test_different_keys_run_separately(flight):
+    calls = []
+
+    results = await asyncio.gather(flight.do("a", slow_call(calls, 1)), flight.do("b", slow_call(calls, 2)))
+
+    assert results == [1, 2]
+    assert sorted(calls) == [1, 2]
+
+
+async def test_sequential_calls_run_again(flight):
+    calls = []
+
+    await flight.do("key", slow_call(calls, 1, delay=0))
+    await flight.do("key", slow_call(calls, 1, delay=0))
+
+    assert calls == [1, 1]
+
+
+async def test_exception_is_shared(flight):
+    calls = []
+    error = ValueError("failed")
+
+    results = await asyncio.gather(
+        *(flight.do("key", slow_call(calls, error)) for _ in range(3)), return_exceptions=True
+    )
+
+    assert results == [error] * 3
+    assert len(calls) == 1
+
+
+async def test_cancelled_caller_does_not_cancel_the_others(flight):
+    calls = []
+    first = asyncio.create_task(flight.do("key", slow_call(calls, "value", delay=0.05)))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(flight.do("key", slow_call(calls, "other")))
+    await asyncio.sleep(0)
+
+    first.cancel()
+
+    assert await second == "value"
+    assert calls == ["value"]
+
+
+async def test_coalescing_ratio_is_published():
+    name = f"test_{uuid.uuid4().hex}"
+    flight = SingleFlight(name)
+
+    await asyncio.gather(*(flight.do("key", slow_call([], None)) for _ in range(4)))
+
+    snapshot = MetricsRegistry.snapshot()
+    assert snapshot["counters"][f'single_flight_requests_total{{flight="{name}"}}'] == 4
+    assert snapshot["counters"][f'single_flight_executions_total{{flight="{name}"}}'] == 1
+    assert snapshot["gauges"][f'single_flight_coalescing_ratio{{flight="{name}"}}'] == 0.75
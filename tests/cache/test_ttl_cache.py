@@ -0,0 +1,84 @@
+import pytest
+
+from src.cache import TtlCache
+from src.metrics import MetricsRegistry
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controls the time seen by TtlCache; advance it by adding to `clock[0]`."""
+    now = [1000.0]
+    monkeypatch.setattr("src.cache.ttl_cache.time.monotonic", lambda: now[0])
+    return now
+
+
+def test_entries_expire(clock):
+    cache = TtlCache(max_entries=10, ttl_in_seconds=5)
+    cache.set("a", 1)
+
+    clock[0] += 4.9
+    assert cache.get("a") == 1
+    clock[0] += 0.1
+    assert cache.get("a", "expired") == "expired"
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TtlCache(max_entries=2, ttl_in_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+
+
+def test_entries_are_bounded_by_size():
+    cache = TtlCache(max_entries=10, ttl_in_seconds=60, max_bytes=10, sizeof=len)
+    cache.set("a", b"1234")
+    cache.set("b", b"1234")
+    cache.set("c", b"1234")
+    cache.set("too_large", b"12345678901")
+
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (None, b"1234", b"1234")
+    assert cache.get("too_large") is None
+
+
+def test_invalidation(clock):
+    cache = TtlCache(max_entries=10, ttl_in_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    cache.invalidate("a")
+    assert (cache.get("a"), cache.get("b")) == (None, 2)
+
+    cache.invalidate()
+    assert len(cache) == 0
+
+
+def test_write_loaded_before_an_invalidation_is_dropped():
+    cache = TtlCache(max_entries=10, ttl_in_seconds=60)
+    generation = cache.generation
+
+    cache.invalidate("a")
+    cache.set("a", "stale", generation)
+    assert cache.get("a") is None
+
+    cache.set("a", "fresh", cache.generation)
+    assert cache.get("a") == "fresh"
+
+
+def test_named_cache_publishes_metrics():
+    cache = TtlCache(max_entries=1, ttl_in_seconds=60, sizeof=len, max_bytes=100, name="test_ttl_cache")
+    cache.set("a", b"12")
+    cache.get("a")
+    cache.get("b")
+    cache.set("b", b"345")
+
+    snapshot = MetricsRegistry.snapshot()
+    labels = '{cache="test_ttl_cache"}'
+    assert snapshot["counters"][f"cache_hits_total{labels}"] == 1
+    assert snapshot["counters"][f"cache_misses_total{labels}"] == 1
+    assert snapshot["counters"][f"cache_evictions_total{labels}"] == 1
+    assert snapshot["gauges"][f"cache_entries{labels}"] == 1
+    assert snapshot["gauges"][f"cache_bytes{labels}"] == 3
@@ -0,0 +1,79 @@
+import uuid
+from typing import Callable
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, delete, text
+from sqlalchemy.exc import OperationalError
+
+from src import settings
+from src.app import application
+from src.db.context import DbContext
+from src.entities import SampleEntity
+
+
+@pytest.fixture(scope="session")
+def sync_engine():
+    """Engine for test setup and cleanup; tests using the database are skipped when it is unreachable."""
+    engine = create_engine(settings.database_url)
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    except OperationalError:
+        engine.dispose()
+        pytest.skip("Database is not reachable, set DATABASE_URL to a migrated database")
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def marker(sync_engine) -> str:
+    """
+    Unique value identifying the sample entities created by one test.
+
+    Entities built with `sample_data` carry it in string_field and in required_jsonb, so that
+    a test can list only its own entities; they are permanently deleted after the test.
+    """
+    value = f"test-{uuid.uuid4().hex}"
+    yield value
+    table = SampleEntity.__table__
+    with sync_engine.begin() as connection:
+        connection.execute(delete(table).where(table.c.string_field.startswith(value)))
+
+
+@pytest.fixture
+def sample_data(marker) -> Callable[..., dict]:
+    """Build the JSON body of a new sample entity tagged with the test's marker."""
+    counter = iter(range(1_000_000))
+
+    def build(**fields) -> dict:
+        number = next(counter)
+        data = {
+            "required_uuid": str(uuid.uuid4()),
+            "string_field": f"{marker}-{number}",
+            "required_jsonb": {"marker": marker, "number": number},
+        }
+        data.update(fields)
+        return data
+
+    return build
+
+
+@pytest.fixture
+def client(sync_engine, monkeypatch):
+    """The application serving HTTP only; event pollers and jobs are not started."""
+    monkeypatch.setattr(settings, "app_role", "web")
+    with TestClient(application) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+async def db(sync_engine):
+    """
+    For async tests using DbContext directly.
+
+    Pooled connections belong to the event loop that opened them, and each test runs in its
+    own loop, so the engine is disposed after the test.
+    """
+    yield
+    await DbContext.dispose_engine()
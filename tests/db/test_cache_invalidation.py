@@ -0,0 +1,185 @@
+import asyncio
+import uuid
+
+import orjson
+import psycopg
+import pytest
+from sqlalchemy import text
+
+from src.db.cache_invalidation import CacheInvalidation
+from src.db.context import DbContext
+
+BASE_URL = "/api/v1/samples/"
+
+
+class FakeSession:
+    """Stands in for a Session: `track` only uses `info`, `publish` only `connection().execute`."""
+
+    def __init__(self):
+        self.info = {}
+        self.executed = []
+
+    def connection(self):
+        return self
+
+    def execute(self, statement, parameters):
+        self.executed.append(orjson.loads(parameters["payload"]))
+
+
+@pytest.fixture
+def topic(monkeypatch) -> str:
+    """A topic of its own, with the handlers of the application set aside for the test."""
+    monkeypatch.setattr(CacheInvalidation, "__handlers__", {})
+    return f"test_topic_{uuid.uuid4().hex}"
+
+
+def recorder(calls: list):
+    return lambda keys: calls.append(keys)
+
+
+def test_track_records_keys_per_topic(topic):
+    CacheInvalidation.subscribe(topic, recorder([]))
+    session = FakeSession()
+
+    CacheInvalidation.track(session, topic, [1, 2])
+    CacheInvalidation.track(session, topic, [2, 3])
+    CacheInvalidation.track(session, "unsubscribed", [4])
+
+    assert CacheInvalidation.pending(session) == {topic: {"1", "2", "3"}}
+
+
+def test_track_without_keys_invalidates_the_whole_topic(topic):
+    CacheInvalidation.subscribe(topic, recorder([]))
+    session = FakeSession()
+
+    CacheInvalidation.track(session, topic, [1])
+    CacheInvalidation.track(session, topic)
+    CacheInvalidation.track(session, topic, [2])
+
+    assert CacheInvalidation.pending(session) == {topic: None}
+
+
+def test_inserts_are_tracked_apart_from_other_changes(topic):
+    # No handler of this worker takes inserts, but those of other workers may
+    CacheInvalidation.subscribe(topic, recorder([]), inserts=False)
+    session = FakeSession()
+
+    CacheInvalidation.track(session, topic, [1, 2], inserted=True)
+    CacheInvalidation.track(session, topic, [2, 3])
+    CacheInvalidation.track(session, topic, [3], inserted=True)
+
+    assert CacheInvalidation.pending(session) == {topic: {"1", "2", "3"}}
+    assert CacheInvalidation.inserted(session) == {topic: {"1"}}
+
+
+def test_publish_sends_one_notification_per_topic(topic):
+    large_topic = f"{topic}_large"
+    CacheInvalidation.subscribe(topic, recorder([]))
+    CacheInvalidation.subscribe(large_topic, recorder([]))
+    session = FakeSession()
+    CacheInvalidation.track(session, topic, [2, 1])
+    CacheInvalidation.track(session, topic, [3], inserted=True)
+    CacheInvalidation.track(session, large_topic, range(CacheInvalidation.MAX_KEYS_PER_NOTIFICATION + 1))
+
+    CacheInvalidation.publish(session)
+
+    origin = CacheInvalidation._origin()
+    assert session.executed == [
+        {"topic": topic, "keys": ["1", "2"], "inserted": ["3"], "origin": origin},
+        # Too many keys for one notification: the whole topic is invalidated
+        {"topic": large_topic, "keys": None, "inserted": [], "origin": origin},
+    ]
+
+
+def test_apply_skips_local_handlers_for_remote_changes(topic):
+    local, remote = [], []
+    CacheInvalidation.subscribe(topic, recorder(local), remote=False)
+    CacheInvalidation.subscribe(topic, recorder(remote))
+
+    CacheInvalidation.apply(topic, ["a"])
+    CacheInvalidation.apply(topic, None, remote=True)
+
+    assert local == [{"a"}]
+    assert remote == [{"a"}, None]
+
+
+def test_apply_leaves_inserted_keys_out_for_handlers_not_taking_inserts(topic):
+    entities, responses = [], []
+    CacheInvalidation.subscribe(topic, recorder(entities), inserts=False)
+    CacheInvalidation.subscribe(topic, recorder(responses))
+
+    CacheInvalidation.apply(topic, ["new"], inserted=["new"])
+    CacheInvalidation.apply(topic, ["new", "changed"], remote=True, inserted=["new"])
+
+    assert entities == [{"changed"}]
+    assert responses == [{"new"}, {"new", "changed"}]
+
+
+def test_failing_handler_does_not_stop_the_others(topic):
+    calls = []
+    CacheInvalidation.subscribe(topic, lambda keys: 1 / 0)
+    CacheInvalidation.subscribe(topic, recorder(calls))
+
+    CacheInvalidation.apply(topic, ["a"])
+
+    assert calls == [{"a"}]
+
+
+async def test_handlers_run_after_commit_only(db, topic):
+    calls = []
+    CacheInvalidation.subscribe(topic, recorder(calls))
+
+    with pytest.raises(RuntimeError):
+        async with DbContext.get_session_async() as session:
+            CacheInvalidation.track(session.sync_session, topic, ["rolled_back"])
+            raise RuntimeError()
+    assert calls == []
+
+    async with DbContext.get_session_async() as session:
+        await session.exec(text("SELECT 1"))
+        CacheInvalidation.track(session.sync_session, topic, ["committed"])
+        assert calls == []
+    assert calls == [{"committed"}]
+
+
+async def test_listener_applies_the_notifications_of_other_processes_only(db, topic):
+    calls = []
+    CacheInvalidation.subscribe(topic, recorder(calls))
+    listener = asyncio.create_task(CacheInvalidation.listen())
+    try:
+        # Every handler is called with None once the listener is connected
+        async with asyncio.timeout(5):
+            while not calls:
+                await asyncio.sleep(0.01)
+
+        async with await psycopg.AsyncConnection.connect(CacheInvalidation._conninfo(), autocommit=True) as connection:
+            for keys, origin in ((["own"], CacheInvalidation._origin()), (["other"], "other-process")):
+                payload = orjson.dumps({"topic": topic, "keys": keys, "inserted": ["new"], "origin": origin}).decode()
+                await connection.execute("SELECT pg_notify(%s, %s)", (CacheInvalidation.CHANNEL, payload))
+
+        async with asyncio.timeout(5):
+            while len(calls) < 2:
+                await asyncio.sleep(0.01)
+        await asyncio.sleep(0.1)
+    finally:
+        listener.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await listener
+
+    assert calls == [None, {"other", "new"}]
+
+
+def test_entity_cache_is_invalidated_by_writes(client, sample_data):
+    entity_id = client.post(BASE_URL, json=sample_data()).json()["id"]
+    client.get(f"{BASE_URL}{entity_id}")
+
+    cached = client.get(f"{BASE_URL}{entity_id}")
+    assert cached.headers["X-DB-Statements"] == "0"
+
+    client.patch(f"{BASE_URL}{entity_id}", json={"big_int": 7})
+    updated = client.get(f"{BASE_URL}{entity_id}")
+    assert updated.json()["big_int"] == 7
+    assert updated.headers["X-DB-Statements"] == "1"
+
+    client.delete(f"{BASE_URL}{entity_id}")
+    assert client.get(f"{BASE_URL}{entity_id}").status_code == 404
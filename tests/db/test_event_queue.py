@@ -0,0 +1,150 @@
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import delete, func, select, update
+
+from src import settings
+from src.db.context import DbContext
+from src.db.event_queue import EventQueue
+from src.entities import EventDeadLetter, EventQueueMessage
+
+
+@pytest.fixture
+def queue(sync_engine, monkeypatch) -> str:
+    """Name of a queue of the test's own; its messages and dead letters are deleted afterwards."""
+    monkeypatch.setattr(settings, "event_queue_retry_delay_in_seconds", 0)
+    monkeypatch.setattr(settings, "event_queue_max_attempts", 2)
+    name = f"test-{uuid.uuid4().hex}"
+    yield name
+    with sync_engine.begin() as connection:
+        for table in (EventQueueMessage.__table__, EventDeadLetter.__table__):
+            connection.execute(delete(table).where(table.c.queue == name))
+
+
+async def publish(queue: str, *numbers: int) -> None:
+    async with DbContext.get_session_async() as session:
+        await EventQueue.publish(session, queue, [{"n": n} for n in numbers], [f"key-{n}" for n in numbers])
+        await session.commit()
+
+
+def numbers(messages) -> list:
+    return [message["payload"]["n"] for message in messages]
+
+
+async def dead_letters(queue: str) -> list:
+    table = EventDeadLetter.__table__
+    async with DbContext.get_engine().connect() as connection:
+        return (await connection.execute(select(table).where(table.c.queue == queue).order_by(table.c.id))).all()
+
+
+async def test_published_messages_are_received_oldest_first(db, queue):
+    await publish(queue, 1, 2, 3)
+
+    messages = await EventQueue.receive(queue, max_messages=2)
+
+    assert numbers(messages) == [1, 2]
+    assert [message["key"] for message in messages] == ["key-1", "key-2"]
+    assert {message["attempts"] for message in messages} == {1}
+    assert numbers(await EventQueue.receive(queue)) == [3]
+
+
+async def test_messages_are_only_published_when_the_transaction_commits(db, queue):
+    async with DbContext.get_session_async() as session:
+        await EventQueue.publish(session, queue, [{"n": 1}])
+        await session.rollback()
+
+    assert await EventQueue.receive(queue) == []
+
+
+async def test_leased_messages_are_not_received_again(db, queue):
+    await publish(queue, *range(10))
+
+    first, second = await asyncio.gather(
+        EventQueue.receive(queue, max_messages=6), EventQueue.receive(queue, max_messages=6)
+    )
+
+    assert sorted(numbers(first) + numbers(second)) == list(range(10))
+    assert await EventQueue.receive(queue) == []
+
+
+async def test_processed_messages_are_deleted_and_failed_ones_retried(db, queue):
+    await publish(queue, 1, 2)
+    messages = await EventQueue.receive(queue)
+
+    await EventQueue.settle(messages, [None, ValueError("failed")])
+
+    retried = await EventQueue.receive(queue)
+    assert numbers(retried) == [2]
+    assert retried[0]["attempts"] == 2
+
+
+async def test_messages_failing_every_attempt_are_dead_lettered_and_can_be_redriven(db, queue):
+    await publish(queue, 1)
+    for _ in range(settings.event_queue_max_attempts):
+        await EventQueue.settle(await EventQueue.receive(queue), [ValueError("failed")])
+
+    assert await EventQueue.receive(queue) == []
+    [dead_letter] = await dead_letters(queue)
+    assert (dead_letter.payload, dead_letter.attempts, dead_letter.error) == ({"n": 1}, 2, "ValueError: failed")
+
+    assert await EventQueue.redrive(queue) == 1
+    assert await dead_letters(queue) == []
+    redriven = await EventQueue.receive(queue)
+    assert numbers(redriven) == [1]
+    assert (redriven[0]["id"], redriven[0]["attempts"]) == (dead_letter.id, 1)
+
+
+async def queued(queue: str) -> int:
+    table = EventQueueMessage.__table__
+    async with DbContext.get_engine().connect() as connection:
+        return len((await connection.execute(select(table.c.id).where(table.c.queue == queue))).all())
+
+
+async def test_unsettled_messages_are_delivered_again_after_the_visibility_timeout(db, queue, monkeypatch):
+    monkeypatch.setattr(settings, "event_queue_visibility_timeout_in_seconds", 0)
+    await publish(queue, 1)
+
+    first = await EventQueue.receive(queue)
+    second = await EventQueue.receive(queue)
+    assert [message["attempts"] for message in first + second] == [1, 2]
+
+    # Leased more than EVENT_QUEUE_MAX_ATTEMPTS times without being settled
+    assert await EventQueue.receive(queue) == []
+    [dead_letter] = await dead_letters(queue)
+    assert dead_letter.error == "Not settled within the visibility timeout in 2 deliveries"
+
+
+async def test_settling_after_the_lease_expired_leaves_the_message_alone(db, queue, monkeypatch):
+    monkeypatch.setattr(settings, "event_queue_visibility_timeout_in_seconds", 0)
+    await publish(queue, 1)
+    first = await EventQueue.receive(queue)
+    second = await EventQueue.receive(queue)
+
+    await EventQueue.settle(first, [None])
+    assert await queued(queue) == 1
+
+    await EventQueue.settle(second, [None])
+    assert await queued(queue) == 0
+
+
+@pytest.mark.parametrize("attempts, delay", [(1, 2), (3, 8)])
+# Building the delay must not rely on SQLAlchemy behaviour that is deprecated
+@pytest.mark.filterwarnings("error::DeprecationWarning")
+async def test_retry_delay_doubles_with_every_delivery(db, queue, monkeypatch, attempts, delay):
+    monkeypatch.setattr(settings, "event_queue_retry_delay_in_seconds", 2)
+    monkeypatch.setattr(settings, "event_queue_max_attempts", 5)
+    await publish(queue, 1)
+    [message] = await EventQueue.receive(queue)
+    table = EventQueueMessage.__table__
+    async with DbContext.get_engine().begin() as connection:
+        await connection.execute(update(table).where(table.c.id == message["id"]).values(attempts=attempts))
+
+    await EventQueue.settle([message], [ValueError("failed")])
+
+    assert await EventQueue.receive(queue) == []
+    async with DbContext.get_engine().connect() as connection:
+        remaining = (await connection.execute(
+            select(func.extract("epoch", table.c.visible_at - func.now())).where(table.c.id == message["id"])
+        )).scalar_one()
+    assert delay - 1 < remaining <= delay
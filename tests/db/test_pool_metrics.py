@@ -0,0 +1,76 @@
+import pytest
+from sqlalchemy import text
+
+from src import settings
+from src.db.context import DbContext
+from src.db.pool_metrics import PoolMetrics
+from src.metrics import MetricsRegistry
+
+
+@pytest.mark.parametrize(
+    "role, workers, worker_processes, budget, expected",
+    [
+        ("all", 4, 1, 0, (10, 5)),
+        ("all", 4, 1, 100, (10, 5)),
+        ("all", 4, 1, 20, (5, 0)),
+        ("all", 4, 1, 48, (10, 2)),
+        ("all", 64, 1, 20, (1, 0)),
+        # The worker processes only count when the roles run apart
+        ("all", 1, 8, 12, (10, 2)),
+        ("web", 4, 1, 60, (10, 2)),
+        ("worker", 4, 2, 60, (10, 0)),
+    ]
+)
+def test_pool_limits_share_the_connection_budget(monkeypatch, role, workers, worker_processes, budget, expected):
+    monkeypatch.setattr(settings, "app_role", role)
+    monkeypatch.setattr(settings, "workers", workers)
+    monkeypatch.setattr(settings, "worker_processes", worker_processes)
+    monkeypatch.setattr(settings, "database_pool_size", 10)
+    monkeypatch.setattr(settings, "database_max_overflow", 5)
+    monkeypatch.setattr(settings, "database_connection_budget", budget)
+
+    assert DbContext._pool_limits() == expected
+
+
+def counters() -> dict:
+    return MetricsRegistry.snapshot()["counters"]
+
+
+async def test_checkouts_are_counted_and_held_time_recorded(db):
+    await DbContext.dispose_engine()
+    checkouts = counters().get('db_pool_checkouts_total{pool="primary"}', 0)
+    hold = MetricsRegistry.histogram("db_connection_hold_seconds", {"pool": "primary", "route": "test_route"})
+    held = hold.count
+
+    with PoolMetrics.track_route({"route": type("Route", (), {"name": "test_route"})()}):
+        async with DbContext.get_session_async() as session:
+            await session.exec(text("SELECT 1"))
+            assert MetricsRegistry.snapshot()["gauges"]['db_pool_checked_out{pool="primary"}'] == 1
+
+    assert counters()['db_pool_checkouts_total{pool="primary"}'] == checkouts + 1
+    assert hold.count == held + 1
+    assert MetricsRegistry.snapshot()["gauges"]['db_pool_checked_out{pool="primary"}'] == 0
+
+
+async def test_connections_outside_a_request_are_attributed_to_background(db):
+    hold = MetricsRegistry.histogram("db_connection_hold_seconds", {"pool": "primary", "route": "background"})
+    held = hold.count
+
+    async with DbContext.get_session_async() as session:
+        await session.exec(text("SELECT 1"))
+
+    assert hold.count == held + 1
+
+
+def test_metrics_endpoint_reports_pool_metrics_by_route(client, marker):
+    client.get("/api/v1/samples/search/by-string", params={"q": marker})
+
+    response = client.get("/api/v1/metrics/")
+
+    assert response.status_code == 200
+    metrics = response.json()
+    for gauge in ("db_pool_size", "db_pool_checked_out", "db_pool_idle", "db_pool_overflow_in_use"):
+        assert f'{gauge}{{pool="primary"}}' in metrics["gauges"]
+    assert 'db_pool_checkout_wait_seconds{pool="primary"}' in metrics["histograms"]
+    route = 'db_connection_hold_seconds{pool="primary",route="search_sample_entities"}'
+    assert metrics["histograms"][route]["count"] >= 1
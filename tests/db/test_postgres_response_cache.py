@@ -0,0 +1,71 @@
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import delete
+
+from src.cache import CachedResponse
+from src.db.postgres_response_cache import PostgresResponseCacheBackend
+from src.entities import ResponseCacheEntry, ResponseCacheGeneration
+
+RESPONSE = CachedResponse(status_code=200, headers=[(b"content-type", b"application/json")], body=b'{"a": 1}')
+
+
+@pytest.fixture
+def topic(db, sync_engine) -> str:
+    value = f"test_topic_{uuid.uuid4().hex}"
+    yield value
+    with sync_engine.begin() as connection:
+        connection.execute(delete(ResponseCacheEntry.__table__).where(ResponseCacheEntry.__table__.c.topic == value))
+        connection.execute(
+            delete(ResponseCacheGeneration.__table__).where(ResponseCacheGeneration.__table__.c.topic == value)
+        )
+
+
+@pytest.fixture
+def backend() -> PostgresResponseCacheBackend:
+    return PostgresResponseCacheBackend(max_entries=100, ttl_in_seconds=60)
+
+
+async def invalidate(backend: PostgresResponseCacheBackend, topic: str):
+    backend.invalidate(topic)
+    await asyncio.gather(*backend.__tasks__)
+
+
+async def test_stored_response_is_returned(backend, topic):
+    key = f"/{topic}?a=1"
+    await backend.set(key, topic, RESPONSE, await backend.generation(topic))
+
+    assert await backend.get(key, topic) == RESPONSE
+    assert await backend.get(f"/{topic}?a=2", topic) is None
+
+
+async def test_expired_response_is_not_returned(topic):
+    backend = PostgresResponseCacheBackend(max_entries=100, ttl_in_seconds=-1)
+    key = f"/{topic}"
+    await backend.set(key, topic, RESPONSE, await backend.generation(topic))
+
+    assert await backend.get(key, topic) is None
+
+
+async def test_invalidation_deletes_the_topic_and_bumps_its_generation(backend, topic):
+    key = f"/{topic}"
+    assert await backend.generation(topic) == 0
+    await backend.set(key, topic, RESPONSE, 0)
+
+    await invalidate(backend, topic)
+
+    assert await backend.get(key, topic) is None
+    assert await backend.generation(topic) == 1
+
+
+async def test_response_read_before_an_invalidation_is_not_stored(backend, topic):
+    key = f"/{topic}"
+    generation = await backend.generation(topic)
+
+    await invalidate(backend, topic)
+    await backend.set(key, topic, RESPONSE, generation)
+    assert await backend.get(key, topic) is None
+
+    await backend.set(key, topic, RESPONSE, await backend.generation(topic))
+    assert await backend.get(key, topic) == RESPONSE
@@ -0,0 +1,99 @@
+import asyncio
+import uuid
+
+import httpx
+import pytest
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import text
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.db.context import DbContext
+from src.entities import SampleEntity
+from src.metrics import MetricsRegistry
+from src.services import SampleService
+
+
+async def scalars(session: AsyncSession, *statements: str) -> list:
+    values = []
+    for statement in statements:
+        values.append((await session.exec(text(statement))).scalar_one())
+        await asyncio.sleep(0.01)
+    return values
+
+
+def checked_out() -> int:
+    return MetricsRegistry.snapshot()["gauges"]['db_pool_checked_out{pool="primary"}']
+
+
+async def test_read_only_statements_run_in_their_own_transactions(db):
+    async with DbContext.get_session_async(read_only=True) as session:
+        first, second = await scalars(session, "SELECT now()", "SELECT now()")
+
+    assert first != second
+
+
+async def test_snapshot_statements_share_one_read_only_transaction(db):
+    async with DbContext.get_session_async(read_only=True, snapshot=True) as session:
+        first, second, isolation, read_only = await scalars(
+            session, "SELECT now()", "SELECT now()", "SHOW transaction_isolation", "SHOW transaction_read_only"
+        )
+
+    assert first == second
+    assert (isolation, read_only) == ("repeatable read", "on")
+
+
+async def test_session_checks_out_its_connection_on_its_first_statement(db):
+    async with DbContext.get_session_async() as session:
+        assert checked_out() == 0
+        await session.exec(text("SELECT 1"))
+        assert checked_out() == 1
+    assert checked_out() == 0
+
+
+@pytest.fixture
+def app(marker) -> FastAPI:
+    app = FastAPI()
+    service = SampleService()
+    session_dependency = DbContext.session_dependency()
+
+    def new_entity(name: str) -> SampleEntity:
+        return SampleEntity(required_uuid=uuid.uuid4(), string_field=f"{marker}-{name}", required_jsonb={})
+
+    @app.post("/stream")
+    async def stream(session: AsyncSession = Depends(session_dependency, scope="function")):
+        await service.create(session, new_entity("streamed"))
+
+        async def body():
+            # Sent once the endpoint returned, so the session is committed and its connection back in the pool
+            yield str(checked_out()).encode()
+
+        return StreamingResponse(body())
+
+    @app.post("/fail")
+    async def fail(session: AsyncSession = Depends(session_dependency, scope="function")):
+        await service.create(session, new_entity("failed"))
+        raise HTTPException(status_code=409)
+
+    return app
+
+
+async def search(marker: str) -> list:
+    async with DbContext.get_session_async(read_only=True) as session:
+        return [entity.string_field for entity in await SampleService().search_by_string_field(session, marker)]
+
+
+async def test_dependency_commits_before_the_response_is_sent(db, app, marker):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post("/stream")
+
+    assert response.text == "0"
+    assert await search(marker) == [f"{marker}-streamed"]
+
+
+async def test_dependency_rolls_back_when_the_endpoint_fails(db, app, marker):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post("/fail")
+
+    assert response.status_code == 409
+    assert await search(marker) == []
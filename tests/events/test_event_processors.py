@@ -0,0 +1,33 @@
+from src.events.processor import BaseEventProcessor, SampleEventProcessor
+
+
+class Processor(BaseEventProcessor):
+    def __init__(self):
+        self.processed = []
+
+    async def process(self, event):
+        if event == "poison":
+            raise ValueError("poison")
+        self.processed.append(event)
+
+
+async def test_default_process_batch_processes_each_event_on_its_own():
+    processor = Processor()
+
+    results = await processor.process_batch(["a", "poison", "b"])
+
+    assert processor.processed == ["a", "b"]
+    assert results[0] is None and results[2] is None
+    assert isinstance(results[1], ValueError)
+
+
+def test_processors_opt_into_batches():
+    assert Processor.processes_batches is False
+    assert SampleEventProcessor.processes_batches is True
+
+
+async def test_sample_processor_reports_unexpected_events(db):
+    results = await SampleEventProcessor().process_batch([{"id": 1}, "not an event", {"id": 2}])
+
+    assert results[0] is None and results[2] is None
+    assert isinstance(results[1], ValueError)
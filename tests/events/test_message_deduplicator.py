@@ -0,0 +1,147 @@
+import uuid
+
+import pytest
+from sqlalchemy import delete
+
+from src import settings
+from src.cache import IdSet, LruIdSet, RotatingBloomFilter
+from src.db.processed_events import ProcessedEvents
+from src.entities.processed_event import ProcessedEvent
+from src.events.pollers import MessageDeduplicator
+from src.metrics import MetricsRegistry
+
+
+class EverythingSeen(IdSet):
+    """Probabilistic set answering yes to every ID, as a Bloom filter's false positives would."""
+
+    exact = False
+
+    def add(self, message_id):
+        pass
+
+    def __contains__(self, message_id):
+        return True
+
+    def __len__(self):
+        return 0
+
+    @property
+    def nbytes(self):
+        return 0
+
+
+@pytest.fixture
+def consumer() -> str:
+    return f"test-{uuid.uuid4().hex}"
+
+
+@pytest.fixture
+def durable_consumer(sync_engine, consumer) -> str:
+    """Consumer whose processed_event rows are deleted after the test."""
+    yield consumer
+    table = ProcessedEvent.__table__
+    with sync_engine.begin() as connection:
+        connection.execute(delete(table).where(table.c.consumer == consumer))
+
+
+def messages(*ids) -> list:
+    return [{"id": message_id, "n": n} for n, message_id in enumerate(ids)]
+
+
+def counts(consumer: str) -> dict:
+    counters = MetricsRegistry.snapshot()["counters"]
+    return {
+        result: counters.get(f'event_dedup_messages_total{{poller="{consumer}",result="{result}"}}', 0)
+        for result in ("new", "memory_hit", "durable_hit")
+    }
+
+
+@pytest.mark.parametrize("new_seen", [lambda: LruIdSet(100), lambda: RotatingBloomFilter(100, 0.01)], ids=["lru", "bloom"])
+async def test_recorded_messages_are_skipped(consumer, new_seen):
+    deduplicator = MessageDeduplicator(new_seen(), consumer)
+
+    new, skipped = await deduplicator.split(messages("a", "b"))
+    assert (new, skipped) == (messages("a", "b"), [])
+    await deduplicator.record(new)
+
+    new, skipped = await deduplicator.split(messages("b", "c", "a"))
+    assert [msg["id"] for msg in new] == ["c"]
+    assert [msg["id"] for msg in skipped] == ["b", "a"]
+    assert counts(consumer) == {"new": 3, "memory_hit": 2, "durable_hit": 0}
+
+
+async def test_messages_without_an_id_are_always_new(consumer):
+    deduplicator = MessageDeduplicator(LruIdSet(100), consumer, id_field="message_id")
+    msgs = [{"id": "a"}, "not a dict", {"message_id": 1}]
+    await deduplicator.record(msgs)
+
+    new, skipped = await deduplicator.split(msgs + [{"message_id": "1"}])
+
+    assert new == [{"id": "a"}, "not a dict"]
+    assert skipped == [{"message_id": 1}, {"message_id": "1"}]
+
+
+async def test_durable_ids_are_shared_between_deduplicators(db, durable_consumer):
+    await MessageDeduplicator(LruIdSet(100), durable_consumer, durable=True).record(messages("a", "b"))
+    # Another process, or this one after a restart, with nothing in memory
+    deduplicator = MessageDeduplicator(LruIdSet(100), durable_consumer, durable=True)
+
+    new, skipped = await deduplicator.split(messages("a", "c", "b"))
+
+    assert [msg["id"] for msg in new] == ["c"]
+    assert [msg["id"] for msg in skipped] == ["a", "b"]
+    # Durable hits are remembered, so the next split finds them in memory
+    await deduplicator.split(messages("a"))
+    assert counts(durable_consumer) == {"new": 1, "memory_hit": 1, "durable_hit": 2}
+
+
+async def test_durable_lookup_confirms_probabilistic_hits(db, durable_consumer):
+    await ProcessedEvents.add(durable_consumer, ["a"])
+    deduplicator = MessageDeduplicator(EverythingSeen(), durable_consumer, durable=True)
+
+    new, skipped = await deduplicator.split(messages("a", "b"))
+
+    assert [msg["id"] for msg in new] == ["b"]
+    assert [msg["id"] for msg in skipped] == ["a"]
+
+
+async def test_probabilistic_hits_are_trusted_without_durable_ids(consumer):
+    deduplicator = MessageDeduplicator(EverythingSeen(), consumer)
+
+    new, skipped = await deduplicator.split(messages("a"))
+
+    assert (new, skipped) == ([], messages("a"))
+
+
+async def test_messages_are_new_when_the_durable_lookup_fails(consumer, monkeypatch):
+    async def fail(consumer, message_ids):
+        raise ConnectionError("database unavailable")
+
+    monkeypatch.setattr(ProcessedEvents, "find", fail)
+    deduplicator = MessageDeduplicator(EverythingSeen(), consumer, durable=True)
+
+    new, skipped = await deduplicator.split(messages("a", "b"))
+
+    assert (new, skipped) == (messages("a", "b"), [])
+
+
+async def test_processed_events_are_found_per_consumer(db, durable_consumer):
+    await ProcessedEvents.add(durable_consumer, ["a", "b"])
+    # Recording an ID again leaves it as it is
+    await ProcessedEvents.add(durable_consumer, ["b", "c"])
+
+    assert await ProcessedEvents.find(durable_consumer, ["a", "c", "d"]) == {"a", "c"}
+    assert await ProcessedEvents.find(f"{durable_consumer}-other", ["a"]) == set()
+    assert await ProcessedEvents.find(durable_consumer, []) == set()
+
+
+@pytest.mark.parametrize("mode, exact", [("none", None), ("lru", True), ("bloom", False)])
+def test_from_settings(monkeypatch, consumer, mode, exact):
+    monkeypatch.setattr(settings, "sample_event_dedup", mode)
+
+    deduplicator = MessageDeduplicator.from_settings(consumer)
+
+    if exact is None:
+        assert deduplicator is None
+    else:
+        assert deduplicator.__seen__.exact is exact
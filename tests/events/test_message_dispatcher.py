@@ -0,0 +1,166 @@
+import asyncio
+
+from src.events.pollers.message_dispatcher import MessageDispatcher
+
+
+class Recorder:
+    """Handler recording the order items start and finish in, and how many ran at once."""
+
+    def __init__(self, delays=None, failing=()):
+        self.delays = delays or {}
+        self.failing = set(failing)
+        self.started = []
+        self.finished = []
+        self.running = 0
+        self.max_running = 0
+
+    async def __call__(self, item):
+        self.started.append(item["id"])
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.delays.get(item["id"], 0.01))
+            if item["id"] in self.failing:
+                raise ValueError(item["id"])
+        finally:
+            self.running -= 1
+            self.finished.append(item["id"])
+
+
+def by_key(item):
+    return [item["key"]] if item.get("key") is not None else []
+
+
+async def test_runs_up_to_concurrency_items_at_once():
+    handle = Recorder()
+    dispatcher = MessageDispatcher(handle, concurrency=3)
+
+    for n in range(10):
+        await dispatcher.submit({"id": n})
+    await dispatcher.drain()
+
+    assert handle.max_running == 3
+    assert sorted(handle.finished) == list(range(10))
+    assert len(dispatcher) == 0
+
+
+async def test_submit_waits_for_a_free_slot():
+    handle = Recorder(delays={0: 0.1})
+    dispatcher = MessageDispatcher(handle, concurrency=1)
+
+    await dispatcher.submit({"id": 0})
+    submit = asyncio.create_task(dispatcher.submit({"id": 1}))
+    await asyncio.sleep(0.05)
+    assert not submit.done()
+    assert len(dispatcher) == 1
+
+    await submit
+    await dispatcher.drain()
+    assert handle.finished == [0, 1]
+
+
+async def test_items_of_a_key_run_in_submitted_order():
+    # The first item of each key is the slowest, so unordered handling would finish it last
+    delays = {0: 0.05, 1: 0.05}
+    handle = Recorder(delays=delays)
+    dispatcher = MessageDispatcher(handle, concurrency=10, partition_keys=by_key)
+
+    for n in range(8):
+        await dispatcher.submit({"id": n, "key": n % 2})
+    await dispatcher.drain()
+
+    assert [n for n in handle.finished if n % 2 == 0] == [0, 2, 4, 6]
+    assert [n for n in handle.finished if n % 2 == 1] == [1, 3, 5, 7]
+    # Different keys still run side by side
+    assert handle.max_running == 2
+
+
+async def test_items_without_keys_are_not_held_back():
+    handle = Recorder(delays={0: 0.1})
+    dispatcher = MessageDispatcher(handle, concurrency=10, partition_keys=by_key)
+
+    await dispatcher.submit({"id": 0, "key": "a"})
+    await dispatcher.submit({"id": 1})
+    await dispatcher.submit({"id": 2, "key": "b"})
+    await dispatcher.drain()
+
+    assert handle.finished == [1, 2, 0]
+
+
+async def test_a_failed_item_does_not_stop_the_next_of_its_key():
+    async def handle(item):
+        calls.append(item["id"])
+        if item["id"] == 0:
+            raise ValueError("failed")
+
+    calls = []
+    dispatcher = MessageDispatcher(handle, concurrency=2, partition_keys=by_key)
+
+    await dispatcher.submit({"id": 0, "key": "a"})
+    await dispatcher.submit({"id": 1, "key": "a"})
+    await dispatcher.drain()
+
+    assert calls == [0, 1]
+
+
+async def test_an_item_with_several_keys_waits_for_each_of_them():
+    handle = Recorder(delays={0: 0.05, 1: 0.1})
+    dispatcher = MessageDispatcher(handle, concurrency=10, partition_keys=lambda item: item["keys"])
+
+    await dispatcher.submit({"id": 0, "keys": ["a"]})
+    await dispatcher.submit({"id": 1, "keys": ["b"]})
+    await dispatcher.submit({"id": 2, "keys": ["a", "b"]})
+    await dispatcher.drain()
+
+    assert handle.finished == [0, 1, 2]
+
+
+async def test_an_item_waiting_for_its_key_leaves_its_slot_to_other_keys():
+    handle = Recorder(delays={0: 0.1})
+    dispatcher = MessageDispatcher(handle, concurrency=2, partition_keys=by_key)
+
+    await dispatcher.submit({"id": 0, "key": "a"})
+    await dispatcher.submit({"id": 1, "key": "a"})
+    await asyncio.wait_for(dispatcher.submit({"id": 2, "key": "b"}), timeout=0.05)
+    await asyncio.sleep(0.05)
+    # Item 2 ran while item 1 was still waiting for item 0
+    assert handle.started == [0, 2]
+
+    await dispatcher.drain()
+    assert handle.finished == [2, 0, 1]
+    assert handle.max_running == 2
+
+
+async def test_submit_waits_when_too_many_items_wait_for_their_keys():
+    handle = Recorder(delays={0: 0.1})
+    dispatcher = MessageDispatcher(handle, concurrency=1, partition_keys=by_key)
+
+    await dispatcher.submit({"id": 0, "key": "a"})
+    await dispatcher.submit({"id": 1, "key": "a"})
+    submit = asyncio.create_task(dispatcher.submit({"id": 2, "key": "a"}))
+    await asyncio.sleep(0.05)
+    assert not submit.done()
+    assert len(dispatcher) == 2
+
+    await submit
+    await dispatcher.drain()
+    assert handle.finished == [0, 1, 2]
+
+
+async def test_drain_cancels_the_items_still_running_after_the_timeout():
+    handle = Recorder(delays={0: 0.01, 1: 10, 2: 10})
+    dispatcher = MessageDispatcher(handle, concurrency=3)
+
+    for n in range(3):
+        await dispatcher.submit({"id": n})
+    cancelled = await dispatcher.drain(timeout=0.1)
+
+    assert cancelled == 2
+    assert len(dispatcher) == 0
+    assert sorted(handle.finished) == [0, 1, 2]
+
+
+async def test_drain_without_items_in_flight():
+    dispatcher = MessageDispatcher(Recorder(), concurrency=1)
+
+    assert await dispatcher.drain(timeout=0) == 0
@@ -0,0 +1,80 @@
+import asyncio
+import uuid
+from collections import Counter
+
+import pytest
+from sqlalchemy import delete, select
+
+from src import settings
+from src.db.context import DbContext
+from src.db.event_queue import EventQueue
+from src.entities import EventDeadLetter, EventQueueMessage
+from src.events.pollers import PostgresEventPoller
+from src.events.processor import BaseEventProcessor
+
+
+class Processor(BaseEventProcessor):
+    """Fails the first delivery of the messages in `flaky`; `done` is set once `expected` messages were processed."""
+
+    def __init__(self, expected: int, flaky=()):
+        self.expected = expected
+        self.flaky = set(flaky)
+        self.deliveries = Counter()
+        self.processed = set()
+        self.done = asyncio.Event()
+
+    async def process(self, event):
+        n = event["payload"]["n"]
+        self.deliveries[n] += 1
+        await asyncio.sleep(0.01)
+        if n in self.flaky and event["attempts"] == 1:
+            raise ValueError(f"message {n} failed")
+        self.processed.add(n)
+        if len(self.processed) == self.expected:
+            self.done.set()
+
+
+@pytest.fixture
+def queue(sync_engine, monkeypatch) -> str:
+    monkeypatch.setattr(settings, "event_queue_retry_delay_in_seconds", 0)
+    monkeypatch.setattr(settings, "sample_event_polling_idle_interval_min_in_seconds", 0.01)
+    monkeypatch.setattr(settings, "sample_event_polling_idle_interval_max_in_seconds", 0.02)
+    monkeypatch.setattr(settings, "sample_event_dedup", "none")
+    name = f"test-{uuid.uuid4().hex}"
+    yield name
+    with sync_engine.begin() as connection:
+        for table in (EventQueueMessage.__table__, EventDeadLetter.__table__):
+            connection.execute(delete(table).where(table.c.queue == name))
+
+
+async def test_processes_the_queue_and_settles_outcomes_in_groups(db, queue, monkeypatch):
+    async with DbContext.get_session_async() as session:
+        await EventQueue.publish(session, queue, [{"n": n} for n in range(20)])
+        await session.commit()
+
+    settle = EventQueue.settle
+    settled = []
+
+    async def counting_settle(messages, errors):
+        settled.append(len(messages))
+        await settle(messages, errors)
+
+    monkeypatch.setattr(EventQueue, "settle", counting_settle)
+    processor = Processor(expected=20, flaky={3, 7})
+    poller = PostgresEventPoller(processor, queue, concurrency=10, partition_key="")
+
+    task = asyncio.create_task(poller.poll_messages())
+    try:
+        await asyncio.wait_for(processor.done.wait(), 10)
+    finally:
+        poller.stop()
+        await asyncio.wait_for(task, 10)
+
+    assert processor.processed == set(range(20))
+    assert processor.deliveries[3] == processor.deliveries[7] == 2
+    assert sum(settled) == 22
+    # Messages finishing while a settle transaction runs are settled together
+    assert len(settled) < 22
+    table = EventQueueMessage.__table__
+    async with DbContext.get_engine().connect() as connection:
+        assert (await connection.execute(select(table.c.id).where(table.c.queue == queue))).all() == []
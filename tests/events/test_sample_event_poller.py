@@ -0,0 +1,353 @@
+import asyncio
+import threading
+from collections import deque
+from typing import Dict, List, Optional
+
+import pytest
+
+from src import settings
+from src.cache import LruIdSet
+from src.db.context import DbContext
+from src.events.pollers import MessageDeduplicator, SampleEventPoller
+from src.events.processor import BaseEventProcessor
+
+
+class ListPoller(SampleEventPoller):
+    """Receives the given batches, then nothing, and records the acknowledged outcomes."""
+
+    def __init__(self, batches: List[List[Dict]], *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.batches = deque(batches)
+        self.expected = sum(map(len, batches))
+        self.receives = 0
+        self.acknowledged: Dict[int, Optional[Exception]] = {}
+        self.done = asyncio.Event()
+
+    async def __receive__(self) -> List[Dict]:
+        self.receives += 1
+        return self.batches.popleft() if self.batches else []
+
+    async def __acknowledge__(self, msgs: List[Dict], errors: List[Optional[Exception]]) -> None:
+        for msg, error in zip(msgs, errors):
+            self.acknowledged[msg["id"]] = error
+        if len(self.acknowledged) >= self.expected:
+            self.done.set()
+
+
+class Processor(BaseEventProcessor):
+    def __init__(self, delay: float = 0.01, failing=()):
+        self.delay = delay
+        self.failing = set(failing)
+        self.processed: List[int] = []
+        self.running = 0
+        self.max_running = 0
+
+    async def process(self, event):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            # The first message of a key is the slowest, so unordered processing would finish it last
+            await asyncio.sleep(self.delay * (5 if event["id"] < 2 else 1))
+            if event["id"] in self.failing:
+                raise ValueError(f"message {event['id']} failed")
+            self.processed.append(event["id"])
+        finally:
+            self.running -= 1
+
+
+@pytest.fixture(autouse=True)
+def fast_polling(monkeypatch):
+    monkeypatch.setattr(settings, "sample_event_polling_idle_interval_min_in_seconds", 0.01)
+    monkeypatch.setattr(settings, "sample_event_polling_idle_interval_max_in_seconds", 0.02)
+    monkeypatch.setattr(settings, "sample_event_dedup", "none")
+
+
+def messages(count: int, start: int = 0) -> List[Dict]:
+    return [{"id": n, "key": n % 2} for n in range(start, start + count)]
+
+
+async def run(poller: ListPoller, timeout: float = 5):
+    """Poll until every message is acknowledged, then stop the poller."""
+    task = asyncio.create_task(poller.poll_messages())
+    try:
+        await asyncio.wait_for(poller.done.wait(), timeout)
+    finally:
+        poller.stop()
+        await asyncio.wait_for(task, timeout)
+
+
+async def test_processes_messages_concurrently():
+    processor = Processor()
+    poller = ListPoller([messages(10), messages(10, 10)], processor, concurrency=4, partition_key="")
+
+    await run(poller)
+
+    assert sorted(processor.processed) == list(range(20))
+    assert processor.max_running == 4
+    assert set(poller.acknowledged.values()) == {None}
+
+
+async def test_messages_of_a_partition_key_are_processed_in_order():
+    processor = Processor()
+    poller = ListPoller([messages(10)], processor, concurrency=10, partition_key="key")
+
+    await run(poller)
+
+    assert [n for n in processor.processed if n % 2 == 0] == [0, 2, 4, 6, 8]
+    assert [n for n in processor.processed if n % 2 == 1] == [1, 3, 5, 7, 9]
+    assert processor.max_running == 2
+
+
+async def test_failed_messages_are_acknowledged_with_their_error():
+    processor = Processor(failing={3})
+    poller = ListPoller([messages(5)], processor, concurrency=2, partition_key="key")
+
+    await run(poller)
+
+    assert sorted(processor.processed) == [0, 1, 2, 4]
+    assert isinstance(poller.acknowledged[3], ValueError)
+    assert sorted(n for n, error in poller.acknowledged.items() if error is None) == [0, 1, 2, 4]
+
+
+async def test_stopping_drains_the_messages_in_flight():
+    processor = Processor(delay=0.05)
+    poller = ListPoller([messages(4)], processor, concurrency=4, partition_key="")
+
+    task = asyncio.create_task(poller.poll_messages())
+    while not processor.running:
+        await asyncio.sleep(0.005)
+    poller.stop()
+    await asyncio.wait_for(task, 5)
+
+    assert sorted(processor.processed) == [0, 1, 2, 3]
+    assert sorted(poller.acknowledged) == [0, 1, 2, 3]
+
+
+async def test_messages_still_running_after_the_drain_timeout_are_cancelled(monkeypatch):
+    monkeypatch.setattr(settings, "sample_event_polling_drain_timeout_in_seconds", 0)
+    processor = Processor(delay=10)
+    poller = ListPoller([messages(2)], processor, concurrency=2, partition_key="")
+
+    task = asyncio.create_task(poller.poll_messages())
+    while processor.running < 2:
+        await asyncio.sleep(0.005)
+    poller.stop()
+    await asyncio.wait_for(task, 5)
+
+    assert processor.processed == []
+    assert poller.acknowledged == {}
+
+
+class BatchProcessor(Processor):
+    processes_batches = True
+
+    def __init__(self, failing_batches: int = 0, results=None, **kwargs):
+        super().__init__(**kwargs)
+        self.batches: List[List[int]] = []
+        self.failing_batches = failing_batches
+        self.results = results
+
+    async def process_batch(self, events):
+        await asyncio.sleep(self.delay * (5 if events[0]["id"] < 2 else 1))
+        self.batches.append([event["id"] for event in events])
+        if len(self.batches) <= self.failing_batches:
+            raise RuntimeError("batch failed")
+        if self.results is not None:
+            return self.results
+        return [None if event["id"] not in self.failing else ValueError(event["id"]) for event in events]
+
+
+async def test_batch_processors_are_given_each_received_batch():
+    processor = BatchProcessor(failing={2})
+    poller = ListPoller([messages(3), messages(2, 3)], processor, partition_key="")
+
+    await run(poller)
+
+    assert sorted(processor.batches) == [[0, 1, 2], [3, 4]]
+    assert processor.processed == []
+    assert isinstance(poller.acknowledged.pop(2), ValueError)
+    assert set(poller.acknowledged.values()) == {None}
+
+
+async def test_a_failed_batch_is_processed_again_one_message_at_a_time():
+    processor = BatchProcessor(failing_batches=1, failing={1})
+    poller = ListPoller([messages(3)], processor, partition_key="")
+
+    await run(poller)
+
+    assert processor.batches == [[0, 1, 2]]
+    assert processor.processed == [0, 2]
+    assert isinstance(poller.acknowledged[1], ValueError)
+    assert poller.acknowledged[0] is None and poller.acknowledged[2] is None
+
+
+class WritingBatchProcessor(BatchProcessor):
+    """Records whether each message saw a write of an earlier one, then writes."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.saw_write: Dict[int, bool] = {}
+
+    async def process_batch(self, events):
+        self.saw_write[-1] = DbContext.has_written()
+        DbContext.__wrote__.set(True)
+        return await super().process_batch(events)
+
+    async def process(self, event):
+        self.saw_write[event["id"]] = DbContext.has_written()
+        DbContext.__wrote__.set(True)
+        await super().process(event)
+
+
+async def test_each_message_reads_from_replicas_until_it_writes():
+    processor = WritingBatchProcessor(failing_batches=1)
+    poller = ListPoller([messages(3)], processor, partition_key="")
+
+    await run(poller)
+
+    # The fallback processes the messages one after the other in the task of the failed batch
+    assert processor.saw_write == {-1: False, 0: False, 1: False, 2: False}
+
+
+async def test_missing_batch_results_fail_their_messages():
+    processor = BatchProcessor(results=[None])
+    poller = ListPoller([messages(3)], processor, partition_key="")
+
+    await run(poller)
+
+    assert poller.acknowledged[0] is None
+    assert isinstance(poller.acknowledged[1], ValueError)
+    assert isinstance(poller.acknowledged[2], ValueError)
+
+
+async def test_batches_sharing_a_partition_key_are_processed_in_order():
+    processor = BatchProcessor()
+    poller = ListPoller([messages(2), messages(2, 2), messages(2, 4)], processor, concurrency=3, partition_key="key")
+
+    await run(poller)
+
+    assert processor.batches == [[0, 1], [2, 3], [4, 5]]
+
+
+class GatedProcessor(Processor):
+    """Holds every message until `gate` is set."""
+
+    def __init__(self):
+        super().__init__()
+        self.gate = asyncio.Event()
+
+    async def process(self, event):
+        self.running += 1
+        await self.gate.wait()
+        self.running -= 1
+        self.processed.append(event["id"])
+
+
+async def test_receives_ahead_until_the_prefetch_buffer_is_full():
+    processor = GatedProcessor()
+    batches = [messages(1, n) for n in range(10)]
+    poller = ListPoller(batches, processor, concurrency=1, partition_key="", prefetch_batches=2)
+
+    task = asyncio.create_task(poller.poll_messages())
+    await asyncio.sleep(0.1)
+    # One batch processing, one waiting for a slot, two buffered and one waiting for room
+    assert poller.receives == 5
+    assert processor.running == 1
+
+    processor.gate.set()
+    try:
+        await asyncio.wait_for(poller.done.wait(), 5)
+    finally:
+        poller.stop()
+        await asyncio.wait_for(task, 5)
+    assert processor.processed == list(range(10))
+
+
+async def test_receivers_receive_concurrently():
+    class SlowReceivePoller(ListPoller):
+        receiving = 0
+        max_receiving = 0
+
+        async def __receive__(self):
+            self.receiving += 1
+            self.max_receiving = max(self.max_receiving, self.receiving)
+            await asyncio.sleep(0.02)
+            self.receiving -= 1
+            return await super().__receive__()
+
+    processor = Processor(delay=0)
+    poller = SlowReceivePoller([messages(1, n) for n in range(9)], processor, partition_key="", receivers=3)
+
+    await run(poller)
+
+    assert poller.max_receiving == 3
+    assert sorted(processor.processed) == list(range(9))
+
+
+async def test_a_synchronous_receive_runs_in_a_thread():
+    class ThreadedPoller(ListPoller):
+        def __receive__(self):
+            self.threads.add(threading.get_ident())
+            self.receives += 1
+            return self.batches.popleft() if self.batches else []
+
+    processor = Processor(delay=0)
+    poller = ThreadedPoller([messages(2)], processor, partition_key="")
+    poller.threads = set()
+
+    await run(poller)
+
+    assert threading.get_ident() not in poller.threads
+    assert sorted(processor.processed) == [0, 1]
+
+
+async def test_idle_interval_doubles_after_empty_receives_and_resets_on_messages(monkeypatch):
+    monkeypatch.setattr(settings, "sample_event_polling_idle_interval_min_in_seconds", 0.5)
+    monkeypatch.setattr(settings, "sample_event_polling_idle_interval_max_in_seconds", 2)
+    # Empty receives, then one message, then empty receives again
+    script = deque([[], [], [], [], messages(1), [], []])
+    sleeps = []
+    sleep = asyncio.sleep
+
+    class ScriptedPoller(ListPoller):
+        async def __receive__(self):
+            if not script:
+                self.stop()
+                return []
+            return script.popleft()
+
+    async def record_sleep(delay, *args, **kwargs):
+        if delay >= 0.5:
+            sleeps.append(delay)
+        await sleep(0)
+
+    processor = Processor(delay=0)
+    poller = ScriptedPoller([], processor, partition_key="")
+    monkeypatch.setattr(asyncio, "sleep", record_sleep)
+
+    await asyncio.wait_for(poller.poll_messages(), 5)
+
+    assert sleeps == [0.5, 1, 2, 2, 0.5, 1, 2]
+    assert processor.processed == [0]
+
+
+async def test_duplicates_are_acknowledged_without_being_processed():
+    class RedeliveringPoller(ListPoller):
+        async def __receive__(self):
+            # Redelivered once processed, not while still in flight, which would not be recognised
+            if len(self.batches) == 1 and len(self.acknowledged) < 3:
+                return []
+            return await super().__receive__()
+
+    processor = Processor(delay=0)
+    deduplicator = MessageDeduplicator(LruIdSet(100), "test-poller")
+    # The second batch redelivers messages 0 and 1
+    poller = RedeliveringPoller(
+        [messages(3), messages(2) + messages(1, 3)], processor, partition_key="", deduplicator=deduplicator
+    )
+    poller.expected = 4
+
+    await run(poller)
+
+    assert sorted(processor.processed) == [0, 1, 2, 3]
+    assert set(poller.acknowledged) == {0, 1, 2, 3}
@@ -0,0 +1,28 @@
+from src.metrics import MetricsRegistry
+from src.metrics.metrics_registry import Histogram
+
+
+def test_counter_is_shared_by_name_and_labels():
+    counter = MetricsRegistry.counter("test_counter_total", {"b": "2", "a": "1"})
+    counter.inc()
+    MetricsRegistry.counter("test_counter_total", {"a": "1", "b": "2"}).inc(2)
+
+    assert counter.value == 3
+    assert MetricsRegistry.snapshot()["counters"]['test_counter_total{a="1",b="2"}'] == 3
+    assert MetricsRegistry.counter("test_counter_total", {"a": "other"}).value == 0
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram(buckets=(1.0, 0.1))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value)
+
+    assert histogram.snapshot() == {"count": 4, "sum": 2.65, "buckets": {"0.1": 2, "1.0": 3, "+Inf": 4}}
+
+
+def test_gauges_are_read_on_snapshot():
+    values = iter([1, 2])
+    MetricsRegistry.gauge("test_gauge", lambda: next(values))
+
+    assert MetricsRegistry.snapshot()["gauges"]["test_gauge"] == 1
+    assert MetricsRegistry.snapshot()["gauges"]["test_gauge"] == 2
@@ -0,0 +1,185 @@
+import asyncio
+import zlib
+
+import pytest
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+from src.middlewares.compression_middleware import CompressionMiddleware
+from src.utils.etag_utils import EtagUtils
+from src.utils.settings import Settings
+
+LARGE = "x" * 2048
+ETAG = '"representation"'
+
+
+def build_app(encodings=("gzip",), minimum_size=1024) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/text")
+    async def text(size: int = len(LARGE), cache_control: str = ""):
+        headers = {"Cache-Control": cache_control} if cache_control else {}
+        return PlainTextResponse("x" * size, headers=headers)
+
+    @app.get("/binary")
+    async def binary():
+        return Response(LARGE.encode(), media_type="application/octet-stream")
+
+    @app.get("/versioned")
+    async def versioned(request: Request):
+        if EtagUtils.is_not_modified(ETAG, None, request.headers.get("if-none-match"), None):
+            return Response(status_code=304, headers={"ETag": ETAG})
+        return PlainTextResponse(LARGE, headers={"ETag": ETAG})
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for number in range(3):
+                yield f"{number}".encode() * 1024
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    app.add_middleware(
+        CompressionMiddleware,
+        encodings=list(encodings),
+        levels={"text/plain": {"gzip": 9}},
+        minimum_size=minimum_size
+    )
+    return app
+
+
+@pytest.fixture
+def client() -> TestClient:
+    return TestClient(build_app())
+
+
+async def call(app: FastAPI, path: str, accept_encoding: str) -> list:
+    """Call `app` over ASGI and return the messages it sends, bodies as they were sent on the wire."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(b"accept-encoding", accept_encoding.encode())], "server": ("test", 80), "client": ("test", 1),
+    }
+    requested = False
+    disconnected = asyncio.Event()
+    messages = []
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    disconnected.set()
+    return messages
+
+
+def get(client, path: str, accept_encoding: str = "gzip", **kwargs):
+    return client.get(path, headers={"Accept-Encoding": accept_encoding, **kwargs.pop("headers", {})}, **kwargs)
+
+
+def test_large_response_is_compressed(client):
+    response = get(client, "/text")
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert response.text == LARGE
+
+
+@pytest.mark.parametrize("path, params, accept_encoding", [
+    ("/text", {"size": 1023}, "gzip"),
+    ("/text", {"cache_control": "no-transform"}, "gzip"),
+    ("/binary", {}, "gzip"),
+    ("/text", {}, "identity"),
+    ("/text", {}, "gzip;q=0, identity"),
+    ("/text", {}, "br"),
+])
+def test_responses_sent_as_they_are(client, path, params, accept_encoding):
+    response = get(client, path, accept_encoding, params=params)
+
+    assert "Content-Encoding" not in response.headers
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("gzip, br, zstd", "br"),
+    ("gzip;q=1, br;q=0.5", "gzip"),
+    ("*", "br"),
+    ("*;q=0.1, zstd", "zstd"),
+    ("br;q=0, *", "zstd"),
+    ("deflate", None),
+    ("gzip;q=oops, zstd;q=0.2", "zstd"),
+])
+def test_negotiation(accept_encoding, expected):
+    middleware = CompressionMiddleware(None, ["br", "zstd", "gzip"], {}, 0)
+    # Offered whether or not the optional codecs are installed; only the negotiation is tested
+    middleware.__encodings__ = ["br", "zstd", "gzip"]
+
+    assert middleware._negotiate(accept_encoding) == expected
+
+
+def decompress_br(body: bytes) -> bytes:
+    return pytest.importorskip("brotli").decompress(body)
+
+
+def decompress_zstd(body: bytes) -> bytes:
+    return pytest.importorskip("zstandard").ZstdDecompressor().decompressobj().decompress(body)
+
+
+@pytest.mark.parametrize("encoding, decompress", [("br", decompress_br), ("zstd", decompress_zstd)])
+async def test_optional_encodings(encoding, decompress):
+    messages = await call(build_app(encodings=(encoding, "gzip")), "/text", f"{encoding}, gzip")
+
+    start, *bodies = messages
+    assert (b"content-encoding", encoding.encode()) in start["headers"]
+    assert decompress(b"".join(message["body"] for message in bodies)) == LARGE.encode()
+
+
+def test_compressed_etag_is_suffixed_with_the_coding(client):
+    compressed = get(client, "/versioned")
+    identity = get(client, "/versioned", "identity")
+
+    assert compressed.headers["ETag"] == '"representation-gzip"'
+    assert identity.headers["ETag"] == ETAG
+
+
+@pytest.mark.parametrize("if_none_match", ['"representation-gzip"', ETAG])
+def test_not_modified_keeps_the_etag_the_client_has(client, if_none_match):
+    response = get(client, "/versioned", headers={"If-None-Match": if_none_match})
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == if_none_match
+
+
+async def test_streamed_chunks_can_be_decoded_as_they_arrive():
+    messages = await call(build_app(), "/stream", "gzip")
+
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    decoded = [decoder.decompress(message["body"]) for message in messages[1:]]
+    # Every chunk of the stream is complete once decoded, without waiting for the next one
+    assert decoded == [b"0" * 1024, b"1" * 1024, b"2" * 1024, b""]
+    assert decoder.eof
+
+
+def test_head_requests_are_not_compressed(client):
+    response = client.head("/text", headers={"Accept-Encoding": "gzip"})
+
+    assert "Content-Encoding" not in response.headers
+
+
+@pytest.mark.parametrize("values", [
+    {"COMPRESSION_ENCODINGS": "gzip, deflate"},
+    {"COMPRESSION_LEVELS": {"text/plain": {"gzip": 10}}},
+    {"COMPRESSION_LEVELS": {"text/plain": {"lzma": 1}}},
+])
+def test_compression_settings_are_validated(values):
+    with pytest.raises(ValidationError):
+        Settings(**values)
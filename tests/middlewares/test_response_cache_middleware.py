@@ -0,0 +1,161 @@
+import asyncio
+import uuid
+
+import httpx
+import pytest
+from fastapi import FastAPI, Response
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.testclient import TestClient
+
+from src.cache import MemoryResponseCacheBackend
+from src.db.cache_invalidation import CacheInvalidation
+from src.middlewares.response_cache_middleware import ResponseCacheMiddleware
+
+
+class FailingBackend(MemoryResponseCacheBackend):
+    async def get(self, key, topic):
+        raise RuntimeError("unavailable")
+
+
+@pytest.fixture
+def topic(monkeypatch) -> str:
+    monkeypatch.setattr(CacheInvalidation, "__handlers__", {})
+    return f"test_topic_{uuid.uuid4().hex}"
+
+
+@pytest.fixture
+def calls() -> list:
+    return []
+
+
+@pytest.fixture
+def build_app(topic, calls):
+    def build(backend=None, max_entry_bytes=1024, delay=0.0, cors_origins=None) -> FastAPI:
+        app = FastAPI()
+
+        @app.get("/items")
+        async def items(response: Response, status: int = 200, cookie: bool = False, size: int = 1):
+            calls.append(status)
+            if delay:
+                await asyncio.sleep(delay)
+            response.status_code = status
+            response.headers["ETag"] = '"items"'
+            if cookie:
+                response.set_cookie("session", "1")
+            return {"call": len(calls), "padding": "x" * size}
+
+        @app.get("/invalidating")
+        async def invalidating():
+            calls.append(200)
+            # A write committed while the response is computed
+            CacheInvalidation.apply(topic, None)
+            return {"call": len(calls)}
+
+        if cors_origins:
+            # Inside the cache, so that the cache sees the headers it answers each Origin with
+            app.add_middleware(CORSMiddleware, allow_origins=cors_origins)
+        app.add_middleware(
+            ResponseCacheMiddleware,
+            backend=backend or MemoryResponseCacheBackend(max_entries=10, max_bytes=1024 * 1024, ttl_in_seconds=60),
+            paths={"/items": topic, "/invalidating": topic},
+            max_entry_bytes=max_entry_bytes
+        )
+        return app
+
+    return build
+
+
+def test_second_request_is_served_from_the_cache(build_app, calls):
+    client = TestClient(build_app())
+
+    first = client.get("/items?a=1&b=2")
+    second = client.get("/items?b=2&a=1")
+
+    assert first.headers["X-Cache"] == "MISS"
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.json() == first.json()
+    assert second.headers["ETag"] == '"items"'
+    assert second.headers["Content-Length"] == str(len(second.content))
+    assert len(calls) == 1
+
+
+def test_cached_response_honours_if_none_match(build_app):
+    client = TestClient(build_app())
+    client.get("/items")
+
+    response = client.get("/items", headers={"If-None-Match": '"items"'})
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == '"items"'
+
+
+def test_no_cache_refreshes_the_entry(build_app, calls):
+    client = TestClient(build_app())
+    client.get("/items")
+
+    refreshed = client.get("/items", headers={"Cache-Control": "no-cache"})
+    cached = client.get("/items")
+
+    assert refreshed.headers["X-Cache"] == "MISS"
+    assert cached.json() == refreshed.json() == {"call": 2, "padding": "x"}
+
+
+@pytest.mark.parametrize("params", [{"status": 201}, {"cookie": True}, {"size": 2048}])
+def test_uncacheable_responses_are_not_stored(build_app, calls, params):
+    client = TestClient(build_app())
+
+    client.get("/items", params=params)
+    response = client.get("/items", params=params)
+
+    assert response.headers["X-Cache"] == "MISS"
+    assert len(calls) == 2
+
+
+def test_cors_headers_are_not_replayed_to_other_origins(build_app, calls):
+    client = TestClient(build_app(cors_origins=["https://a.example", "https://b.example"]))
+
+    first = client.get("/items", headers={"Origin": "https://a.example"})
+    second = client.get("/items", headers={"Origin": "https://b.example"})
+    without_origin = client.get("/items")
+
+    assert first.headers["Access-Control-Allow-Origin"] == "https://a.example"
+    assert second.headers["X-Cache"] == without_origin.headers["X-Cache"] == "HIT"
+    assert "Access-Control-Allow-Origin" not in second.headers
+    assert "Access-Control-Allow-Origin" not in without_origin.headers
+    assert "Vary" not in second.headers
+    assert len(calls) == 1
+
+
+def test_invalidation_drops_the_topic(build_app, topic, calls):
+    client = TestClient(build_app())
+    client.get("/items")
+
+    CacheInvalidation.apply(topic, ["any-key"], remote=True)
+
+    assert client.get("/items").headers["X-Cache"] == "MISS"
+    assert len(calls) == 2
+
+
+def test_response_computed_across_an_invalidation_is_not_stored(build_app, calls):
+    client = TestClient(build_app())
+
+    client.get("/invalidating")
+
+    assert client.get("/invalidating").headers["X-Cache"] == "MISS"
+
+
+def test_backend_failures_do_not_fail_requests(build_app):
+    backend = FailingBackend(max_entries=10, max_bytes=1024 * 1024, ttl_in_seconds=60)
+    client = TestClient(build_app(backend=backend))
+
+    assert client.get("/items").status_code == 200
+    assert client.get("/items").status_code == 200
+
+
+async def test_concurrent_misses_run_the_endpoint_once(build_app, calls):
+    transport = httpx.ASGITransport(app=build_app(delay=0.05))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        responses = await asyncio.gather(*(client.get("/items") for _ in range(5)))
+
+    assert len(calls) == 1
+    assert {response.json()["call"] for response in responses} == {1}
@@ -0,0 +1,81 @@
+import asyncio
+import uuid
+
+import pytest
+
+from src import settings
+from src.db.context import DbContext
+from src.db.statement_counter import StatementCounter
+from src.entities import SampleEntity
+from src.services import SampleService
+
+BASE_URL = "/api/v1/samples/"
+
+
+@pytest.fixture
+def created(client, sample_data) -> list[str]:
+    return [client.post(BASE_URL, json=sample_data()).json()["id"] for _ in range(3)]
+
+
+def test_ids_are_returned_in_request_order(client, created):
+    missing_id = str(uuid.uuid4())
+    ids = [created[2], missing_id, created[0], created[2]]
+
+    response = client.get(BASE_URL, params={"ids": ",".join(ids)})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [item["id"] for item in body["items"]] == [created[2], created[0]]
+    assert body["missing_ids"] == [missing_id]
+    assert body["total"] == 2
+    assert response.headers["X-DB-Statements"] == "1"
+
+
+def test_ids_can_be_repeated(client, created):
+    response = client.get(BASE_URL, params=[("ids", created[0]), ("ids", f"{created[1]},{created[2]}")])
+
+    assert [item["id"] for item in response.json()["items"]] == created
+
+
+def test_ids_page_etag(client, created):
+    params = {"ids": ",".join(created)}
+    etag = client.get(BASE_URL, params=params).headers["ETag"]
+
+    assert client.get(BASE_URL, params=params, headers={"If-None-Match": etag}).status_code == 304
+
+
+@pytest.mark.parametrize("params", [
+    {"ids": "not-a-uuid"},
+    {"ids": ","},
+    {"ids": str(uuid.uuid4()), "skip": 1},
+    {"ids": str(uuid.uuid4()), "jsonb_key": "a"},
+])
+def test_invalid_ids_requests(client, params):
+    assert client.get(BASE_URL, params=params).status_code == 400
+
+
+def test_ids_are_limited(client, monkeypatch):
+    monkeypatch.setattr(settings, "sample_batch_get_max_ids", 2)
+
+    response = client.get(BASE_URL, params={"ids": ",".join(str(uuid.uuid4()) for _ in range(3))})
+
+    assert response.status_code == 400
+
+
+async def test_concurrent_get_by_id_calls_share_one_query(db, marker, monkeypatch):
+    monkeypatch.setattr(SampleService, "__entity_cache__", None)
+    service = SampleService()
+    async with DbContext.get_session_async() as session:
+        entities = [
+            await service.create(session, SampleEntity(
+                required_uuid=uuid.uuid4(), string_field=f"{marker}-{n}", required_jsonb={}
+            ))
+            for n in range(3)
+        ]
+
+    async with DbContext.get_session_async(read_only=True) as session:
+        with StatementCounter.track() as count:
+            found = await asyncio.gather(*(service.get_by_id(session, entity.id) for entity in entities))
+
+    assert [entity.id for entity in found] == [entity.id for entity in entities]
+    assert count.value == 1
@@ -0,0 +1,124 @@
+import uuid
+
+import pytest
+
+from src import settings
+
+BASE_URL = "/api/v1/samples/"
+BULK_URL = "/api/v1/samples/bulk"
+
+# Valid for the request schema, rejected by PostgreSQL: "bigint out of range"
+OUT_OF_RANGE = 2 ** 63
+
+
+@pytest.fixture(params=[1000, 2], ids=["one_chunk", "small_chunks"])
+def chunk_size(request, monkeypatch) -> int:
+    monkeypatch.setattr(settings, "sample_bulk_chunk_size", request.param)
+    return request.param
+
+
+def bulk_create(client, items: list[dict]) -> dict:
+    response = client.post(BULK_URL, json={"items": items})
+    assert response.status_code == 200
+    return response.json()
+
+
+def statuses(body: dict) -> list[str]:
+    return [result["status"] for result in body["results"]]
+
+
+def test_bulk_create(client, sample_data, chunk_size):
+    body = bulk_create(client, [sample_data() for _ in range(5)])
+
+    assert statuses(body) == ["created"] * 5
+    assert [result["index"] for result in body["results"]] == list(range(5))
+    assert (body["succeeded"], body["failed"]) == (5, 0)
+    for result in body["results"]:
+        assert client.get(f"{BASE_URL}{result['id']}").status_code == 200
+
+
+def test_bulk_create_reports_failed_items_without_failing_the_others(client, sample_data, chunk_size):
+    items = [sample_data() for _ in range(5)]
+    items[3]["big_int"] = OUT_OF_RANGE
+
+    body = bulk_create(client, items)
+
+    assert statuses(body) == ["created", "created", "created", "failed", "created"]
+    assert (body["succeeded"], body["failed"]) == (4, 1)
+    failed = body["results"][3]
+    assert "out of range" in failed["error"]
+    assert client.get(f"{BASE_URL}{failed['id']}").status_code == 404
+    assert client.get(f"{BASE_URL}{body['results'][4]['id']}").status_code == 200
+
+
+def test_bulk_update(client, sample_data, chunk_size):
+    created = bulk_create(client, [sample_data() for _ in range(3)])["results"]
+    missing_id = str(uuid.uuid4())
+
+    response = client.patch(BULK_URL, json={"items": [
+        {"id": created[0]["id"], "big_int": 10},
+        {"id": missing_id, "big_int": 11},
+        {"id": created[1]["id"], "optional_text": "changed"},
+        {"id": created[2]["id"], "big_int": OUT_OF_RANGE},
+    ]})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert statuses(body) == ["updated", "not_found", "updated", "failed"]
+    assert (body["succeeded"], body["failed"]) == (2, 2)
+
+    first = client.get(f"{BASE_URL}{created[0]['id']}").json()
+    second = client.get(f"{BASE_URL}{created[1]['id']}").json()
+    assert first["big_int"] == 10
+    assert first["optional_text"] is None
+    assert second["optional_text"] == "changed"
+    assert second["big_int"] == 1
+
+
+def test_bulk_update_without_changes_reports_existing_entities(client, sample_data, chunk_size):
+    created = bulk_create(client, [sample_data() for _ in range(2)])["results"]
+    before = client.get(f"{BASE_URL}{created[0]['id']}").json()
+
+    response = client.patch(BULK_URL, json={"items": [
+        {"id": created[0]["id"]},
+        {"id": created[1]["id"], "optional_text": None},
+        {"id": str(uuid.uuid4())},
+    ]})
+
+    assert statuses(response.json()) == ["updated", "updated", "not_found"]
+    # Nothing was written
+    assert client.get(f"{BASE_URL}{created[0]['id']}").json()["modified_on"] == before["modified_on"]
+
+
+def test_bulk_update_merges_items_with_the_same_id(client, sample_data):
+    entity_id = bulk_create(client, [sample_data()])["results"][0]["id"]
+
+    response = client.patch(BULK_URL, json={"items": [
+        {"id": entity_id, "big_int": 10, "optional_text": "first"},
+        {"id": entity_id, "big_int": 20},
+    ]})
+
+    assert statuses(response.json()) == ["updated", "updated"]
+    stored = client.get(f"{BASE_URL}{entity_id}").json()
+    assert (stored["big_int"], stored["optional_text"]) == (20, "first")
+
+
+@pytest.mark.parametrize("hard_delete", [False, True])
+def test_bulk_delete(client, sample_data, hard_delete):
+    created = bulk_create(client, [sample_data() for _ in range(2)])["results"]
+    ids = [result["id"] for result in created]
+    params = {"hard_delete": hard_delete}
+
+    first = client.request("DELETE", BULK_URL, params=params, json={"ids": ids + [str(uuid.uuid4())]})
+    second = client.request("DELETE", BULK_URL, params=params, json={"ids": ids})
+
+    assert statuses(first.json()) == ["deleted", "deleted", "not_found"]
+    assert statuses(second.json()) == ["not_found", "not_found"]
+    for entity_id in ids:
+        assert client.get(f"{BASE_URL}{entity_id}").status_code == 404
+
+
+def test_empty_bulk_requests_are_rejected(client):
+    assert client.post(BULK_URL, json={"items": []}).status_code == 422
+    assert client.patch(BULK_URL, json={"items": []}).status_code == 422
+    assert client.request("DELETE", BULK_URL, json={"ids": []}).status_code == 422
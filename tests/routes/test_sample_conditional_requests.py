@@ -0,0 +1,97 @@
+import uuid
+from datetime import datetime, timezone
+
+import orjson
+import pytest
+
+from src.utils.etag_utils import EtagUtils
+
+BASE_URL = "/api/v1/samples/"
+
+
+@pytest.fixture
+def entity(client, sample_data) -> dict:
+    response = client.post(BASE_URL, json=sample_data())
+    assert response.status_code == 201
+    return {**response.json(), "etag": response.headers["ETag"], "last_modified": response.headers["Last-Modified"]}
+
+
+def test_validators_are_returned_by_writes_and_reads(client, entity):
+    response = client.get(f"{BASE_URL}{entity['id']}")
+
+    assert response.headers["ETag"] == entity["etag"]
+    assert response.headers["Last-Modified"] == entity["last_modified"]
+
+
+def test_if_none_match(client, entity):
+    response = client.get(f"{BASE_URL}{entity['id']}", headers={"If-None-Match": entity["etag"]})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == entity["etag"]
+
+
+def test_if_modified_since(client, entity):
+    response = client.get(f"{BASE_URL}{entity['id']}", headers={"If-Modified-Since": entity["last_modified"]})
+
+    assert response.status_code == 304
+
+
+def test_changed_entity_is_returned_in_full(client, entity):
+    client.patch(f"{BASE_URL}{entity['id']}", json={"big_int": 2})
+
+    response = client.get(f"{BASE_URL}{entity['id']}", headers={"If-None-Match": entity["etag"]})
+
+    assert response.status_code == 200
+    assert response.json()["big_int"] == 2
+    assert response.headers["ETag"] != entity["etag"]
+
+
+def test_list_page_etag(client, marker, entity):
+    params = {"jsonb_contains": orjson.dumps({"marker": marker}).decode()}
+    etag = client.get(BASE_URL, params=params).headers["ETag"]
+
+    assert client.get(BASE_URL, params=params, headers={"If-None-Match": etag}).status_code == 304
+
+    client.patch(f"{BASE_URL}{entity['id']}", json={"big_int": 2})
+    assert client.get(BASE_URL, params=params, headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_update_with_current_if_match(client, entity):
+    response = client.put(f"{BASE_URL}{entity['id']}", json={"big_int": 2}, headers={"If-Match": entity["etag"]})
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != entity["etag"]
+
+
+@pytest.mark.parametrize("method", ["put", "patch"])
+def test_update_with_stale_if_match_fails(client, entity, method):
+    client.patch(f"{BASE_URL}{entity['id']}", json={"big_int": 2})
+
+    response = getattr(client, method)(
+        f"{BASE_URL}{entity['id']}", json={"big_int": 3}, headers={"If-Match": entity["etag"]}
+    )
+
+    assert response.status_code == 412
+    assert client.get(f"{BASE_URL}{entity['id']}").json()["big_int"] == 2
+
+
+def test_update_with_foreign_if_match_fails(client, entity):
+    response = client.put(f"{BASE_URL}{entity['id']}", json={"big_int": 2}, headers={"If-Match": '"something-else"'})
+
+    assert response.status_code == 412
+
+
+def test_update_with_any_if_match(client, entity):
+    response = client.put(f"{BASE_URL}{entity['id']}", json={"big_int": 2}, headers={"If-Match": "*"})
+
+    assert response.status_code == 200
+
+
+def test_update_of_missing_entity_with_if_match(client):
+    missing_id = uuid.uuid4()
+    etag = EtagUtils.entity_etag(missing_id, datetime.now(timezone.utc))
+
+    response = client.put(f"{BASE_URL}{missing_id}", json={"big_int": 2}, headers={"If-Match": etag})
+
+    assert response.status_code == 404
@@ -0,0 +1,70 @@
+import orjson
+import pytest
+
+BASE_URL = "/api/v1/samples/"
+
+
+@pytest.fixture
+def own_entities(client, marker, sample_data) -> dict:
+    """Create three entities and return the list parameters selecting only them."""
+    for _ in range(3):
+        assert client.post(BASE_URL, json=sample_data()).status_code == 201
+    return {"jsonb_contains": orjson.dumps({"marker": marker}).decode()}
+
+
+def get_page(client, **params) -> dict:
+    response = client.get(BASE_URL, params=params)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_exact_total_with_offset_pagination(client, own_entities):
+    page = get_page(client, limit=2, **own_entities)
+
+    assert page["count_mode"] == "exact"
+    assert page["total"] == 3
+    assert len(page["items"]) == 2
+
+
+def test_exact_total_with_cursor_pagination(client, own_entities):
+    first = get_page(client, limit=2, **own_entities)
+    second = get_page(client, limit=2, cursor=first["next_cursor"], **own_entities)
+
+    assert second["total"] == 3
+    assert len(second["items"]) == 1
+
+
+def test_exact_total_past_the_last_page(client, own_entities):
+    page = get_page(client, skip=10, **own_entities)
+
+    assert page["items"] == []
+    assert page["total"] == 3
+
+
+def test_no_total(client, own_entities):
+    page = get_page(client, count_mode="none", **own_entities)
+
+    assert page["count_mode"] == "none"
+    assert page["total"] is None
+    assert len(page["items"]) == 3
+
+
+def test_estimated_total(client, own_entities):
+    page = get_page(client, count_mode="estimated", **own_entities)
+
+    assert page["count_mode"] == "estimated"
+    assert isinstance(page["total"], int)
+    assert page["total"] >= 0
+
+
+def test_cached_total_is_reused(client, own_entities, sample_data):
+    assert get_page(client, count_mode="cached", **own_entities)["total"] == 3
+
+    assert client.post(BASE_URL, json=sample_data()).status_code == 201
+
+    assert get_page(client, count_mode="cached", **own_entities)["total"] == 3
+    assert get_page(client, count_mode="exact", **own_entities)["total"] == 4
+
+
+def test_unknown_count_mode_is_rejected(client):
+    assert client.get(BASE_URL, params={"count_mode": "approximate"}).status_code == 422
@@ -0,0 +1,77 @@
+import csv
+import io
+
+import orjson
+import pytest
+
+from src.entities import SampleEntity
+
+BASE_URL = "/api/v1/samples/"
+EXPORT_URL = "/api/v1/samples/export"
+
+
+@pytest.fixture
+def created(client, sample_data) -> dict:
+    """An active entity, one with every optional field set and a soft deleted one, by name."""
+    active = client.post(BASE_URL, json=sample_data()).json()
+    complete = client.post(BASE_URL, json=sample_data(
+        optional_text="line one\nline, two", optional_jsonb={"nested": {"list": [1, "a"]}}, big_int=42
+    )).json()
+    deleted = client.post(BASE_URL, json=sample_data()).json()
+    assert client.delete(f"{BASE_URL}{deleted['id']}").status_code == 200
+    return {"active": active, "complete": complete, "deleted": deleted}
+
+
+def export(client, **params):
+    response = client.get(EXPORT_URL, params=params)
+    assert response.status_code == 200
+    return response
+
+
+def ndjson_rows(response, marker: str) -> dict:
+    rows = [orjson.loads(line) for line in response.content.splitlines()]
+    return {row["id"]: row for row in rows if row["string_field"].startswith(marker)}
+
+
+def test_ndjson_export(client, marker, created):
+    response = export(client)
+
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers["content-disposition"] == 'attachment; filename="samples.ndjson"'
+
+    rows = ndjson_rows(response, marker)
+    assert set(rows) == {created["active"]["id"], created["complete"]["id"]}
+    row = rows[created["complete"]["id"]]
+    assert list(row) == SampleEntity.__mapper__.columns.keys()
+    assert row["optional_text"] == "line one\nline, two"
+    assert row["optional_jsonb"] == {"nested": {"list": [1, "a"]}}
+    assert row["big_int"] == 42
+
+
+def test_export_includes_inactive_entities_on_request(client, marker, created):
+    rows = ndjson_rows(export(client, include_inactive=True), marker)
+
+    assert set(rows) == {entity["id"] for entity in created.values()}
+    assert rows[created["deleted"]["id"]]["is_deleted"] is True
+
+
+def test_csv_export(client, marker, created):
+    response = export(client, format="csv")
+
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.headers["content-disposition"] == 'attachment; filename="samples.csv"'
+
+    reader = csv.DictReader(io.StringIO(response.text))
+    assert reader.fieldnames == SampleEntity.__mapper__.columns.keys()
+    rows = {row["id"]: row for row in reader if row["string_field"].startswith(marker)}
+    assert set(rows) == {created["active"]["id"], created["complete"]["id"]}
+
+    complete = rows[created["complete"]["id"]]
+    assert complete["optional_text"] == "line one\nline, two"
+    assert orjson.loads(complete["optional_jsonb"]) == {"nested": {"list": [1, "a"]}}
+    assert complete["big_int"] == "42"
+    assert rows[created["active"]["id"]]["optional_text"] == ""
+
+
+def test_unknown_export_format_is_rejected(client):
+    assert client.get(EXPORT_URL, params={"format": "xml"}).status_code == 422
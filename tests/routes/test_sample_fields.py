@@ -0,0 +1,64 @@
+import orjson
+import pytest
+
+BASE_URL = "/api/v1/samples/"
+
+
+@pytest.fixture
+def created(client, sample_data) -> list[dict]:
+    return [client.post(BASE_URL, json=sample_data(big_int=n)).json() for n in range(3)]
+
+
+def test_entity_fields(client, created):
+    entity = created[0]
+
+    response = client.get(f"{BASE_URL}{entity['id']}", params={"fields": "big_int, string_field"})
+
+    assert response.status_code == 200
+    # In response model order, whatever the requested order
+    assert list(response.json().items()) == [("string_field", entity["string_field"]), ("big_int", 0)]
+    assert response.headers["ETag"] == client.get(f"{BASE_URL}{entity['id']}").headers["ETag"]
+
+
+def test_list_fields_keep_cursors_and_etags(client, marker, created):
+    params = {"fields": "id,big_int", "limit": 2, "jsonb_contains": orjson.dumps({"marker": marker}).decode()}
+
+    first = client.get(BASE_URL, params=params).json()
+    second = client.get(BASE_URL, params={**params, "cursor": first["next_cursor"]}).json()
+
+    assert first["items"] == [{"id": created[2]["id"], "big_int": 2}, {"id": created[1]["id"], "big_int": 1}]
+    assert second["items"] == [{"id": created[0]["id"], "big_int": 0}]
+    assert first["total"] == 3
+
+
+def test_list_fields_change_the_etag_only_with_the_data(client, marker, created):
+    params = {"jsonb_contains": orjson.dumps({"marker": marker}).decode()}
+    # Uncompressed, since a compressed response carries its ETag suffixed with the coding
+    headers = {"Accept-Encoding": "identity"}
+
+    full = client.get(BASE_URL, params=params, headers=headers).headers["ETag"]
+    sparse = client.get(BASE_URL, params={**params, "fields": "big_int"}, headers=headers)
+
+    assert sparse.headers["ETag"] == full
+    assert sparse.json()["items"] == [{"big_int": 2}, {"big_int": 1}, {"big_int": 0}]
+
+
+def test_ids_fields(client, created):
+    response = client.get(BASE_URL, params={"ids": created[1]["id"], "fields": "string_field"})
+
+    assert response.json()["items"] == [{"string_field": created[1]["string_field"]}]
+
+
+def test_search_fields(client, marker, created):
+    params = {"q": marker, "mode": "prefix", "fields": "big_int", "limit": 2}
+
+    response = client.get(f"{BASE_URL}search/by-string", params=params)
+
+    assert response.json() == [{"big_int": 2}, {"big_int": 1}]
+    assert "X-Next-Cursor" in response.headers
+
+
+@pytest.mark.parametrize("fields", ["", " , ", "id,secret", "search_vector"])
+def test_invalid_fields(client, created, fields):
+    assert client.get(f"{BASE_URL}{created[0]['id']}", params={"fields": fields}).status_code == 400
+    assert client.get(BASE_URL, params={"fields": fields}).status_code == 400
@@ -0,0 +1,122 @@
+import uuid
+from datetime import datetime, timezone
+
+import orjson
+from sqlalchemy import select
+
+from src import settings
+from src.entities import SampleEntity
+
+BASE_URL = "/api/v1/samples/"
+IMPORT_URL = "/api/v1/samples/import"
+
+
+def ndjson(*records) -> bytes:
+    return b"".join(orjson.dumps(record) + b"\n" for record in records)
+
+
+def import_body(client, body, **params) -> dict:
+    response = client.post(IMPORT_URL, params=params, content=body)
+    assert response.status_code == 200
+    return response.json()
+
+
+def search(client, marker: str) -> list:
+    return client.get(f"{BASE_URL}search/by-string", params={"q": marker, "mode": "prefix"}).json()
+
+
+def test_ndjson_import_skips_and_reports_invalid_rows(client, marker, sample_data):
+    body = ndjson(sample_data(), {"string_field": f"{marker}-invalid"}, sample_data()) + b"not json\n"
+
+    result = import_body(client, body)
+
+    assert result["rows_loaded"] == 2
+    assert result["rows_rejected"] == 2
+    assert [row["line"] for row in result["rejected"]] == [2, 4]
+    assert "required_uuid" in result["rejected"][0]["error"]
+    assert len(search(client, marker)) == 2
+
+
+def test_import_body_is_read_as_it_arrives(client, marker, sample_data):
+    body = ndjson(*(sample_data() for _ in range(20)))
+    chunks = (body[start:start + 7] for start in range(0, len(body), 7))
+
+    result = import_body(client, chunks)
+
+    assert (result["rows_loaded"], result["rows_rejected"]) == (20, 0)
+    assert len(search(client, marker)) == 20
+
+
+def test_import_replaces_existing_entities(client, sample_data):
+    existing = client.post(BASE_URL, json=sample_data(big_int=1)).json()
+    replacement = sample_data(id=existing["id"], big_int=2, optional_text="replaced")
+
+    result = import_body(client, ndjson(replacement))
+
+    assert result["rows_loaded"] == 1
+    stored = client.get(f"{BASE_URL}{existing['id']}").json()
+    assert stored["big_int"] == 2
+    assert stored["optional_text"] == "replaced"
+    assert stored["string_field"] == replacement["string_field"]
+    assert stored["created_on"] == existing["created_on"]
+
+
+def test_last_duplicate_row_wins(client, sample_data):
+    entity_id = str(uuid.uuid4())
+
+    result = import_body(client, ndjson(sample_data(id=entity_id, big_int=1), sample_data(id=entity_id, big_int=2)))
+
+    assert result["rows_loaded"] == 1
+    assert client.get(f"{BASE_URL}{entity_id}").json()["big_int"] == 2
+
+
+def test_import_keeps_exported_deletions_and_creation_times(client, sync_engine, sample_data):
+    existing = client.post(BASE_URL, json=sample_data()).json()
+    new_id = str(uuid.uuid4())
+    rows = [
+        {**existing, "is_deleted": True, "created_on": "2020-01-02T03:04:05+00:00"},
+        sample_data(id=new_id, is_deleted=True, created_on="2020-01-02T03:04:05+00:00"),
+    ]
+
+    assert import_body(client, ndjson(*rows))["rows_loaded"] == 2
+
+    table = SampleEntity.__table__
+    with sync_engine.connect() as connection:
+        stored = {
+            str(row.id): row for row in connection.execute(
+                select(table.c.id, table.c.is_deleted, table.c.created_on).where(table.c.id.in_([existing["id"], new_id]))
+            )
+        }
+    assert stored[existing["id"]].is_deleted and stored[new_id].is_deleted
+    # A replaced entity keeps its creation time, a new one takes the exported one
+    assert stored[existing["id"]].created_on == datetime.fromisoformat(existing["created_on"])
+    assert stored[new_id].created_on == datetime(2020, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+
+
+def test_csv_import(client, marker):
+    body = (
+        "string_field,required_uuid,required_jsonb,optional_text,big_int\r\n"
+        f'{marker}-a,{uuid.uuid4()},"{{""k"": [1, 2]}}","two\nlines",7\r\n'
+        f"{marker}-b,{uuid.uuid4()},{{}},,\r\n"
+        f"{marker}-c,not-a-uuid,{{}},,\r\n"
+    ).encode()
+
+    result = import_body(client, body, format="csv")
+
+    assert (result["rows_loaded"], result["rows_rejected"]) == (2, 1)
+    assert result["rejected"][0]["line"] == 5
+    by_name = {item["string_field"]: item for item in search(client, marker)}
+    assert by_name[f"{marker}-a"]["required_jsonb"] == {"k": [1, 2]}
+    assert by_name[f"{marker}-a"]["optional_text"] == "two\nlines"
+    assert by_name[f"{marker}-a"]["big_int"] == 7
+    assert by_name[f"{marker}-b"]["optional_text"] is None
+    assert by_name[f"{marker}-b"]["big_int"] == 1
+
+
+def test_reported_rejections_are_capped(client, monkeypatch):
+    monkeypatch.setattr(settings, "sample_import_max_reported_rejections", 1)
+
+    result = import_body(client, b"[]\n[]\n[]\n")
+
+    assert (result["rows_loaded"], result["rows_rejected"]) == (0, 3)
+    assert result["rejected"] == [{"line": 1, "error": "Expected a JSON object"}]
@@ -0,0 +1,115 @@
+from datetime import datetime, timezone
+from uuid import UUID
+
+import pytest
+
+from src.routes.sample.importers import iter_csv_records, iter_lines, iter_ndjson_records, validate_import_record
+from src.routes.sample.schemas import ExportFormat
+
+REQUIRED_UUID = "12345678-1234-5678-1234-567812345678"
+
+
+async def stream(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+async def collect(records) -> list:
+    return [record async for record in records]
+
+
+async def test_lines_split_across_chunks():
+    lines = await collect(iter_lines(stream(b"first\nsec", b"ond\n", b"third")))
+
+    assert lines == [(1, b"first"), (2, b"second"), (3, b"third")]
+
+
+async def test_csv_records():
+    records = await collect(iter_csv_records(stream(
+        b"string_field,optional_text\n",
+        b'a,"spans\ntwo lines"\n',
+        b"\n",
+        b"b,plain\n",
+    )))
+
+    assert records == [
+        (2, {"string_field": "a", "optional_text": "spans\ntwo lines"}),
+        (5, {"string_field": "b", "optional_text": "plain"}),
+    ]
+
+
+async def test_csv_record_errors():
+    records = await collect(iter_csv_records(stream(
+        b"string_field,optional_text\n",
+        b"only one field\n",
+        b"\xff,x\n",
+        b'c,"never closed\n',
+    )))
+
+    assert records == [
+        (2, "Expected 2 fields, got 1"),
+        (3, "Line is not valid UTF-8"),
+        (4, "Unterminated quoted field"),
+    ]
+
+
+async def test_ndjson_records():
+    records = await collect(iter_ndjson_records(stream(b'{"a": 1}\n\n[1]\n{broken\n{"b": 2}')))
+
+    assert records[0] == (1, {"a": 1})
+    assert records[1] == (3, "Expected a JSON object")
+    assert records[2][0] == 4 and records[2][1].startswith("Invalid JSON")
+    assert records[3] == (5, {"b": 2})
+
+
+def test_validate_csv_record():
+    record = {
+        "required_uuid": REQUIRED_UUID,
+        "string_field": "a",
+        "required_jsonb": '{"k": [1]}',
+        "optional_jsonb": "",
+        "optional_text": "",
+        "big_int": "5",
+    }
+
+    assert validate_import_record(record, ExportFormat.CSV) == {
+        "required_uuid": UUID(REQUIRED_UUID),
+        "string_field": "a",
+        "required_jsonb": {"k": [1]},
+        "big_int": 5,
+        "is_active": True,
+        "is_deleted": False,
+    }
+
+
+def test_validate_csv_record_with_invalid_json():
+    record = {"required_uuid": REQUIRED_UUID, "string_field": "a", "required_jsonb": "{"}
+
+    with pytest.raises(ValueError, match="required_jsonb: invalid JSON"):
+        validate_import_record(record, ExportFormat.CSV)
+
+
+def test_validate_record_lists_every_error():
+    with pytest.raises(ValueError) as error:
+        validate_import_record({"string_field": "", "big_int": -1}, ExportFormat.NDJSON)
+
+    message = str(error.value)
+    for field in ("required_uuid", "string_field", "required_jsonb", "big_int"):
+        assert f"{field}:" in message
+
+
+def test_validate_exported_record():
+    record = {
+        "required_uuid": REQUIRED_UUID,
+        "string_field": "a",
+        "required_jsonb": "{}",
+        "is_deleted": "true",
+        "created_on": "2020-01-02T03:04:05+00:00",
+        "modified_on": "2021-01-02T03:04:05+00:00",
+    }
+
+    row = validate_import_record(record, ExportFormat.CSV)
+
+    assert row["is_deleted"] is True
+    assert row["created_on"] == datetime(2020, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+    assert "modified_on" not in row
@@ -0,0 +1,135 @@
+import orjson
+import pytest
+from sqlalchemy import event
+
+from src.db.context import DbContext
+from src.services.sample_service import JsonbColumn, JsonbFilter, SampleService
+
+BASE_URL = "/api/v1/samples/"
+
+
+@pytest.fixture
+def created(client, marker, sample_data) -> dict:
+    documents = {
+        "red": {"status": "active", "tags": ["red", "blue"], "size": {"height": 1}},
+        "blue": {"status": "active", "tags": ["blue"], "size": {"height": 2}},
+        "plain": {"status": "inactive"},
+    }
+    return {
+        name: client.post(BASE_URL, json=sample_data(
+            required_jsonb={"marker": marker, **document},
+            optional_jsonb={"owner": marker, "name": name} if name != "plain" else None
+        )).json()["id"]
+        for name, document in documents.items()
+    }
+
+
+def names(client, created: dict, **params) -> set:
+    response = client.get(BASE_URL, params=params)
+    assert response.status_code == 200, response.text
+    by_id = {entity_id: name for name, entity_id in created.items()}
+    return {by_id[item["id"]] for item in response.json()["items"]}
+
+
+def contains(document: dict) -> str:
+    return orjson.dumps(document).decode()
+
+
+def test_contains(client, marker, created):
+    assert names(client, created, jsonb_contains=contains({"marker": marker, "status": "active"})) == {"red", "blue"}
+    assert names(client, created, jsonb_contains=contains({"marker": marker, "tags": ["red"]})) == {"red"}
+
+
+def test_keys(client, marker, created):
+    params = {"jsonb_contains": contains({"marker": marker})}
+
+    assert names(client, created, jsonb_key="tags", **params) == {"red", "blue"}
+    assert names(client, created, jsonb_key=["tags", "status"], **params) == {"red", "blue"}
+    assert names(client, created, jsonb_key="missing", **params) == set()
+
+
+def test_path(client, marker, created):
+    params = {"jsonb_contains": contains({"marker": marker})}
+
+    assert names(client, created, jsonb_path='$.tags[*] == "red"', **params) == {"red"}
+    assert names(client, created, jsonb_path="$.size.height == 2", **params) == {"blue"}
+
+
+def test_optional_column(client, marker, created):
+    assert names(client, created, jsonb_column="optional_jsonb", jsonb_contains=contains({"owner": marker})) == {
+        "red", "blue"
+    }
+
+
+def test_filters_are_combined(client, marker, created):
+    params = {
+        "jsonb_contains": contains({"marker": marker, "status": "active"}),
+        "jsonb_key": "tags",
+        "jsonb_path": "$.size.height > 1",
+    }
+
+    assert names(client, created, **params) == {"blue"}
+
+
+@pytest.mark.parametrize("count_mode, total", [("exact", 2), ("cached", 2), ("none", None)])
+def test_filtered_totals(client, marker, created, count_mode, total):
+    params = {"jsonb_contains": contains({"marker": marker, "status": "active"}), "count_mode": count_mode}
+
+    assert client.get(BASE_URL, params=params).json()["total"] == total
+
+
+def test_filtered_estimate(client, marker, created):
+    params = {"jsonb_contains": contains({"marker": marker, "note": "a:b"}), "count_mode": "estimated"}
+
+    response = client.get(BASE_URL, params=params)
+
+    assert response.status_code == 200
+    assert isinstance(response.json()["total"], int)
+
+
+@pytest.mark.parametrize("note", ["a:b", "100% :name", "it's \\ %(x)s"])
+def test_filtered_estimate_with_special_characters(client, marker, created, note):
+    params = {
+        "jsonb_contains": contains({"marker": marker, "note": note}),
+        "jsonb_path": f'$.note == {orjson.dumps(note).decode()}',
+        "count_mode": "estimated",
+    }
+
+    response = client.get(BASE_URL, params=params)
+
+    assert response.status_code == 200, response.text
+    assert isinstance(response.json()["total"], int)
+
+
+async def test_estimate_sends_filter_values_as_parameters(db, marker):
+    statements = []
+    jsonb_filter = JsonbFilter(column=JsonbColumn.REQUIRED, contains=contains({"marker": marker}))
+
+    async with DbContext.get_session_async(read_only=True) as session:
+        engine = (await session.connection()).engine.sync_engine
+        listener = lambda conn, cursor, statement, parameters, context, executemany: statements.append(
+            (statement, parameters)
+        )
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            await SampleService().estimate_count(session, jsonb_filter=jsonb_filter)
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+
+    statement, parameters = statements[-1]
+    assert statement.startswith("EXPLAIN (FORMAT JSON)")
+    assert marker not in statement
+    assert contains({"marker": marker}) in parameters.values()
+
+
+@pytest.mark.parametrize("params, message", [
+    ({"jsonb_contains": "{not json"}, "jsonb_contains must be valid JSON"),
+    ({"jsonb_contains": '"text"'}, "jsonb_contains must be a JSON object or array"),
+    ({"jsonb_path": " "}, "jsonb_path cannot be empty"),
+    ({"jsonb_path": "$.a ==="}, "Invalid JSONPath"),
+])
+def test_invalid_filters(client, params, message):
+    response = client.get(BASE_URL, params=params)
+
+    assert response.status_code == 400
+    assert response.json()["error"]["message"].startswith(message)
@@ -0,0 +1,76 @@
+import uuid
+
+import orjson
+import pytest
+from sqlalchemy import delete, select
+
+from src import settings
+from src.entities import EventQueueMessage
+from src.services import SampleService
+
+BASE_URL = "/api/v1/samples/"
+BULK_URL = "/api/v1/samples/bulk"
+IMPORT_URL = "/api/v1/samples/import"
+
+# Valid for the request schema, rejected by PostgreSQL: "bigint out of range"
+OUT_OF_RANGE = 2 ** 63
+
+
+@pytest.fixture
+def events(monkeypatch, sync_engine):
+    """Enable the outbox; returns the queued events of the given entity IDs, which are deleted afterwards."""
+    monkeypatch.setattr(settings, "sample_outbox_enabled", True)
+    table = EventQueueMessage.__table__
+    keys = set()
+
+    def queued(*entity_ids: str) -> list:
+        keys.update(entity_ids)
+        with sync_engine.connect() as connection:
+            rows = connection.execute(select(table.c.key, table.c.payload).where(
+                table.c.queue == SampleService.EVENTS_QUEUE, table.c.key.in_(entity_ids)
+            ).order_by(table.c.id)).all()
+        for key, payload in rows:
+            assert payload["id"] == key
+        return [payload["type"] for _, payload in rows]
+
+    yield queued
+    with sync_engine.begin() as connection:
+        connection.execute(delete(table).where(table.c.key.in_(keys)))
+
+
+def test_writes_publish_an_event_per_entity(client, sample_data, events):
+    entity_id = client.post(BASE_URL, json=sample_data()).json()["id"]
+    client.patch(f"{BASE_URL}{entity_id}", json={"big_int": 2})
+    client.delete(f"{BASE_URL}{entity_id}")
+
+    assert events(entity_id) == ["sample.created", "sample.updated", "sample.deleted"]
+
+
+def test_bulk_writes_publish_events_for_the_items_written(client, sample_data, events):
+    items = [sample_data() for _ in range(3)]
+    items[1]["big_int"] = OUT_OF_RANGE
+    results = client.post(BULK_URL, json={"items": items}).json()["results"]
+    ids = [result["id"] for result in results]
+
+    client.patch(BULK_URL, json={"items": [{"id": ids[0], "big_int": 2}]})
+    client.request("DELETE", BULK_URL, json={"ids": [ids[2]]})
+
+    assert events(ids[0]) == ["sample.created", "sample.updated"]
+    assert events(ids[1]) == []
+    assert events(ids[2]) == ["sample.created", "sample.deleted"]
+
+
+def test_import_publishes_an_event_per_imported_entity(client, sample_data, events):
+    records = [sample_data(id=str(uuid.uuid4())) for _ in range(2)]
+    body = b"".join(orjson.dumps(record) + b"\n" for record in records)
+
+    assert client.post(IMPORT_URL, content=body).status_code == 200
+    assert events(*(record["id"] for record in records)) == ["sample.upserted"] * 2
+
+
+def test_writes_publish_nothing_with_the_outbox_disabled(client, sample_data, events, monkeypatch):
+    monkeypatch.setattr(settings, "sample_outbox_enabled", False)
+
+    entity_id = client.post(BASE_URL, json=sample_data()).json()["id"]
+
+    assert events(entity_id) == []
@@ -0,0 +1,104 @@
+import uuid
+from datetime import datetime
+
+import orjson
+import pytest
+
+from src.db.context import DbContext
+from src.entities import SampleEntity
+from src.services.sample_service import SampleService
+
+BASE_URL = "/api/v1/samples/"
+
+
+def create_entities(client, sample_data, count: int) -> list[str]:
+    ids = []
+    for _ in range(count):
+        response = client.post(BASE_URL, json=sample_data())
+        assert response.status_code == 201
+        ids.append(response.json()["id"])
+    return ids
+
+
+def own_entities(marker: str) -> dict:
+    return {"jsonb_contains": orjson.dumps({"marker": marker}).decode()}
+
+
+def any_cursor() -> str:
+    return SampleService.next_cursor([SampleEntity(id=uuid.uuid4(), created_on=datetime.now())], 1)
+
+
+def test_cursor_pages_cover_every_entity_once(client, marker, sample_data):
+    created = create_entities(client, sample_data, 5)
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": 2, **own_entities(marker)}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get(BASE_URL, params=params)
+        assert response.status_code == 200
+        page = response.json()
+        seen.extend(item["id"] for item in page["items"])
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert pages == 3
+    assert len(seen) == len(set(seen)) == 5
+    # Newest first
+    assert seen == list(reversed(created))
+
+
+def test_cursor_matches_offset_pagination(client, marker, sample_data):
+    create_entities(client, sample_data, 4)
+
+    first = client.get(BASE_URL, params={"limit": 2, **own_entities(marker)}).json()
+    by_cursor = client.get(BASE_URL, params={"limit": 2, "cursor": first["next_cursor"], **own_entities(marker)})
+    by_offset = client.get(BASE_URL, params={"limit": 2, "skip": 2, **own_entities(marker)})
+
+    assert [item["id"] for item in by_cursor.json()["items"]] == [item["id"] for item in by_offset.json()["items"]]
+
+
+@pytest.mark.parametrize("url, params", [
+    (BASE_URL, {}),
+    (f"{BASE_URL}search/by-string", {"q": "term"}),
+    (f"{BASE_URL}search/by-string", {"q": "term", "mode": "prefix"}),
+])
+def test_cursor_and_skip_cannot_be_combined(client, url, params):
+    response = client.get(url, params={"skip": 1, "cursor": any_cursor(), **params})
+
+    assert response.status_code == 400
+    assert response.json()["error"]["message"] == "Use either skip or cursor for pagination, not both"
+
+
+async def test_the_service_rejects_a_cursor_with_an_offset(db):
+    async with DbContext.get_session_async(read_only=True) as session:
+        with pytest.raises(ValueError, match="not both"):
+            await SampleService().get_all(session, skip=1, cursor=any_cursor())
+
+
+def test_malformed_cursor_is_rejected(client):
+    response = client.get(BASE_URL, params={"cursor": "not-a-cursor"})
+
+    assert response.status_code == 400
+    assert response.json()["error"]["message"] == "Invalid cursor"
+
+
+def test_search_cursor_is_returned_in_header(client, marker, sample_data):
+    created = create_entities(client, sample_data, 3)
+
+    first = client.get(f"{BASE_URL}search/by-string", params={"q": marker, "mode": "prefix", "limit": 2})
+    assert first.status_code == 200
+    assert "X-Next-Cursor" in first.headers
+
+    second = client.get(
+        f"{BASE_URL}search/by-string",
+        params={"q": marker, "mode": "prefix", "limit": 2, "cursor": first.headers["X-Next-Cursor"]}
+    )
+    assert second.status_code == 200
+    assert "X-Next-Cursor" not in second.headers
+
+    seen = [item["id"] for item in first.json() + second.json()]
+    assert seen == list(reversed(created))
@@ -0,0 +1,40 @@
+import orjson
+
+BASE_URL = "/api/v1/samples/"
+
+
+def test_list_is_cached_until_a_write(client, marker, sample_data):
+    params = {"jsonb_contains": orjson.dumps({"marker": marker}).decode()}
+    client.post(BASE_URL, json=sample_data())
+
+    first = client.get(BASE_URL, params=params)
+    cached = client.get(BASE_URL, params=params)
+    assert (first.headers["X-Cache"], cached.headers["X-Cache"]) == ("MISS", "HIT")
+    assert cached.headers["X-DB-Statements"] == "0"
+    assert cached.json() == first.json()
+
+    client.post(BASE_URL, json=sample_data())
+
+    refreshed = client.get(BASE_URL, params=params)
+    assert refreshed.headers["X-Cache"] == "MISS"
+    assert refreshed.json()["total"] == 2
+
+
+def test_entity_reads_are_not_cached(client, sample_data):
+    entity_id = client.post(BASE_URL, json=sample_data()).json()["id"]
+
+    assert "X-Cache" not in client.get(f"{BASE_URL}{entity_id}").headers
+
+
+def test_cors_headers_follow_each_origin(client, marker):
+    params = {"jsonb_contains": orjson.dumps({"marker": marker}).decode()}
+    # With a cookie, the allowed origin is echoed back rather than "*"
+    client.cookies.set("session", "1")
+
+    first = client.get(BASE_URL, params=params, headers={"Origin": "https://a.example"})
+    second = client.get(BASE_URL, params=params, headers={"Origin": "https://b.example"})
+
+    assert second.headers["X-Cache"] == "HIT"
+    assert first.headers["Access-Control-Allow-Origin"] == "https://a.example"
+    assert second.headers["Access-Control-Allow-Origin"] == "https://b.example"
+    assert "Origin" in second.headers["Vary"]
@@ -0,0 +1,97 @@
+import uuid
+
+import pytest
+
+SEARCH_URL = "/api/v1/samples/search/by-string"
+
+
+def search(client, q: str, **params) -> list:
+    response = client.get(SEARCH_URL, params={"q": q, **params})
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.fixture
+def created(client, sample_data) -> list[dict]:
+    entities = []
+    for _ in range(3):
+        response = client.post("/api/v1/samples/", json=sample_data())
+        assert response.status_code == 201
+        entities.append(response.json())
+    return entities
+
+
+def test_substring_search_is_case_insensitive(client, marker, created):
+    results = search(client, marker[5:25].upper())
+
+    assert {item["id"] for item in results} == {entity["id"] for entity in created}
+
+
+def test_prefix_search_is_newest_first(client, marker, created):
+    results = search(client, marker.upper(), mode="prefix")
+
+    assert [item["id"] for item in results] == [entity["id"] for entity in reversed(created)]
+
+
+def test_prefix_search_only_matches_the_start(client, marker, created):
+    assert search(client, marker[5:25], mode="prefix") == []
+
+
+def test_prefix_search_lowers_the_term_like_the_database(client, marker, sample_data):
+    # Python lowers "İ" to "i" and a combining dot, PostgreSQL to a plain "i"
+    entity = client.post("/api/v1/samples/", json=sample_data(string_field=f"{marker}İstanbul")).json()
+
+    assert [item["id"] for item in search(client, f"{marker}İst", mode="prefix")] == [entity["id"]]
+
+
+@pytest.mark.parametrize("mode", ["substring", "prefix"])
+def test_like_wildcards_are_matched_literally(client, marker, created, mode):
+    assert search(client, f"{marker}%", mode=mode) == []
+    assert search(client, f"{marker[:-1]}_", mode=mode) == []
+
+
+def test_fulltext_search_uses_web_search_syntax(client, sample_data):
+    word = f"w{uuid.uuid4().hex}"
+    kept = client.post("/api/v1/samples/", json=sample_data(optional_text=f"lorem {word} ipsum")).json()
+    client.post("/api/v1/samples/", json=sample_data(optional_text=f"{word} excluded"))
+
+    results = search(client, f"{word} -excluded", mode="fulltext")
+
+    assert [item["id"] for item in results] == [kept["id"]]
+
+
+def test_fulltext_search_is_most_relevant_first(client, sample_data):
+    word = f"w{uuid.uuid4().hex}"
+    once = client.post("/api/v1/samples/", json=sample_data(optional_text=word)).json()
+    twice = client.post("/api/v1/samples/", json=sample_data(optional_text=f"{word} {word}")).json()
+
+    results = search(client, word, mode="fulltext")
+
+    assert [item["id"] for item in results] == [twice["id"], once["id"]]
+
+
+@pytest.mark.parametrize("mode", ["substring", "fulltext"])
+def test_ranked_search_cursor_pages_cover_every_match_once(client, marker, sample_data, mode):
+    word = f"w{uuid.uuid4().hex}"
+    created = {
+        client.post("/api/v1/samples/", json=sample_data(string_field=f"{marker}-{word}-{n}", optional_text=word)).json()["id"]
+        for n in range(5)
+    }
+
+    seen, cursor = [], None
+    while True:
+        params = {"q": word, "mode": mode, "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get(SEARCH_URL, params=params)
+        seen.extend(item["id"] for item in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    assert len(seen) == len(set(seen))
+    assert set(seen) == created
+
+
+def test_unknown_search_mode_is_rejected(client):
+    assert client.get(SEARCH_URL, params={"q": "a", "mode": "regex"}).status_code == 422
@@ -0,0 +1,40 @@
+import orjson
+import pytest
+
+from src import settings
+
+BASE_URL = "/api/v1/samples/"
+
+
+@pytest.fixture
+def created(client, sample_data) -> list[str]:
+    return [
+        client.post(BASE_URL, json=sample_data()).json()["id"],
+        client.post(BASE_URL, json=sample_data(
+            optional_text="naïve – ünïcode ✓", optional_jsonb={"nested": [1, 2.5, None, {"b": True}]}, big_int=2 ** 40
+        )).json()["id"],
+    ]
+
+
+def reads(marker: str, created: list[str]) -> list[tuple[str, dict]]:
+    return [
+        (f"{BASE_URL}{created[1]}", {}),
+        (BASE_URL, {"jsonb_contains": orjson.dumps({"marker": marker}).decode()}),
+        (BASE_URL, {"ids": ",".join(reversed(created))}),
+        (f"{BASE_URL}search/by-string", {"q": marker, "mode": "prefix"}),
+    ]
+
+
+def test_fast_serialization_gives_the_same_responses(client, marker, created, monkeypatch):
+    responses = {}
+    for fast in (False, True):
+        monkeypatch.setattr(settings, "sample_fast_serialization", fast)
+        for url, params in reads(marker, created):
+            # no-cache, so that the second pass is not answered from the response cache
+            response = client.get(url, params=params, headers={"Cache-Control": "no-cache"})
+            assert response.status_code == 200
+            responses.setdefault((url, tuple(params.items())), []).append(response)
+
+    for slow, fast in responses.values():
+        assert fast.content == slow.content
+        assert fast.headers.get("ETag") == slow.headers.get("ETag")
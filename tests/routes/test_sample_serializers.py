@@ -0,0 +1,33 @@
+from datetime import datetime, timezone
+from uuid import UUID
+
+from src.routes.sample.serializers import encode_csv, encode_csv_header, entity_dict, row_dicts
+
+
+def test_csv_header():
+    assert encode_csv_header(["id", "string_field"]) == b"id,string_field\r\n"
+
+
+def test_csv_values():
+    entity_id = UUID("12345678-1234-5678-1234-567812345678")
+    modified_on = datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+
+    encoded = encode_csv([(entity_id, 'say "hi", twice', {"a": [1, 2]}, None, modified_on, 7)])
+
+    assert encoded == (
+        b'12345678-1234-5678-1234-567812345678,"say ""hi"", twice","{""a"":[1,2]}",,'
+        b'2024-01-02T03:04:05+00:00,7\r\n'
+    )
+
+
+def test_row_dicts_drop_trailing_columns():
+    assert row_dicts([("a", 1, "extra")], ["string_field", "big_int"]) == [{"string_field": "a", "big_int": 1}]
+
+
+def test_entity_dict():
+    class Entity:
+        string_field = "a"
+        big_int = 2
+        optional_text = None
+
+    assert entity_dict(Entity(), ["big_int", "optional_text"]) == {"big_int": 2, "optional_text": None}
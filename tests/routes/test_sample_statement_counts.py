@@ -0,0 +1,80 @@
+import pytest
+from sqlalchemy import delete
+
+from src import settings
+from src.db.cache_invalidation import CacheInvalidation
+from src.entities import EventQueueMessage, SampleEntity
+
+BASE_URL = "/api/v1/samples/"
+TOPIC = SampleEntity.__tablename__
+
+
+def statements(response) -> int:
+    return int(response.headers["X-DB-Statements"])
+
+
+def write_statements(client, sample_data) -> dict:
+    """Statements of a create, an update and a delete of one entity, as documented in CRUD_API.md."""
+    created = client.post(BASE_URL, json=sample_data())
+    entity_id = created.json()["id"]
+    updated = client.patch(f"{BASE_URL}{entity_id}", json={"big_int": 2})
+    deleted = client.delete(f"{BASE_URL}{entity_id}")
+    assert (created.status_code, updated.status_code, deleted.status_code) == (201, 200, 200)
+    return {"POST": statements(created), "PATCH": statements(updated), "DELETE": statements(deleted)}
+
+
+def keep_handlers(monkeypatch, keep):
+    handlers = {TOPIC: [handler for handler in CacheInvalidation.__handlers__[TOPIC] if keep(handler)]}
+    monkeypatch.setattr(CacheInvalidation, "__handlers__", handlers)
+
+
+def test_write_statements_with_default_caches(client, sample_data):
+    assert write_statements(client, sample_data) == {"POST": 2, "PATCH": 2, "DELETE": 2}
+
+
+def test_write_statements_with_entity_cache_only(client, sample_data, monkeypatch):
+    # The entity cache skips inserts, but the response caches of other workers take them
+    keep_handlers(monkeypatch, lambda handler: not handler[2])
+
+    assert write_statements(client, sample_data) == {"POST": 2, "PATCH": 2, "DELETE": 2}
+
+
+def test_write_statements_with_caches_disabled(client, sample_data, monkeypatch):
+    keep_handlers(monkeypatch, lambda handler: False)
+
+    assert write_statements(client, sample_data) == {"POST": 1, "PATCH": 1, "DELETE": 1}
+
+
+@pytest.fixture
+def outbox(monkeypatch, sync_engine):
+    monkeypatch.setattr(settings, "sample_outbox_enabled", True)
+    queued = []
+    yield queued
+    table = EventQueueMessage.__table__
+    with sync_engine.begin() as connection:
+        connection.execute(delete(table).where(table.c.key.in_(queued)))
+
+
+def test_outbox_adds_one_statement_per_write(client, sample_data, outbox):
+    created = client.post(BASE_URL, json=sample_data())
+    outbox.append(created.json()["id"])
+
+    assert statements(created) == 3
+
+
+def test_missing_entity_costs_one_statement(client):
+    missing_id = "00000000-0000-0000-0000-000000000000"
+
+    assert statements(client.patch(f"{BASE_URL}{missing_id}", json={"big_int": 2})) == 1
+    assert statements(client.delete(f"{BASE_URL}{missing_id}")) == 1
+
+
+def test_update_returns_the_written_entity(client, sample_data):
+    created = client.post(BASE_URL, json=sample_data()).json()
+
+    updated = client.patch(f"{BASE_URL}{created['id']}", json={"big_int": 2}).json()
+
+    assert updated["big_int"] == 2
+    assert updated["string_field"] == created["string_field"]
+    assert updated["created_on"] == created["created_on"]
+    assert updated["modified_on"] > created["modified_on"]
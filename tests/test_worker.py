@@ -0,0 +1,155 @@
+import asyncio
+import os
+import signal
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+from src import settings
+from src import worker as worker_module
+from src.app import application
+from src.db.context import DbContext
+from src.worker import Worker
+
+
+class FakeScheduler:
+    def __init__(self):
+        self.running = False
+        self.calls = []
+
+    def start(self):
+        self.running = True
+        self.calls.append("start")
+
+    def shutdown(self, wait=True):
+        self.running = False
+        self.calls.append("shutdown")
+
+
+@pytest.fixture
+def scheduler(monkeypatch) -> FakeScheduler:
+    scheduler = FakeScheduler()
+    monkeypatch.setattr(worker_module, "scheduler", scheduler)
+    return scheduler
+
+
+@pytest.fixture
+def pollers(monkeypatch) -> dict:
+    """Replaces the event pollers with a task recording whether it ran and was cancelled."""
+    state = {"started": False, "cancelled": False}
+
+    async def register_event_pollers():
+        state["started"] = True
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            state["cancelled"] = True
+            raise
+
+    monkeypatch.setattr(worker_module, "register_event_pollers", register_event_pollers)
+    return state
+
+
+def test_app_role_must_be_known():
+    with pytest.raises(ValidationError, match="APP_ROLE"):
+        type(settings)(APP_ROLE="queue")
+
+
+@pytest.mark.parametrize("role, expected", [("web", 6), ("all", 4), ("worker", 6)])
+def test_process_count_covers_every_role(monkeypatch, role, expected):
+    monkeypatch.setattr(settings, "app_role", role)
+    monkeypatch.setattr(settings, "workers", 4)
+    monkeypatch.setattr(settings, "worker_processes", 2)
+
+    assert settings.process_count == expected
+
+
+@pytest.mark.parametrize("role", ["web", "worker"])
+def test_web_and_worker_deployments_share_the_connection_budget(monkeypatch, role):
+    monkeypatch.setattr(settings, "app_role", role)
+    monkeypatch.setattr(settings, "workers", 4)
+    monkeypatch.setattr(settings, "worker_processes", 2)
+    monkeypatch.setattr(settings, "database_pool_size", 20)
+    monkeypatch.setattr(settings, "database_max_overflow", 20)
+    monkeypatch.setattr(settings, "database_connection_budget", 30)
+
+    # 6 processes across both deployments, 5 connections each
+    assert DbContext._pool_limits() == (5, 0)
+
+
+async def test_start_and_stop(scheduler, pollers):
+    await Worker.start()
+    await asyncio.sleep(0)
+    assert pollers["started"]
+    assert scheduler.running
+
+    await Worker.stop()
+    assert pollers["cancelled"]
+    assert scheduler.calls == ["start", "shutdown"]
+
+
+async def test_start_without_the_scheduler(scheduler, pollers):
+    await Worker.start(run_scheduler=False)
+    await asyncio.sleep(0)
+    await Worker.stop()
+
+    assert pollers["started"] and pollers["cancelled"]
+    assert scheduler.calls == []
+
+
+@pytest.mark.parametrize("index, scheduled", [(0, True), (1, False)])
+async def test_worker_process_runs_until_sigterm(db, monkeypatch, scheduler, pollers, index, scheduled):
+    run = asyncio.create_task(Worker.run(index))
+    while not pollers["started"]:
+        await asyncio.sleep(0.01)
+    assert scheduler.running is scheduled
+
+    os.kill(os.getpid(), signal.SIGTERM)
+    await asyncio.wait_for(run, 5)
+
+    assert pollers["cancelled"]
+    assert not scheduler.running
+
+
+class FakeProcess:
+    def __init__(self, alive: bool):
+        self.alive = alive
+        self.sentinel = object()
+
+    def is_alive(self) -> bool:
+        return self.alive
+
+
+def test_pool_waits_on_live_children_until_the_next_restart(monkeypatch):
+    waits = []
+    monkeypatch.setattr(worker_module, "wait", lambda sentinels, timeout: waits.append((sentinels, timeout)))
+    monkeypatch.setattr(worker_module, "RESTART_DELAY_IN_SECONDS", 5)
+    live, exited = FakeProcess(alive=True), FakeProcess(alive=False)
+    now = time.monotonic()
+
+    Worker._wait_for_children({0: live, 1: exited}, {0: now - 60, 1: now - 4.5})
+    Worker._wait_for_children({0: live}, {0: now - 60})
+
+    # The exited child's sentinel would be ready at once: only its restart delay is waited for
+    (sentinels, timeout), (_, idle_timeout) = waits
+    assert sentinels == [live.sentinel]
+    assert 0.4 < timeout <= 0.5
+    assert idle_timeout == 1
+
+
+@pytest.mark.parametrize("role, started", [("web", False), ("all", True)])
+def test_lifespan_runs_the_worker_for_the_all_role(sync_engine, monkeypatch, scheduler, pollers, role, started):
+    monkeypatch.setattr(settings, "app_role", role)
+
+    with TestClient(application):
+        # The pollers task runs on the client's event loop, in another thread
+        deadline = time.monotonic() + 1
+        while started and not pollers["started"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert pollers["started"] is started
+        assert scheduler.running is started
+
+    assert pollers["cancelled"] is started
+    assert not scheduler.running
@@ -0,0 +1,37 @@
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import pytest
+
+from src.services import SampleService
+from src.utils.cursor_utils import CursorUtils
+
+
+def test_encode_decode_round_trip():
+    cursor = CursorUtils.encode("2024-01-02T03:04:05", "abc", 1.5)
+
+    assert "=" not in cursor
+    assert CursorUtils.decode(cursor, 3) == ["2024-01-02T03:04:05", "abc", 1.5]
+
+
+@pytest.mark.parametrize("cursor", ["", "not a cursor", "!!!!", CursorUtils.encode({"a": 1})])
+def test_decode_rejects_malformed_cursors(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        CursorUtils.decode(cursor, 2)
+
+
+def test_decode_rejects_wrong_number_of_values():
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        CursorUtils.decode(CursorUtils.encode(1, 2, 3), 2)
+
+
+def test_decode_cursor_returns_keyset():
+    created_on = datetime(2024, 1, 2, 3, 4, 5, 123456, tzinfo=timezone.utc)
+    entity_id = uuid4()
+
+    assert SampleService.decode_cursor(CursorUtils.encode(created_on, entity_id)) == (created_on, entity_id)
+
+
+def test_decode_cursor_rejects_invalid_keyset():
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        SampleService.decode_cursor(CursorUtils.encode("yesterday", "not-a-uuid"))
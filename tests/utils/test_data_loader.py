@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from src.utils.data_loader import DataLoader
+
+
+def recording_loader(batches: list, fail: bool = False) -> DataLoader:
+    async def batch_load(keys):
+        batches.append(keys)
+        await asyncio.sleep(0.01)
+        if fail:
+            raise ValueError("failed")
+        return {key: key.upper() for key in keys if key != "missing"}
+
+    return DataLoader(batch_load)
+
+
+async def test_loads_of_one_tick_are_batched():
+    batches = []
+    loader = recording_loader(batches)
+
+    results = await asyncio.gather(loader.load("a"), loader.load("b"), loader.load("a"), loader.load("missing"))
+
+    assert results == ["A", "B", "A", None]
+    assert batches == [["a", "b", "missing"]]
+
+
+async def test_load_many():
+    batches = []
+    loader = recording_loader(batches)
+
+    assert await loader.load_many(["b", "a"]) == ["B", "A"]
+    assert batches == [["b", "a"]]
+
+
+async def test_later_ticks_get_batches_of_their_own():
+    batches = []
+    loader = recording_loader(batches)
+
+    assert await loader.load("a") == "A"
+    assert await loader.load("a") == "A"
+    assert batches == [["a"], ["a"]]
+
+
+async def test_failure_is_raised_to_every_caller():
+    loader = recording_loader([], fail=True)
+
+    results = await asyncio.gather(loader.load("a"), loader.load("b"), return_exceptions=True)
+
+    assert [type(result) for result in results] == [ValueError, ValueError]
+
+
+async def test_cancelled_caller_does_not_cancel_the_others():
+    loader = recording_loader([])
+    first = asyncio.ensure_future(loader.load("a"))
+    second = asyncio.ensure_future(loader.load("a"))
+    await asyncio.sleep(0)
+
+    first.cancel()
+
+    assert await second == "A"
+    with pytest.raises(asyncio.CancelledError):
+        await first
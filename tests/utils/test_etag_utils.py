@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+
+from src.utils.etag_utils import EtagUtils
+
+MODIFIED_ON = datetime(2024, 5, 6, 7, 8, 9, 123456, tzinfo=timezone.utc)
+
+
+def test_if_match_gives_back_modified_on():
+    entity_id = uuid4()
+    etag = EtagUtils.entity_etag(entity_id, MODIFIED_ON)
+
+    assert EtagUtils.expected_modified_on(etag, entity_id) == MODIFIED_ON
+    assert EtagUtils.expected_modified_on(f'"other", {etag}', entity_id) == MODIFIED_ON
+
+
+def test_naive_datetimes_are_utc():
+    entity_id = uuid4()
+
+    assert EtagUtils.entity_etag(entity_id, MODIFIED_ON.replace(tzinfo=None)) == EtagUtils.entity_etag(entity_id, MODIFIED_ON)
+    offset = MODIFIED_ON.astimezone(timezone(timedelta(hours=2)))
+    assert EtagUtils.entity_etag(entity_id, offset) == EtagUtils.entity_etag(entity_id, MODIFIED_ON)
+
+
+def test_if_match_any_version():
+    assert EtagUtils.expected_modified_on("*", uuid4()) is None
+
+
+@pytest.mark.parametrize("if_match", [
+    '"not-an-etag"',
+    "W/{etag}",
+    '"{other_id}.1714979289123456"',
+    '"{entity_id}.soon"',
+])
+def test_if_match_that_can_never_match(if_match):
+    entity_id = uuid4()
+    etag = EtagUtils.entity_etag(entity_id, MODIFIED_ON)
+    header = if_match.format(etag=etag, entity_id=entity_id.hex, other_id=uuid4().hex)
+
+    with pytest.raises(ValueError):
+        EtagUtils.expected_modified_on(header, entity_id)
+
+
+def test_if_none_match_uses_weak_comparison():
+    etag = EtagUtils.entity_etag(uuid4(), MODIFIED_ON)
+
+    assert EtagUtils.is_not_modified(etag, MODIFIED_ON, etag, None)
+    assert EtagUtils.is_not_modified(etag, MODIFIED_ON, f'"other", W/{etag}', None)
+    assert EtagUtils.is_not_modified(etag, MODIFIED_ON, "*", None)
+    assert not EtagUtils.is_not_modified(etag, MODIFIED_ON, '"other"', None)
+
+
+def test_if_none_match_takes_precedence_over_if_modified_since():
+    etag = EtagUtils.entity_etag(uuid4(), MODIFIED_ON)
+    later = EtagUtils.last_modified(MODIFIED_ON + timedelta(days=1))
+
+    assert not EtagUtils.is_not_modified(etag, MODIFIED_ON, '"other"', later)
+
+
+def test_if_modified_since_has_one_second_resolution():
+    etag = EtagUtils.entity_etag(uuid4(), MODIFIED_ON)
+
+    assert EtagUtils.last_modified(MODIFIED_ON) == "Mon, 06 May 2024 07:08:09 GMT"
+    assert EtagUtils.is_not_modified(etag, MODIFIED_ON, None, "Mon, 06 May 2024 07:08:09 GMT")
+    assert not EtagUtils.is_not_modified(etag, MODIFIED_ON, None, "Mon, 06 May 2024 07:08:08 GMT")
+    assert not EtagUtils.is_not_modified(etag, MODIFIED_ON, None, "yesterday")
+    assert not EtagUtils.is_not_modified(etag, None, None, "Mon, 06 May 2024 07:08:09 GMT")
+
+
+def test_page_etag_covers_every_version_and_the_rest_of_the_body():
+    entity_id = uuid4()
+    etag = EtagUtils.page_etag([(entity_id, MODIFIED_ON)], 1, "exact")
+
+    assert etag == EtagUtils.page_etag([(entity_id, MODIFIED_ON)], 1, "exact")
+    assert etag != EtagUtils.page_etag([(entity_id, MODIFIED_ON + timedelta(microseconds=1))], 1, "exact")
+    assert etag != EtagUtils.page_etag([(entity_id, MODIFIED_ON)], 2, "exact")
+    assert etag != EtagUtils.page_etag([], 1, "exact")
+
+
+def test_coding_suffix():
+    etag = EtagUtils.entity_etag(uuid4(), MODIFIED_ON)
+    compressed = EtagUtils.with_coding(etag, "gzip")
+
+    assert compressed == f'{etag[:-1]}-gzip"'
+    assert EtagUtils.without_coding(compressed) == etag
+    assert EtagUtils.without_coding(etag) == etag
+    assert EtagUtils.with_coding("W/unquoted", "gzip") == "W/unquoted"
+
+
+def test_coding_suffix_is_ignored_by_preconditions():
+    entity_id = uuid4()
+    etag = EtagUtils.entity_etag(entity_id, MODIFIED_ON)
+
+    assert EtagUtils.is_not_modified(etag, MODIFIED_ON, EtagUtils.with_coding(etag, "br"), None)
+    assert EtagUtils.expected_modified_on(EtagUtils.with_coding(etag, "zstd"), entity_id) == MODIFIED_ON